@@ -24,6 +24,12 @@ import tkinter as tk  # Importing Tkinter to create the graphical interface (GUI
 from tkinter import messagebox  # Importing messagebox to show pop-ups like "Correct!" or "Game Over".
 import random  # Importing random to generate the math numbers and pick operators (+ or -).
 from PIL import Image, ImageTk  # Importing Pillow to handle the animated background image (GIF).
+import argparse  # Importing argparse to read the command-line options for the worksheet export.
+import csv  # Importing csv to write worksheets as spreadsheet-friendly files.
+import os  # Importing os to build the output file paths.
+import sys  # Importing sys to check if the app was started with command-line options.
+import json  # Importing json to save and load quiz session recordings.
+import time  # Importing time to timestamp the events in a session recording.
 
 # --- 1. CONFIGURATION: Setting up the look and feel ---
 # I decided to use a dark theme because it looks more modern and is easier on the eyes.
@@ -72,7 +78,8 @@ game_state = {
     'entry': None, 
     'current_page_frame': None, 
     'bg_animation_label': None,
-    'attempt_label': None # Reference to update attempt label dynamically
+    'attempt_label': None, # Reference to update attempt label dynamically
+    'recording': None # Event log of the current session (see section 9)
 }
 
 # --- 3. BACKGROUND ANIMATION SETUP ---
@@ -82,11 +89,18 @@ frames = [] # This list will hold the individual pictures of the GIF.
 current_frame = 0 
 
 # --- 4. MAIN WINDOW SETUP ---
-root = tk.Tk() # Creating the main window.
-root.geometry("1000x750") # Setting the size to 1000 pixels wide, 750 pixels tall.
-root.title("MY MATHS QUIZ APP") 
-root.resizable(False, False) # Making sure the window size is fixed so my layout doesn't break.
-root.config(bg=BG_COLOR) 
+# The window is only created when the GUI actually starts (see section 11), so the
+# worksheet export and session replay can also run on a computer with no screen attached.
+root = None
+
+def create_main_window():
+    """Creates and configures the main Tkinter window."""
+    global root
+    root = tk.Tk() # Creating the main window.
+    root.geometry("1000x750") # Setting the size to 1000 pixels wide, 750 pixels tall.
+    root.title("MY MATHS QUIZ APP") 
+    root.resizable(False, False) # Making sure the window size is fixed so my layout doesn't break.
+    root.config(bg=BG_COLOR) 
 
 # --- 5. LOADING THE GIF ---
 def load_gif_frames():
@@ -110,8 +124,6 @@ def load_gif_frames():
         print(f"ERROR: GIF file '{gif_path}' not found. Background animation disabled.")
     except Exception as e:
         print(f"ERROR loading GIF: {e}. Background animation disabled.")
-    
-load_gif_frames() # Call this immediately to load images before showing the window.
 
 
 # --- 6. ANIMATION & UI HELPERS ---
@@ -191,128 +203,181 @@ def confirm_exit():
     """Shows a confirmation box before closing the app."""
     ans = messagebox.askyesno("Quit", "Are you sure you want to quit?")
     if ans:
+        finish_recording("quit")
         root.quit()
 
 # --- 7. CORE QUIZ LOGIC (The Maths Part) ---
 
-def randomInt(level):
+def randomInt(level, rng=random):
     """
     Generates random numbers based on the selected difficulty.
     Level 1: Single digits (1-9)
     Level 2: Double digits (10-99)
     Level 3: Four digits (1000-9999) as required.
+    'rng' can be a random.Random object so a set of questions can be repeated from a seed.
     """
     if level == 1:
-        return random.randint(1, 9), random.randint(1, 9) 
+        return rng.randint(1, 9), rng.randint(1, 9) 
     if level == 2:
-        return random.randint(10, 99), random.randint(10, 99) 
+        return rng.randint(10, 99), rng.randint(10, 99) 
     # Level 3 logic
-    return random.randint(1000, 9999), random.randint(1000, 9999) 
+    return rng.randint(1000, 9999), rng.randint(1000, 9999) 
 
-def decideOperation():
+def decideOperation(rng=random):
     """Randomly picks Addition (+) or Subtraction (-)."""
-    return random.choice(['+', '-'])
+    return rng.choice(['+', '-'])
+
+def generate_question(level, rng=random):
+    """
+    Builds one complete question and returns it as (num1, operator, num2, answer).
+    This has no GUI code in it, so both the quiz screen and the worksheet export use it.
+    """
+    num1, num2 = randomInt(level, rng)
+    operator = decideOperation(rng)
+
+    # Logic to prevent negative answers (swaps numbers if needed).
+    if operator == '-' and num1 < num2:
+        num1, num2 = num2, num1
+
+    # Calculate the real answer
+    ans = num1 + num2 if operator == '+' else num1 - num2
+    return num1, operator, num2, ans
 
-def isCorrect(user_ans):
+def isCorrect(user_ans, state=None):
     """Checks if the user input matches the calculated answer."""
-    return user_ans == game_state['ans']
+    state = game_state if state is None else state
+    return user_ans == state['ans']
 
 def displayResults():
     """Moves to the final results screen."""
+    finish_recording("completed")
     switch_page(show_results_page)
 
-def start_new_quiz(level):
-    """Initializes a brand new game session."""
-    game_state.update({
+# The quiz rules below only change the state dictionary they are given and never
+# touch the GUI. The buttons call them with 'game_state', and the session replay
+# (section 9) calls them with a fresh dictionary, so both follow exactly the same rules.
+
+def new_quiz_state(level, seed):
+    """Returns the starting values for a quiz session."""
+    return {
         'level': level,
+        'seed': seed,
+        'rng': random.Random(seed), # Own random generator so the session can be replayed
         'question_num': 0,
         'score': 0,
         'current_attempt': 1,
         'skips_used': 0 
-    })
+    }
+
+def advance_question(state):
+    """Moves on to the next question. Returns False when all 10 are done."""
+    if state['question_num'] >= 10:
+        return False
+
+    state['question_num'] += 1
+    state['current_attempt'] = 1 # Reset attempts for the new question
+
+    num1, operator, num2, ans = generate_question(state['level'], state['rng'])
+    state.update({'num1': num1, 'operator': operator, 'num2': num2, 'ans': ans})
+    return True
+
+def submit_answer(state, user_input):
+    """
+    Applies one typed answer and returns (outcome, points).
+    Outcomes: 'empty', 'invalid', 'correct', 'retry' (1st try wrong) or 'wrong' (2nd try wrong).
+    1st try correct = 10 points.
+    2nd try correct = 5 points.
+    """
+    if not user_input.strip():
+        return 'empty', 0
+
+    try:
+        user_ans = int(user_input)
+    except ValueError: 
+        return 'invalid', 0
+
+    if isCorrect(user_ans, state):
+        points = 10 if state['current_attempt'] == 1 else 5
+        state['score'] += points
+        return 'correct', points
+
+    if state['current_attempt'] == 1:
+        # If it was the first try, let them try again.
+        state['current_attempt'] = 2
+        return 'retry', 0
+    return 'wrong', 0
+
+def use_skip(state):
+    """Uses up one skip if any are left (max 3). Returns True if the skip was allowed."""
+    if state['skips_used'] < 3:
+        state['skips_used'] += 1
+        return True
+    return False
+
+def start_new_quiz(level, seed=None):
+    """Initializes a brand new game session."""
+    finish_recording("abandoned") # Saving the previous session if it was never finished
+    if seed is None:
+        seed = random.randrange(2**32)
+    game_state.update(new_quiz_state(level, seed))
+    start_recording(level, seed)
     next_question()
 
 def next_question():
     """Sets up the variables for the next question."""
-    if game_state['question_num'] >= 10:
+    if not advance_question(game_state):
         displayResults() # If we did 10 questions, finish game.
         return
-
-    game_state['question_num'] += 1
-    game_state['current_attempt'] = 1 # Reset attempts for the new question
-
-    game_state['num1'], game_state['num2'] = randomInt(game_state['level'])
-    game_state['operator'] = decideOperation()
-    
-    # Logic to prevent negative answers (swaps numbers if needed).
-    if game_state['operator'] == '-':
-        if game_state['num1'] < game_state['num2']:
-             game_state['num1'], game_state['num2'] = game_state['num2'], game_state['num1']
-             
-    # Calculate the real answer
-    game_state['ans'] = game_state['num1'] + game_state['num2'] if game_state['operator'] == '+' else game_state['num1'] - game_state['num2']
-
     displayProblem() # Refresh the screen
 
 def check_answer(user_input):
     """
-    Validates user input and awards points.
-    1st try correct = 10 points.
-    2nd try correct = 5 points.
+    Validates user input and shows the right message for the outcome.
     """
     if user_input == "SKIP_REQUEST":
         handle_skip() 
         return
-        
-    if not user_input.strip():
-        create_floating_emojis('🤔')
-        messagebox.showwarning("Invalid Input", "Please enter a valid whole number!")
-        return
 
-    try:
-        user_ans = int(user_input)
-    except ValueError: 
+    record_event('a', user_input)
+    outcome, points = submit_answer(game_state, user_input)
+    record_outcome(outcome)
+
+    if outcome in ('empty', 'invalid'):
         create_floating_emojis('🤔')
         messagebox.showwarning("Invalid Input", "Please enter a valid whole number!")
-        if game_state.get('entry'):
+        if outcome == 'invalid' and game_state.get('entry'):
             game_state['entry'].delete(0, tk.END) 
-        return
 
-    if isCorrect(user_ans):
-        # Correct Answer
-        points = 10 if game_state['current_attempt'] == 1 else 5
-        game_state['score'] += points
-        
+    elif outcome == 'correct':
         create_floating_emojis('😁')
         messagebox.showinfo("Correct!", f"✅ Correct! +{points} points.")
         next_question()
-        
+
+    elif outcome == 'retry':
+        create_floating_emojis('🥹')
+        messagebox.showwarning("Incorrect", "❌ Wrong answer! Try again for 5 points.")
+
+        # Update the attempt label
+        if game_state['attempt_label']:
+            game_state['attempt_label'].config(text="ATTEMPT: 2/2", fg=ACCENT_RED)
+
+        if game_state.get('entry'):
+            game_state['entry'].delete(0, tk.END)
+
     else:
-        # Wrong Answer
-        if game_state['current_attempt'] == 1:
-            # If it was the first try, let them try again.
-            game_state['current_attempt'] = 2
-            
-            create_floating_emojis('🥹')
-            messagebox.showwarning("Incorrect", "❌ Wrong answer! Try again for 5 points.")
-            
-            # Update the attempt label
-            if game_state['attempt_label']:
-                game_state['attempt_label'].config(text="ATTEMPT: 2/2", fg=ACCENT_RED)
-
-            if game_state.get('entry'):
-                game_state['entry'].delete(0, tk.END)
-        else:
-            # If it was the second try, show the answer and move on.
-            create_floating_emojis('💀')
-            messagebox.showerror("Incorrect", f"❌ Wrong answer!\nCorrect answer: {game_state['ans']}")
-            next_question()
+        # If it was the second try, show the answer and move on.
+        create_floating_emojis('💀')
+        messagebox.showerror("Incorrect", f"❌ Wrong answer!\nCorrect answer: {game_state['ans']}")
+        next_question()
 
 
 def handle_skip():
     """Handles the skip logic (max 3 skips)."""
-    if game_state['skips_used'] < 3:
-        game_state['skips_used'] += 1
+    record_event('s')
+    allowed = use_skip(game_state)
+    record_outcome('skipped' if allowed else 'skip_limit')
+
+    if allowed:
         create_floating_emojis('⏩')
         messagebox.showinfo("Skipped", f"⏩ Question skipped. Skips remaining: {3 - game_state['skips_used']}")
         next_question()
@@ -578,11 +643,282 @@ def show_results_page():
             widget.bind("<Leave>", on_result_btn_leave)
 
 
-# --- 9. START APP ---
-show_welcome_page()
+# --- 9. SESSION RECORDINGS ---
+# Every quiz is recorded as a small log: the level, the random seed and each thing the
+# user typed (with the time in ms since the start). Because the questions come from the
+# seed, this is enough to play the whole session again without the GUI, which is how
+# I reproduce problems that students report and test the quiz rules quickly.
+
+SESSIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "quiz_sessions")
+RECORDING_VERSION = 1
 
+# One letter per outcome keeps the saved logs short.
+OUTCOME_CODES = {
+    'empty': 'E', 'invalid': 'I', 'correct': 'C', 'retry': 'R',
+    'wrong': 'W', 'skipped': 'S', 'skip_limit': 'L'
+}
+
+def start_recording(level, seed):
+    """Starts a new, empty recording for the session that is about to begin."""
+    game_state['recording'] = {
+        'v': RECORDING_VERSION,
+        'level': level,
+        'seed': seed,
+        'started': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'events': [],    # [ms, 'a', text] for an answer, [ms, 's'] for a skip
+        'outcomes': ''   # One OUTCOME_CODES letter per event
+    }
+    game_state['recording_t0'] = time.monotonic()
+
+def record_event(kind, value=None):
+    """Adds one user action to the current recording."""
+    recording = game_state['recording']
+    if recording is None:
+        return
+    ms = int((time.monotonic() - game_state['recording_t0']) * 1000)
+    recording['events'].append([ms, kind] if value is None else [ms, kind, value])
+
+def record_outcome(outcome):
+    """Stores what the quiz decided for the last event, so a replay can be checked."""
+    if game_state['recording'] is not None:
+        game_state['recording']['outcomes'] += OUTCOME_CODES[outcome]
+
+def finish_recording(reason):
+    """Closes the current recording and saves it. Returns the file path (or None)."""
+    recording = game_state['recording']
+    if recording is None:
+        return None
+    game_state['recording'] = None
+    if reason != "completed" and not recording['events']:
+        return None # Nothing happened, so there is nothing worth keeping
+
+    recording.update({'end': reason, 'score': game_state['score'], 'questions': game_state['question_num']})
+    return save_recording(recording)
+
+def save_recording(recording, folder=None):
+    """Writes a recording as compact JSON and returns the file path."""
+    folder = folder or SESSIONS_DIR
+    filename = f"session-{recording['started'].replace(':', '').replace('-', '')}-{recording['seed']}.json"
+    path = os.path.join(folder, filename)
+    try:
+        os.makedirs(folder, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(recording, f, separators=(",", ":"))
+    except OSError as e:
+        print(f"ERROR saving session recording: {e}")
+        return None
+    return path
+
+def load_recordings(path):
+    """Loads one recording file, or every recording in a folder."""
+    if os.path.isdir(path):
+        files = sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(".json"))
+    else:
+        files = [path]
+
+    recordings = []
+    for file_path in files:
+        with open(file_path, "r", encoding="utf-8") as f:
+            recording = json.load(f)
+        if recording.get('v') != RECORDING_VERSION:
+            raise ValueError(f"{file_path}: unsupported recording version {recording.get('v')}")
+        recordings.append((file_path, recording))
+    return recordings
+
+def replay_session(recording):
+    """
+    Plays a recorded session through the quiz rules with no GUI and no waiting.
+    Returns (final_score, outcome_letters).
+    """
+    state = new_quiz_state(recording['level'], recording['seed'])
+    finished = not advance_question(state)
+    outcomes = []
+
+    for event in recording['events']:
+        if finished:
+            break
+        if event[1] == 'a':
+            outcome, _ = submit_answer(state, event[2])
+            move_on = outcome in ('correct', 'wrong')
+        else:
+            outcome = 'skipped' if use_skip(state) else 'skip_limit'
+            move_on = outcome == 'skipped'
+        outcomes.append(OUTCOME_CODES[outcome])
+        if move_on:
+            finished = not advance_question(state)
+
+    return state['score'], ''.join(outcomes)
+
+def check_replay(recording):
+    """
+    Replays a session and compares it with what was recorded.
+    Returns a list of problems (an empty list means the replay matched).
+    """
+    score, outcomes = replay_session(recording)
+    problems = []
+
+    if outcomes != recording['outcomes']:
+        # Finding the first event where the replay went a different way
+        i = next((i for i, (a, b) in enumerate(zip(outcomes, recording['outcomes'])) if a != b),
+                 min(len(outcomes), len(recording['outcomes'])))
+        event = recording['events'][i] if i < len(recording['events']) else None
+        problems.append(f"outcome differs at event {i + 1} {event}: "
+                        f"recorded '{recording['outcomes'][i:i + 1]}', replayed '{outcomes[i:i + 1]}'")
+    if 'score' in recording and score != recording['score']:
+        problems.append(f"score differs: recorded {recording['score']}, replayed {score}")
+    return problems
+
+def run_replay(path, repeat=1):
+    """Checks every recording found at 'path', then times 'repeat' replays of them."""
+    recordings = load_recordings(path)
+    if not recordings:
+        print(f"No session recordings found in '{path}'.")
+        return False
+
+    all_ok = True
+    for file_path, recording in recordings:
+        problems = check_replay(recording)
+        all_ok = all_ok and not problems
+        print(f"{'OK      ' if not problems else 'MISMATCH'} {os.path.basename(file_path)}")
+        for problem in problems:
+            print(f"    {problem}")
+
+    if repeat > 1:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for _, recording in recordings:
+                replay_session(recording)
+        elapsed = time.perf_counter() - start
+        total = repeat * len(recordings)
+        print(f"Replayed {total} sessions in {elapsed:.3f}s ({total / elapsed:,.0f} sessions/s).")
+    return all_ok
+
+
+# --- 10. OFFLINE WORKSHEET EXPORT ---
+# Teachers asked for printable worksheets for a whole class, so the same question
+# generator can also write question sheets and answer keys straight to files.
+# Every worksheet is written as soon as it is made, so even 100,000 sheets never
+# have to sit in memory together.
+
+QUESTIONS_PER_SHEET = 10
+EXPORT_FORMATS = ("txt", "csv")
+
+def iter_worksheets(level, count=None, names=None, seed=None):
+    """
+    Yields (sheet_number, student_name, questions) one worksheet at a time.
+    If 'names' is given (any iterable, e.g. an open class list file) there is one sheet
+    per student, otherwise 'count' anonymous sheets are made.
+    Using the same seed always gives the same worksheets, so answer keys can be re-printed.
+    """
+    rng = random.Random(seed)
+    from_class_list = names is not None
+    if not from_class_list:
+        names = ("" for _ in range(count or 0))
+
+    sheet_no = 0
+    for name in names:
+        name = name.strip()
+        if from_class_list and not name:
+            continue # Skipping blank lines in the class list
+        sheet_no += 1
+        questions = [generate_question(level, rng) for _ in range(QUESTIONS_PER_SHEET)]
+        yield sheet_no, name, questions
+
+def write_text_sheet(questions_file, key_file, sheet_no, name, level, questions):
+    """Writes one worksheet and its answer key as plain text pages."""
+    header = f"MATHS QUIZ WORKSHEET #{sheet_no}   LEVEL {level}"
+    if name:
+        header += f"   NAME: {name}"
+    questions_file.write(header + "\n" + "=" * len(header) + "\n\n")
+    key_file.write(header + "   (ANSWER KEY)\n" + "=" * (len(header) + 15) + "\n\n")
+
+    for i, (num1, operator, num2, ans) in enumerate(questions, start=1):
+        questions_file.write(f"{i:>2}.  {num1} {operator} {num2} = ________\n\n")
+        key_file.write(f"{i:>2}.  {num1} {operator} {num2} = {ans}\n")
+
+    # A form feed character starts a new page when the file is printed or
+    # converted to PDF, so every student gets their own page.
+    questions_file.write("\f")
+    key_file.write("\f")
+
+def export_worksheets(out_dir, level, fmt="txt", count=None, names=None, seed=None):
+    """
+    Streams worksheets and answer keys into 'out_dir' and returns how many sheets were written.
+    txt -> worksheets.txt + answer_key.txt (one printable page per sheet)
+    csv -> worksheets.csv + answer_key.csv (one row per question)
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'. Use one of: {', '.join(EXPORT_FORMATS)}")
+
+    os.makedirs(out_dir, exist_ok=True)
+    questions_path = os.path.join(out_dir, f"worksheets.{fmt}")
+    key_path = os.path.join(out_dir, f"answer_key.{fmt}")
+
+    written = 0
+    # newline="" is what the csv module wants; it is harmless for the text files.
+    with open(questions_path, "w", encoding="utf-8", newline="") as questions_file, \
+         open(key_path, "w", encoding="utf-8", newline="") as key_file:
+        if fmt == "csv":
+            questions_writer = csv.writer(questions_file)
+            key_writer = csv.writer(key_file)
+            questions_writer.writerow(["sheet", "name", "level", "question", "num1", "operator", "num2"])
+            key_writer.writerow(["sheet", "name", "level", "question", "num1", "operator", "num2", "answer"])
+
+        for sheet_no, name, questions in iter_worksheets(level, count, names, seed):
+            if fmt == "csv":
+                for i, (num1, operator, num2, ans) in enumerate(questions, start=1):
+                    questions_writer.writerow([sheet_no, name, level, i, num1, operator, num2])
+                    key_writer.writerow([sheet_no, name, level, i, num1, operator, num2, ans])
+            else:
+                write_text_sheet(questions_file, key_file, sheet_no, name, level, questions)
+            written += 1
+
+    return written
+
+def run_command_line(argv):
+    """
+    Handles the command-line options, e.g.
+        python TASK1.py --export out --count 30 --level 2 --format csv
+        python TASK1.py --export out --class-list names.txt --seed 42
+        python TASK1.py --replay quiz_sessions --repeat 1000
+    """
+    parser = argparse.ArgumentParser(description="Maths Quiz - worksheet export and session replay")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--export", metavar="DIR", help="folder to write the worksheets into")
+    mode.add_argument("--replay", metavar="PATH", help="session recording (or folder of them) to replay")
+    parser.add_argument("--repeat", type=int, default=1, help="replay the sessions this many times and report the speed")
+    parser.add_argument("--level", type=int, choices=[1, 2, 3], default=1, help="difficulty level (default 1)")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="txt", help="output format (default txt)")
+    parser.add_argument("--count", type=int, default=1, help="number of worksheets when no class list is given")
+    parser.add_argument("--class-list", metavar="FILE", help="text file with one student name per line")
+    parser.add_argument("--seed", type=int, help="seed for repeatable worksheets")
+    args = parser.parse_args(argv)
+
+    if args.replay:
+        return 0 if run_replay(args.replay, args.repeat) else 1
+
+    if args.class_list:
+        # The class list is read line by line while exporting, never all at once.
+        with open(args.class_list, "r", encoding="utf-8") as names:
+            written = export_worksheets(args.export, args.level, args.format, names=names, seed=args.seed)
+    else:
+        written = export_worksheets(args.export, args.level, args.format, count=args.count, seed=args.seed)
+
+    print(f"Exported {written} worksheets to '{args.export}'.")
+    return 0
+
+
+# --- 11. START APP ---
 def on_close():
+    finish_recording("quit")
     root.destroy()
 
-root.protocol("WM_DELETE_WINDOW", on_close)
-root.mainloop() # Keep window open.
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(run_command_line(sys.argv[1:])) # Export/replay mode: no window is opened.
+    else:
+        create_main_window()
+        load_gif_frames() # Loading the images before showing the first page.
+        show_welcome_page()
+        root.protocol("WM_DELETE_WINDOW", on_close)
+        root.mainloop() # Keep window open.
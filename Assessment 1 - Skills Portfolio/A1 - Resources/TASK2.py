@@ -30,11 +30,54 @@ ACADEMIC REFERENCES & RESOURCES USED
 # Importing the necessary libraries for the application
 import tkinter as tk                # Primary library for creating the GUI window
 from tkinter import messagebox      # Module for displaying pop-up alert dialogs
+from tkinter import ttk             # Themed widgets (used for the joke filter drop-downs)
 import random                       # Library for selecting random elements from lists
-import pyttsx3                      # Library for Text-to-Speech (TTS) functionality
 import threading                    # Module to allow background execution (prevents UI freezing)
-import winsound                     # Native Windows library for playing .wav sound files
+import queue                        # Thread-safe queue used to send commands to the speech worker
+import time                         # Used for the short waits of the speech worker
 import string                       # Module provides string constants (used for removing punctuation)
+import os                           # Module for building file paths and checking file timestamps
+import sys                          # Tells us which operating system we are on (for the voice cache)
+import json                         # Module for reading/writing the header of the joke index cache
+from array import array             # Compact arrays of numbers (used for the joke index)
+from bisect import bisect_left      # Finds a joke id in a sorted list of ids
+from functools import lru_cache     # Remembers recently normalized punchlines
+from collections import Counter     # Counting letter pairs for the quick similarity pre-check
+from collections import OrderedDict # Keeps the speech cache files in least-recently-used order
+from collections import deque       # Keeps the batch-grading chunks in the order they were read
+import hashlib                      # Turns (text, voice, rate, volume) into a cache file name
+import wave                         # Reads the length of cached .wav files
+import shutil                       # Finds a command-line audio player on Linux/macOS
+import subprocess                   # Runs that audio player
+import io                           # Lets the wave module read sounds already loaded into memory
+import argparse                     # Reads the command-line options for batch grading
+import csv                          # Reads/writes the guesses files for batch grading
+from concurrent.futures import ProcessPoolExecutor  # Grades big batches on several CPU cores
+
+try:
+    import pyttsx3                  # Library for Text-to-Speech (TTS) functionality
+except ImportError:
+    pyttsx3 = None                  # The app still works without speech, just silently
+
+try:
+    import winsound                 # Native Windows library for playing .wav sound files
+except ImportError:
+    winsound = None                 # Not available on Linux/macOS
+
+try:
+    import simpleaudio              # Cross-platform playback of sounds held in memory
+except ImportError:
+    simpleaudio = None              # Falls back to winsound or a command-line player
+
+try:
+    import winreg                   # Windows registry (lists the installed SAPI5 voices)
+except ImportError:
+    winreg = None
+
+try:
+    import numpy as np              # Fast maths on whole arrays (used for the visualizer levels)
+except ImportError:
+    np = None                       # A slower pure-Python version is used instead
 
 # --- THEME CONFIGURATION ---
 # Defining a dictionary to store color codes for consistent theming across the application.
@@ -65,51 +108,586 @@ FONTS = {
 # --------------------------
 # DATA LOADING SECTION
 # --------------------------
-jokes = [] # Initializing an empty list to hold the joke tuples
+# The jokes file is looked up next to this script, so it works from any folder
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+JOKES_FILE = os.path.join(SCRIPT_DIR, "randomJokes.txt")
+INDEX_VERSION = 2
+joke_store = None # The JokeStore that decides which joke comes next (built after loading)
 
-def load_jokes_from_file():
+# The manifest lists every jokes file with its language and the text that separates the
+# setup from the punchline, e.g.
+#   {"corpora": [{"file": "randomJokes.txt", "language": "en", "name": "English", "delimiter": "?"}]}
+# Without a manifest, randomJokes.txt is used as the only (English) file.
+CORPUS_MANIFEST = os.path.join(SCRIPT_DIR, "jokes_manifest.json")
+QUESTION_MARKS = ("?", "？", "؟")  # Delimiters that belong to the end of the setup
+corpora = {}             # language -> {'name', 'language', 'path', 'delimiter', 'store'}
+current_language = None  # Language of the corpus that joke_store comes from
+
+# Sizes (in characters of setup + punchline) used to sort jokes into length buckets
+LENGTH_BUCKETS = (("short", 60), ("medium", 100), ("long", None))
+# Setups starting with one of these words get it as their category, everything else is "other"
+QUESTION_WORDS = ("why", "what", "how", "who", "where", "when", "did")
+
+def parse_joke_line(line, delimiter="?"):
+    """
+    Turns one line of the jokes file into (setup, punchline, tags), or None if it is not a joke.
+    Tags are optional and go after a '|' at the end of the line, e.g.
+        Why do bananas never get lonely?Because they hang out in bunches.|food,animals
+    Files in other languages can use a different delimiter (set in the manifest).
+    """
+    # Validating that the line contains the delimiter
+    if delimiter not in line:
+        return None
+    text, _, tag_text = line.strip().partition("|")
+    # Splitting the string into exactly two parts: setup and punchline
+    parts = text.split(delimiter, 1)
+    if len(parts) != 2:
+        return None
+    if delimiter in QUESTION_MARKS:
+        # Re-appending the question mark to the setup for grammatical correctness
+        setup = parts[0] + delimiter
+        punchline = parts[1]
+    else:
+        setup, punchline = parts[0].strip(), parts[1].strip()
+    tags = tuple(t.strip().lower() for t in tag_text.split(",") if t.strip())
+    return (setup, punchline, tags)
+
+def joke_category(setup):
+    """Works out a category from the first word of the setup ('why', 'what', ...)."""
+    first_word = setup.split(" ", 1)[0].lower()
+    return first_word if first_word in QUESTION_WORDS else "other"
+
+def joke_length_bucket(setup, punchline):
+    """Puts a joke into the 'short', 'medium' or 'long' bucket."""
+    size = len(setup) + len(punchline)
+    for name, limit in LENGTH_BUCKETS:
+        if limit is None or size < limit:
+            return name
+
+class ShuffledDeck:
+    """
+    Deals the numbers 0..size-1 in a random order without repeats, like a shuffled deck
+    of cards. When every card has been dealt, the deck is shuffled again.
+    Instead of shuffling the whole list up front (slow for millions of jokes), this does
+    one step of the Fisher-Yates shuffle per draw and only remembers the swapped
+    positions in a dictionary, so every draw is O(1).
+    """
+    def __init__(self, size, rng=None):
+        self.size = size
+        self.rng = rng or random.Random()
+        self._swaps = {}   # position -> card, only for positions that were swapped
+        self._pos = 0      # how many cards have been dealt this round
+        self._last = None  # last card dealt, so a new round never starts with it
+        self._ahead = []   # cards already decided by peek() but not drawn yet
+
+    def draw(self):
+        if self.size == 0:
+            return None
+        if self._ahead:
+            return self._ahead.pop(0)
+        return self._deal()
+
+    def peek(self, count):
+        """Returns the next 'count' cards without drawing them (they will be drawn in this order)."""
+        if self.size == 0:
+            return []
+        while len(self._ahead) < count:
+            self._ahead.append(self._deal())
+        return self._ahead[:count]
+
+    def _deal(self):
+        if self._pos >= self.size:
+            # Everything has been dealt once: starting a new round
+            self._swaps.clear()
+            self._pos = 0
+
+        i = self._pos
+        j = self.rng.randrange(i, self.size)
+        if i == 0 and self.size > 1:
+            while j == self._last: # Avoiding the same joke twice in a row between rounds
+                j = self.rng.randrange(self.size)
+
+        card_i = self._swaps.get(i, i)
+        card_j = self._swaps.get(j, j)
+        self._swaps[j] = card_i
+        self._swaps.pop(i, None) # Position i is never looked at again this round
+        self._pos += 1
+        self._last = card_j
+        return card_j
+
+class MemoryJokeSource:
+    """
+    A joke source that keeps everything in a normal list (used for the backup jokes).
+    It has the same methods as JokeFileIndex, so JokeStore can use either.
+    """
+    def __init__(self, joke_list):
+        self.jokes = joke_list
+        self.postings = {}  # (kind, value) -> list of joke ids, kinds are category/tag/length
+        for i, (setup, punchline, tags) in enumerate(joke_list):
+            for key in joke_keys(setup, punchline, tags):
+                self.postings.setdefault(key, []).append(i)
+
+    def load(self):
+        pass # Nothing to do, the jokes are already in memory
+
+    def __len__(self):
+        return len(self.jokes)
+
+    def get(self, joke_id):
+        return self.jokes[joke_id]
+
+class JokeFileIndex:
+    """
+    A joke source that reads jokes straight from the file when they are needed.
+    The first time a file is used, it is scanned once to record the byte position where
+    each joke starts, plus lists of joke ids for every category/tag/length. This index is
+    saved next to the file (e.g. randomJokes.txt.idx) and reused until the jokes file
+    changes (different modification time or size). Drawing a joke then only needs one
+    seek() and readline(), however big the file is.
+    """
+    def __init__(self, path, delimiter="?"):
+        self.path = path
+        self.delimiter = delimiter
+        self.cache_path = path + ".idx"
+        self.offsets = None  # array of byte offsets, one per joke (None until loaded)
+        self.postings = {}
+        self._file = None
+        self._lock = threading.Lock() # The file handle is shared, so seeks must not overlap
+
+    def load(self):
+        """Loads the index from the cache, or builds it if the cache is missing or stale."""
+        if self.offsets is not None:
+            return
+        stat = os.stat(self.path)
+        if not self._read_cache(stat):
+            self._build(stat)
+            self._write_cache(stat)
+
+    def __len__(self):
+        self.load()
+        return len(self.offsets)
+
+    def get(self, joke_id):
+        """Reads and parses only the joke with this id."""
+        self.load()
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "rb")
+            self._file.seek(self.offsets[joke_id])
+            line = self._file.readline()
+        return parse_joke_line(line.decode("utf-8", errors="replace"), self.delimiter) # Same as _build()
+
+    def _build(self, stat):
+        # Reading in binary mode so the position of each line is an exact byte offset
+        offsets = array("Q")
+        postings = {}
+        position = 0
+        with open(self.path, "rb") as file:
+            for raw_line in file:
+                joke = parse_joke_line(raw_line.decode("utf-8", errors="replace"), self.delimiter)
+                if joke:
+                    joke_id = len(offsets)
+                    offsets.append(position)
+                    for key in joke_keys(*joke):
+                        postings.setdefault(key, array("I")).append(joke_id)
+                position += len(raw_line)
+        self.offsets = offsets
+        self.postings = postings
+
+    def _read_cache(self, stat):
+        """Returns True if a valid cache was loaded."""
+        try:
+            with open(self.cache_path, "rb") as cache:
+                header = json.loads(cache.readline())
+                if (header.get("version") != INDEX_VERSION or header.get("mtime_ns") != stat.st_mtime_ns
+                        or header.get("size") != stat.st_size or header.get("delimiter") != self.delimiter):
+                    return False # The jokes file (or how it is split) has changed since the index was made
+                offsets = array("Q")
+                offsets.fromfile(cache, header["count"])
+                postings = {}
+                for kind, value, count in header["postings"]:
+                    ids = array("I")
+                    ids.fromfile(cache, count)
+                    postings[(kind, value)] = ids
+        except (OSError, ValueError, KeyError, EOFError):
+            return False # Missing or damaged cache: it will just be rebuilt
+        self.offsets = offsets
+        self.postings = postings
+        return True
+
+    def _write_cache(self, stat):
+        header = {
+            "version": INDEX_VERSION,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "delimiter": self.delimiter,
+            "count": len(self.offsets),
+            "postings": [[kind, value, len(ids)] for (kind, value), ids in self.postings.items()]
+        }
+        temp_path = self.cache_path + ".tmp"
+        try:
+            with open(temp_path, "wb") as cache:
+                cache.write(json.dumps(header).encode("utf-8") + b"\n")
+                self.offsets.tofile(cache)
+                for ids in self.postings.values():
+                    ids.tofile(cache)
+            os.replace(temp_path, self.cache_path) # Swapping in the finished file in one step
+        except OSError:
+            pass # The cache is only a speed-up, so failing to save it is not a problem
+
+def joke_keys(setup, punchline, tags):
+    """Returns the (kind, value) index keys a joke belongs to."""
+    keys = [("category", joke_category(setup)), ("length", joke_length_bucket(setup, punchline))]
+    keys.extend(("tag", tag) for tag in tags)
+    return keys
+
+class FenwickTree:
+    """
+    A Fenwick (binary indexed) tree of weights, used to pick a random position with
+    probability proportional to its weight. Changing one weight and picking a position
+    both take O(log N) steps, so weighted draws stay fast even for millions of jokes.
+    """
+    def __init__(self, size, weight=1.0):
+        self.size = size
+        self.weights = [weight] * size
+        # Every node i holds the sum of the (i & -i) weights ending at position i - 1
+        self.tree = [0.0] + [weight * (i & -i) for i in range(1, size + 1)]
+        self._top = 1 << size.bit_length() if size else 0
+
+    def total(self):
+        return self.prefix_sum(self.size)
+
+    def prefix_sum(self, count):
+        """Sum of the first `count` weights."""
+        result = 0.0
+        while count > 0:
+            result += self.tree[count]
+            count -= count & -count
+        return result
+
+    def set(self, position, weight):
+        delta = weight - self.weights[position]
+        self.weights[position] = weight
+        i = position + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def find(self, target):
+        """Returns the position whose running total first goes past target (0 <= target < total)."""
+        position = 0
+        step = self._top
+        while step:
+            following = position + step
+            if following <= self.size and self.tree[following] <= target:
+                position = following
+                target -= self.tree[following]
+            step >>= 1
+        return min(position, self.size - 1)
+
+    def sample(self, rng):
+        total = self.total()
+        if self.size == 0 or total <= 0:
+            return None
+        return self.find(rng.random() * total)
+
+class JokeStore:
+    """
+    Picks jokes from a source (JokeFileIndex or MemoryJokeSource) using its category,
+    tag and length indexes, so a filtered random joke can be picked in O(1) time.
+    Each filter combination gets its own ShuffledDeck, which means no joke repeats until
+    that whole selection has been seen. Nothing is read from disk until the first joke
+    (or list of categories) is actually needed.
+    With weighted=True, jokes are picked with probability proportional to their weight
+    instead (see set_weight), using a FenwickTree per filter combination.
+    """
+    def __init__(self, source, rng=None, default_weight=1.0):
+        self.source = source
+        self.rng = rng or random.Random()
+        self.default_weight = default_weight
+        self.weights = {}         # joke id -> weight, for jokes that do not have the default weight
+        self._pools = {}          # filter key -> list of joke ids matching it
+        self._decks = {}          # filter key -> ShuffledDeck over that pool
+        self._trees = {}          # filter key -> FenwickTree of weights over that pool
+        self._weighted_ahead = {} # filter key -> positions already picked by peek(weighted=True)
+
+    def __len__(self):
+        return len(self.source)
+
+    def values(self, kind):
+        """Returns the sorted values of one index kind, e.g. values("category")."""
+        self.source.load()
+        return sorted(value for k, value in self.source.postings if k == kind)
+
+    def pool(self, category=None, tag=None, length=None):
+        """Returns the ids of all jokes matching the filters (worked out once, then cached)."""
+        key = (category, tag, length)
+        if key not in self._pools:
+            self.source.load()
+            chosen = [self.source.postings.get((kind, value), [])
+                      for kind, value in (("category", category), ("tag", tag), ("length", length))
+                      if value is not None]
+            if not chosen:
+                ids = range(len(self.source))
+            elif len(chosen) == 1:
+                ids = chosen[0]
+            else:
+                # Starting from the smallest list makes the intersection cheaper
+                chosen.sort(key=len)
+                others = [set(ids) for ids in chosen[1:]]
+                ids = array("I", (i for i in chosen[0] if all(i in other for other in others)))
+            self._pools[key] = ids
+        return self._pools[key]
+
+    def draw(self, category=None, tag=None, length=None, weighted=False):
+        """Returns (joke_id, joke) for the next joke matching the filters, or None if none match."""
+        key = (category, tag, length)
+        ids = self.pool(category, tag, length)
+        if weighted:
+            ahead = self._weighted_ahead.get(key)
+            position = ahead.pop(0) if ahead else self._tree(key, ids).sample(self.rng)
+        else:
+            position = self._deck(key, ids).draw()
+        if position is None:
+            return None
+        joke_id = ids[position]
+        return joke_id, self.source.get(joke_id)
+
+    def peek(self, count, category=None, tag=None, length=None, weighted=False):
+        """Returns the next 'count' (joke_id, joke) pairs that draw() will give, without drawing them."""
+        key = (category, tag, length)
+        ids = self.pool(category, tag, length)
+        if weighted:
+            ahead = self._weighted_ahead.setdefault(key, [])
+            tree = self._tree(key, ids)
+            while len(ahead) < count and tree.size:
+                ahead.append(tree.sample(self.rng))
+            positions = ahead[:count]
+        else:
+            positions = self._deck(key, ids).peek(count)
+        return [(ids[position], self.source.get(ids[position])) for position in positions]
+
+    def set_weight(self, joke_id, weight):
+        """Changes one joke's weight for weighted draws (O(log N) for each filter combination in use)."""
+        self.weights[joke_id] = weight
+        for key, tree in self._trees.items():
+            position = self._position(self._pools[key], joke_id)
+            if position is not None:
+                tree.set(position, weight)
+
+    def _deck(self, key, ids):
+        deck = self._decks.get(key)
+        if deck is None:
+            deck = self._decks[key] = ShuffledDeck(len(ids), self.rng)
+        return deck
+
+    def _tree(self, key, ids):
+        tree = self._trees.get(key)
+        if tree is None:
+            tree = self._trees[key] = FenwickTree(len(ids), self.default_weight)
+            for joke_id, weight in self.weights.items():
+                position = self._position(ids, joke_id)
+                if position is not None:
+                    tree.set(position, weight)
+        return tree
+
+    @staticmethod
+    def _position(ids, joke_id):
+        """Where joke_id is in a pool (pools are always sorted), or None if it is not there."""
+        position = bisect_left(ids, joke_id)
+        if position < len(ids) and ids[position] == joke_id:
+            return position
+        return None
+
+def read_corpus_manifest(path=CORPUS_MANIFEST):
     """
-    Function to read joke data from an external text file.
-    It parses the file by splitting lines at the '?' delimiter.
+    Returns the list of joke files from the manifest as dictionaries with
+    'name', 'language', 'path' and 'delimiter'. Falls back to randomJokes.txt alone.
     """
-    global jokes
     try:
-        # Using a context manager 'with' to safely open and close the file
-        with open("randomJokes.txt", "r", encoding="utf-8") as file:
-            lines = file.readlines() # Reading all lines into a list
-            for line in lines:
-                # Validating that the line contains the delimiter '?'
-                if "?" in line:
-                    # Splitting the string into exactly two parts: setup and punchline
-                    parts = line.strip().split("?", 1)
-                    if len(parts) == 2:
-                        # Re-appending the question mark to the setup for grammatical correctness
-                        setup = parts[0] + "?"
-                        punchline = parts[1]
-                        # Appending the tuple (setup, punchline) to the main jokes list
-                        jokes.append((setup, punchline))
-        # Logging success to the console for debugging purposes
-        print(f"Loaded {len(jokes)} jokes.")
-        
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)["corpora"]
+        folder = os.path.dirname(os.path.abspath(path))
+        corpus_list = []
+        for entry in entries:
+            language = entry["language"].lower()
+            corpus_list.append({'name': entry.get("name", language), 'language': language,
+                                'path': os.path.join(folder, entry["file"]),
+                                'delimiter': entry.get("delimiter", "?")})
+        if corpus_list:
+            return corpus_list
     except FileNotFoundError:
-        # Error Handling: If the file is missing, load a backup dataset to prevent crashing
-        print("File not found. Using backup data.")
-        jokes = [
-            ("Why did the chicken cross the road?", "To get to the other side."),
-            ("What happens if you boil a clown?", "You get a laughing stock."),
-            ("Why did the car get a flat tire?", "Because there was a fork in the road!")
-        ]
+        pass
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        print("The jokes manifest could not be read. Using randomJokes.txt only.")
+    return [{'name': "English", 'language': "en", 'path': JOKES_FILE, 'delimiter': "?"}]
 
-# Executing the data loading function upon application startup
-load_jokes_from_file()
+def load_jokes_from_file():
+    """
+    Function to prepare the joke data from the external text file(s) in the manifest.
+    Nothing is read here: each language's file is only checked and indexed the first
+    time that language is picked, so extra languages cost nothing at startup.
+    """
+    global joke_stats
+    joke_stats = JokeStats().load()
+    corpora.clear()
+    for corpus in read_corpus_manifest():
+        corpus['store'] = None
+        corpora.setdefault(corpus['language'], corpus)
+    select_language(next(iter(corpora)))
+
+def select_language(language):
+    """
+    Makes the corpus for this language the one jokes are drawn from, creating its
+    JokeStore the first time it is used.
+    """
+    global joke_store, current_language
+    corpus = corpora[language]
+    if corpus['store'] is None:
+        if os.path.exists(corpus['path']):
+            corpus['store'] = JokeStore(JokeFileIndex(corpus['path'], corpus['delimiter']),
+                                        default_weight=DEFAULT_JOKE_WEIGHT)
+        else:
+            # Error Handling: If the file is missing, load a backup dataset to prevent crashing
+            print("File not found. Using backup data.")
+            corpus['store'] = JokeStore(MemoryJokeSource([
+                ("Why did the chicken cross the road?", "To get to the other side.", ()),
+                ("What happens if you boil a clown?", "You get a laughing stock.", ()),
+                ("Why did the car get a flat tire?", "Because there was a fork in the road!", ())
+            ]), default_weight=DEFAULT_JOKE_WEIGHT)
+        corpus['weights_applied'] = False
+    joke_store = corpus['store']
+    current_language = language
+
+# --------------------------
+# JOKE STATISTICS
+# --------------------------
+JOKE_STATS_FILE = os.path.join(SCRIPT_DIR, "joke_stats.json")
+STATS_VERSION = 1
+STATS_SAVE_EVERY = 20      # Saving after this many changes...
+STATS_SAVE_SECONDS = 30    # ...or when this long has passed since the last save
+joke_stats = None          # The JokeStats being recorded into (loaded in load_jokes_from_file)
+
+class JokeStats:
+    """
+    Counts, for every joke, how often it was drawn, how many guesses were made, how
+    many were right and the total similarity score of those guesses.
+    Entries are stored per language and joke id as [setup, draws, guesses, correct,
+    similarity total]; the setup is kept so entries can be checked against the jokes
+    file in case it was edited. Changes are written to joke_stats.json in batches
+    (see STATS_SAVE_EVERY / STATS_SAVE_SECONDS) rather than after every click.
+    """
+    def __init__(self, path=JOKE_STATS_FILE):
+        self.path = path
+        self.entries = {}   # language -> {joke_id: [setup, draws, guesses, correct, similarity_total]}
+        self._unsaved = 0
+        self._last_save = time.monotonic()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == STATS_VERSION:
+                self.entries = {language: {int(joke_id): entry for joke_id, entry in jokes.items()}
+                                for language, jokes in data["languages"].items()}
+        except (OSError, ValueError, KeyError, AttributeError):
+            self.entries = {} # Missing or damaged file: starting the counts again
+        return self
+
+    def save(self):
+        data = {"version": STATS_VERSION, "languages": self.entries}
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.path)
+        except OSError:
+            return # Keeping the changes as unsaved so the next batch tries again
+        self._unsaved = 0
+        self._last_save = time.monotonic()
+
+    def _changed(self):
+        self._unsaved += 1
+        if self._unsaved >= STATS_SAVE_EVERY or time.monotonic() - self._last_save >= STATS_SAVE_SECONDS:
+            self.save()
+
+    def flush(self):
+        """Saves any changes that have not been written yet."""
+        if self._unsaved:
+            self.save()
+
+    def _entry(self, language, joke_id, setup):
+        jokes = self.entries.setdefault(language, {})
+        entry = jokes.get(joke_id)
+        if entry is None or entry[0] != setup:
+            entry = jokes[joke_id] = [setup, 0, 0, 0, 0.0] # New joke (or a different one now has this id)
+        return entry
+
+    def record_draw(self, language, joke_id, setup):
+        self._entry(language, joke_id, setup)[1] += 1
+        self._changed()
+
+    def record_guess(self, language, joke_id, setup, correct, similarity):
+        entry = self._entry(language, joke_id, setup)
+        entry[2] += 1
+        entry[3] += 1 if correct else 0
+        entry[4] += similarity
+        self._changed()
+
+    def summary(self, language, joke_id):
+        """Returns {'draws', 'guesses', 'correct', 'hit_rate', 'average_similarity'} for one joke."""
+        _, draws, guesses, correct, similarity_total = self.entries.get(language, {}).get(joke_id, [None, 0, 0, 0, 0.0])
+        return {'draws': draws, 'guesses': guesses, 'correct': correct,
+                'hit_rate': correct / guesses if guesses else None,
+                'average_similarity': similarity_total / guesses if guesses else None}
+
+    @staticmethod
+    def weight_of(entry):
+        """
+        How likely a joke is to be picked in weighted mode: jokes shown less often and
+        jokes that are guessed right less often get bigger weights.
+        """
+        _, draws, guesses, correct, _ = entry
+        unseen = 1.0 / (1 + draws)
+        difficulty = 1.0 - (correct + 1.0) / (guesses + 2.0) # 0.5 until there are guesses
+        return unseen + difficulty
+
+    def weight(self, language, joke_id):
+        entry = self.entries.get(language, {}).get(joke_id)
+        return self.weight_of(entry) if entry else DEFAULT_JOKE_WEIGHT
+
+    def apply_weights(self, language, store):
+        """
+        Gives a JokeStore the weights of every joke with statistics. Entries whose
+        setup no longer matches the jokes file are dropped.
+        """
+        jokes = self.entries.get(language, {})
+        for joke_id, entry in list(jokes.items()):
+            joke = store.source.get(joke_id) if joke_id < len(store) else None
+            if joke is None or joke[0] != entry[0]:
+                del jokes[joke_id]
+                continue
+            store.set_weight(joke_id, self.weight_of(entry))
+
+DEFAULT_JOKE_WEIGHT = JokeStats.weight_of([None, 0, 0, 0, 0.0])
 
 # --- GLOBAL VARIABLES ---
 # Initializing variables to track the application state
 current_joke = None             # Stores the currently selected joke tuple
-is_speaking = False             # Boolean flag to track if the TTS engine is currently active
+current_joke_id = None          # Position of the current joke in the JokeStore
+visualizer_running = False      # True while the visualizer animation loop is scheduled
 available_voices_data = []      # List to store available system voices
 default_voice_index = 0         # Index to track user preference (0 for Male, 1 for Female)
 DEFAULT_VOLUME = 0.9            # Setting the default volume level (0.0 to 1.0)
+DEFAULT_RATE = 150              # Speaking speed in words per minute
+SPEECH_CACHE_DIR = os.path.join(SCRIPT_DIR, "speech_cache")
+SPEECH_CACHE_MAX_BYTES = 50 * 1024 * 1024  # Oldest recordings are deleted above this size
+PREFETCH_AHEAD = 3              # How many upcoming jokes get their audio rendered in advance
+speech_worker = None            # The SpeechWorker that owns the TTS engine (started in setup_tts_data)
+AUDIO_BACKEND_ENV = "JOKE_AUDIO_BACKEND"  # Environment variable that forces an audio backend
+SOUND_EFFECT_FILES = {"correct": "clapping.wav", "wrong": "boo.wav", "huh": "huh.wav"}
+audio_backend = None            # Where sounds are played (chosen in setup_audio)
+sound_effects = None            # The preloaded SoundEffects (loaded in setup_audio)
 
 # Declaring UI widget references as None; these will be assigned when frames are built
 joke_label = None
@@ -117,49 +695,775 @@ punchline_label = None
 guess_entry = None
 feedback_label = None
 visualizer_canvas = None
+visualizer_bars = []            # Canvas ids of the bars, created once and then only moved
 btn_male = None
 btn_female = None
+type_filter_combo = None
+length_filter_combo = None
+language_combo = None
+weighted_var = None             # Checkbox: favour jokes that were shown less or guessed wrong more
+filter_choices = {}             # Maps each "joke type" drop-down label to a (category, tag) pair
 
 # --- AUDIO & TTS LOGIC ---
 
-def setup_tts_data():
+# --- SOUND OUTPUT ---
+# Every sound (effects and cached speech) is decoded into a SoundClip once and then
+# played from memory through an audio backend. The backend is picked automatically,
+# or forced with the JOKE_AUDIO_BACKEND environment variable:
+#   simpleaudio | winsound | aplay | afplay | null | wav:<folder>
+# "null" plays nothing and "wav:<folder>" writes every sound to <folder> instead of
+# the speakers, which is handy when running without a sound card.
+
+class SoundClip:
+    """A .wav file held in memory: the whole file (for winsound/aplay) plus its raw frames."""
+    def __init__(self, data, path=None):
+        self.data = data
+        self.path = path
+        with wave.open(io.BytesIO(data), "rb") as wav:
+            self.channels = wav.getnchannels()
+            self.width = wav.getsampwidth()
+            self.rate = wav.getframerate()
+            self.frames = wav.readframes(wav.getnframes())
+        self.duration = len(self.frames) / float(self.channels * self.width * self.rate or 1)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, "rb") as f:
+            return cls(f.read(), path)
+
+class FinishedPlayback:
+    """Handle returned by backends that finish straight away."""
+    def is_playing(self):
+        return False
+
+    def stop(self):
+        pass
+
+class ThreadPlayback:
+    """Handle for a sound played by a blocking call on its own thread."""
+    def __init__(self, play, stop):
+        self._stop = stop
+        self._thread = threading.Thread(target=play, daemon=True)
+        self._thread.start()
+
+    def is_playing(self):
+        return self._thread.is_alive()
+
+    def stop(self):
+        self._stop()
+
+class ProcessPlayback:
+    """Handle for a sound played by a command-line player."""
+    def __init__(self, process, data=None):
+        self._process = process
+        if data is not None:
+            # Feeding the sound in on a thread, since the pipe only takes it as fast as it plays
+            threading.Thread(target=self._feed, args=(data,), daemon=True).start()
+
+    def _feed(self, data):
+        try:
+            self._process.stdin.write(data)
+            self._process.stdin.close()
+        except (OSError, ValueError):
+            pass # The player was stopped part-way through
+
+    def is_playing(self):
+        return self._process.poll() is None
+
+    def stop(self):
+        if self.is_playing():
+            self._process.kill()
+
+class NullBackend:
+    """Plays nothing. Used when no audio output can be found."""
+    name = "null"
+    can_play = False
+
+    def start(self, clip):
+        return FinishedPlayback()
+
+class WavSinkBackend:
+    """Writes every sound it is asked to play into a folder as numbered .wav files."""
+    name = "wav"
+    can_play = True
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.played = 0
+        self._lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+
+    def start(self, clip):
+        with self._lock:
+            self.played += 1
+            path = os.path.join(self.folder, "%05d.wav" % self.played)
+        with open(path, "wb") as f:
+            f.write(clip.data)
+        return FinishedPlayback()
+
+class SimpleAudioBackend:
+    """Plays raw frames through the simpleaudio package (works on Windows, macOS and Linux)."""
+    name = "simpleaudio"
+    can_play = True
+
+    def start(self, clip):
+        # simpleaudio's PlayObject already has is_playing() and stop()
+        return simpleaudio.play_buffer(clip.frames, clip.channels, clip.width, clip.rate)
+
+class WinsoundBackend:
     """
-    Function to initialize the pyttsx3 engine temporarily to retrieve system voices.
+    Plays a clip from memory with winsound. SND_MEMORY cannot be combined with
+    SND_ASYNC, so the (blocking) call runs on its own thread instead.
     """
-    global available_voices_data
+    name = "winsound"
+    can_play = True
+
+    def start(self, clip):
+        return ThreadPlayback(lambda: winsound.PlaySound(clip.data, winsound.SND_MEMORY),
+                              lambda: winsound.PlaySound(None, 0)) # Passing None stops the sound
+
+class PlayerBackend:
+    """Plays clips with a command-line player: aplay reads from a pipe, afplay needs the file."""
+    can_play = True
+
+    def __init__(self, command):
+        self.name = command
+        self.command = shutil.which(command)
+
+    def start(self, clip):
+        if self.name == "aplay":
+            process = subprocess.Popen([self.command, "-q", "-"], stdin=subprocess.PIPE,
+                                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            return ProcessPlayback(process, clip.data)
+        if clip.path is None:
+            return FinishedPlayback()
+        process = subprocess.Popen([self.command, clip.path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return ProcessPlayback(process)
+
+def choose_audio_backend(choice=None):
+    """
+    Returns the backend named by choice (or by JOKE_AUDIO_BACKEND), otherwise the
+    first one that works on this computer, ending with NullBackend.
+    """
+    choice = (choice or os.environ.get(AUDIO_BACKEND_ENV, "")).strip()
+    if choice.startswith("wav:"):
+        return WavSinkBackend(choice[4:])
+    available = {}
+    if simpleaudio is not None:
+        available["simpleaudio"] = SimpleAudioBackend
+    if winsound is not None:
+        available["winsound"] = WinsoundBackend
+    for command in ("aplay", "afplay"):
+        if shutil.which(command):
+            available[command] = lambda command=command: PlayerBackend(command)
+    available["null"] = NullBackend
+    if choice in available:
+        return available[choice]()
+    return next(iter(available.values()))()
+
+class SoundEffects:
+    """The game's sound effects, decoded into memory once so they start instantly."""
+    def __init__(self, backend, files=SOUND_EFFECT_FILES, folder=SCRIPT_DIR):
+        self.backend = backend
+        self.clips = {}
+        for effect, file_name in files.items():
+            try:
+                self.clips[effect] = SoundClip.from_file(os.path.join(folder, file_name))
+            except (OSError, wave.Error, EOFError):
+                pass # A missing or broken file just means that effect stays silent
+
+    def play(self, effect):
+        clip = self.clips.get(effect)
+        if clip is None:
+            return
+        try:
+            self.backend.start(clip) # Not waiting for it, so the UI does not hang while audio plays
+        except Exception:
+            pass
+
+def setup_audio():
+    """Picks the audio backend and loads the sound effects (done once at startup)."""
+    global audio_backend, sound_effects
+    audio_backend = choose_audio_backend()
+    sound_effects = SoundEffects(audio_backend)
+
+def can_play_files():
+    return audio_backend is not None and audio_backend.can_play
+
+def play_wav_file(path, should_stop):
+    """
+    Plays a .wav file and blocks until it ends. should_stop() is checked every 20 ms
+    so playback can be interrupted quickly. Returns False if nothing could play it.
+    """
+    if not can_play_files():
+        return False
     try:
-        temp_engine = pyttsx3.init()
-        voices = temp_engine.getProperty('voices')
-        # Iterating through system voices to extract ID and Name properties
-        for v in voices:
-            available_voices_data.append({'id': v.id, 'name': v.name})
-        del temp_engine # Deleting the temporary engine instance to free resources
+        playback = audio_backend.start(SoundClip.from_file(path))
     except Exception:
-        pass # Silently fail if TTS initialization encounters an error
+        return False
+    while playback.is_playing():
+        if should_stop():
+            playback.stop()
+            break
+        time.sleep(0.02)
+    return True
 
-def play_sound_effect(effect_type):
+class SpeechCache:
+    """
+    Keeps synthesized speech as .wav files on disk, named after a hash of
+    (text, voice id, rate, volume). When the folder grows past max_bytes the least
+    recently used files are deleted first (file modification times keep track of use).
+    """
+    def __init__(self, folder=SPEECH_CACHE_DIR, max_bytes=SPEECH_CACHE_MAX_BYTES):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._files = OrderedDict()   # file name -> size, oldest use first
+        self._lock = threading.Lock()
+        try:
+            os.makedirs(folder, exist_ok=True)
+            entries = []
+            for entry in os.scandir(folder):
+                if entry.name.endswith(".wav"):
+                    entries.append(entry)
+                elif entry.name.endswith(".tmp"):
+                    os.remove(entry.path) # Left over from a render that never finished
+        except OSError:
+            entries = []
+        for entry in sorted(entries, key=lambda e: e.stat().st_mtime):
+            size = entry.stat().st_size
+            self._files[entry.name] = size
+            self.total_bytes += size
+
+    @staticmethod
+    def key(text, voice_id, rate, volume):
+        return hashlib.sha1(f"{text}\0{voice_id}\0{rate}\0{volume}".encode("utf-8")).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.folder, key + ".wav")
+
+    def get(self, key):
+        """Returns the cached file path for this key (marking it as recently used), or None."""
+        name = key + ".wav"
+        with self._lock:
+            if name not in self._files:
+                return None
+            path = self.path_for(key)
+            try:
+                os.utime(path, None)
+            except OSError:
+                # The file was removed behind our back
+                self.total_bytes -= self._files.pop(name)
+                return None
+            self._files.move_to_end(name)
+            return path
+
+    def store(self, key, temp_path):
+        """Moves a freshly rendered file into the cache and returns its final path (or None)."""
+        try:
+            size = os.path.getsize(temp_path)
+            if size <= 44: # Only a .wav header, so nothing was actually rendered
+                os.remove(temp_path)
+                return None
+            path = self.path_for(key)
+            os.replace(temp_path, path)
+        except OSError:
+            return None
+        with self._lock:
+            name = key + ".wav"
+            self.total_bytes += size - self._files.pop(name, 0)
+            self._files[name] = size
+            self._evict()
+        return path
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and len(self._files) > 1:
+            name, size = self._files.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(os.path.join(self.folder, name))
+            except OSError:
+                pass
+
+# --- VISUALIZER LEVELS ---
+VISUALIZER_BARS = 12            # Number of bars drawn on the visualizer canvas
+VISUALIZER_FRAME = 0.08         # Seconds between visualizer frames (matches the 80ms redraw)
+
+@lru_cache(maxsize=16)
+def speech_envelope(path, bars=VISUALIZER_BARS, frame_seconds=VISUALIZER_FRAME):
     """
-    Function to play specific .wav sound effects based on user interaction.
+    Reads a .wav file and works out how loud it is over time, for the visualizer.
+    The sound is cut into frames of frame_seconds, each frame into `bars` slices, and
+    each slice gets its RMS loudness scaled to 0..1. Returns a tuple of frames, each a
+    tuple of `bars` levels, or () if the file cannot be read.
+    Cached files never change once written, so the result is remembered per path.
     """
     try:
-        # Playing sounds asynchronously so the UI does not hang while audio plays
-        if effect_type == "correct":
-            winsound.PlaySound("clapping.wav", winsound.SND_FILENAME | winsound.SND_ASYNC)
-        elif effect_type == "wrong":
-            winsound.PlaySound("boo.wav", winsound.SND_FILENAME | winsound.SND_ASYNC)
-        elif effect_type == "huh":
-            winsound.PlaySound("huh.wav", winsound.SND_FILENAME | winsound.SND_ASYNC)
-    except Exception:
-        pass # Ignoring errors if sound files are missing
+        with wave.open(path, "rb") as wav:
+            channels = wav.getnchannels()
+            width = wav.getsampwidth()
+            frame_rate = wav.getframerate()
+            data = wav.readframes(wav.getnframes())
+    except (OSError, wave.Error, EOFError):
+        return ()
+    if width not in (1, 2, 4) or frame_rate <= 0:
+        return ()
+
+    slice_length = max(1, int(frame_rate * frame_seconds) // bars)
+    if np is not None:
+        samples = np.frombuffer(data, dtype={1: np.uint8, 2: np.int16, 4: np.int32}[width]).astype(np.float64)
+        if width == 1:
+            samples -= 128 # 8-bit .wav files are unsigned
+        samples = samples[:len(samples) // channels * channels].reshape(-1, channels).mean(axis=1)
+        frame_count = len(samples) // (slice_length * bars)
+        if frame_count == 0:
+            return ()
+        # Doing every slice of every frame in one go
+        slices = samples[:frame_count * bars * slice_length].reshape(frame_count, bars, slice_length)
+        levels = np.sqrt((slices * slices).mean(axis=2))
+        peak = levels.max()
+        if peak > 0:
+            levels /= peak
+        return tuple(map(tuple, levels.tolist()))
+
+    samples = array({1: 'B', 2: 'h', 4: 'i'}[width])
+    samples.frombytes(data[:len(data) // width * width])
+    offset = 128 if width == 1 else 0
+    step = slice_length * channels # Only looking at the first channel here, to keep it quick
+    frame_count = len(samples) // (step * bars)
+    levels = []
+    for start in range(0, frame_count * bars * step, step):
+        chunk = samples[start:start + step:channels]
+        levels.append((sum((x - offset) * (x - offset) for x in chunk) / len(chunk)) ** 0.5)
+    peak = max(levels, default=0) or 1
+    return tuple(tuple(level / peak for level in levels[i:i + bars]) for i in range(0, len(levels), bars))
+
+# --- VOICE LIST CACHE ---
+# Starting pyttsx3 just to ask which voices are installed is slow, so the list is kept
+# in voice_cache.json together with a fingerprint of where the system keeps its voices.
+# The file is only trusted while that fingerprint still matches.
+VOICE_CACHE_FILE = os.path.join(SCRIPT_DIR, "voice_cache.json")
+VOICE_CACHE_VERSION = 1
+VOICE_FOLDERS = [                          # Where espeak (Linux) and macOS keep their voices
+    "/usr/share/espeak-ng-data/voices",
+    "/usr/lib/x86_64-linux-gnu/espeak-ng-data/voices",
+    "/usr/share/espeak-data/voices",
+    "/System/Library/Speech/Voices",
+    "/Library/Speech/Voices",
+    os.path.expanduser("~/Library/Speech/Voices"),
+]
+WINDOWS_VOICE_KEYS = [                     # Registry keys listing the SAPI5 voices on Windows
+    r"SOFTWARE\Microsoft\Speech\Voices\Tokens",
+    r"SOFTWARE\Microsoft\Speech_OneCore\Voices\Tokens",
+]
+
+def voice_set_fingerprint():
+    """
+    A hash of the installed voices, worked out without starting the speech engine:
+    the SAPI5 registry entries on Windows, or the voice folders on Linux/macOS.
+    """
+    parts = [sys.platform, str(getattr(pyttsx3, "__version__", pyttsx3 is not None))]
+    if winreg is not None:
+        for key_path in WINDOWS_VOICE_KEYS:
+            try:
+                with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, key_path) as key:
+                    count = winreg.QueryInfoKey(key)[0]
+                    parts.append(key_path)
+                    parts.extend(sorted(winreg.EnumKey(key, i) for i in range(count)))
+            except OSError:
+                pass
+    for folder in VOICE_FOLDERS:
+        try:
+            parts.append("%s %d" % (folder, os.stat(folder).st_mtime_ns))
+            parts.extend(sorted(os.listdir(folder)))
+        except OSError:
+            pass
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+
+def voice_languages(voice):
+    """Language codes of a pyttsx3 voice (espeak reports them as bytes with a priority byte first)."""
+    languages = []
+    for language in getattr(voice, "languages", None) or []:
+        if isinstance(language, bytes):
+            language = language.decode("ascii", "ignore").lstrip("".join(map(chr, range(32))))
+        if language:
+            languages.append(language)
+    return languages
+
+def load_cached_voices(path=VOICE_CACHE_FILE):
+    """Returns (voices, default voice id) from the cache file, or None if it is missing or out of date."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != VOICE_CACHE_VERSION or data.get("fingerprint") != voice_set_fingerprint():
+            return None
+        return data["voices"], data.get("default")
+    except (OSError, ValueError, KeyError, AttributeError):
+        return None
+
+def save_cached_voices(voices, default_id, path=VOICE_CACHE_FILE):
+    """Writes the voice list to the cache file (failing quietly, since it is only a speed-up)."""
+    data = {"version": VOICE_CACHE_VERSION, "fingerprint": voice_set_fingerprint(),
+            "default": default_id, "voices": voices}
+    temp_path = path + ".tmp"
+    try:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(temp_path, path)
+    except OSError:
+        pass
+
+# Speech priorities: a smaller number is handled first
+PRIORITY_CONTROL = 0   # voice/rate/volume changes and quitting
+PRIORITY_URGENT = 1    # READ pressed again while reading: jumps ahead of anything already queued
+PRIORITY_NORMAL = 2    # ordinary READ requests
+
+class SpeechState:
+    """
+    What the speech worker is doing right now, shared safely between the worker thread
+    (which changes it) and the GUI thread (which only reads it). Every access goes
+    through a lock, so the GUI never sees half-updated values.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._speaking_text = None
+        self._queued = 0
+        self._envelope = ()             # Loudness frames of the file being played (see speech_envelope)
+        self._envelope_start = 0.0
+
+    def queued(self):
+        with self._lock:
+            self._queued += 1
+
+    def started(self, text):
+        with self._lock:
+            self._queued -= 1
+            self._speaking_text = text
+
+    def playing(self, envelope):
+        """Called just before a .wav file starts playing, so the visualizer can follow it."""
+        with self._lock:
+            self._envelope = envelope
+            self._envelope_start = time.monotonic()
+
+    def finished(self):
+        with self._lock:
+            self._speaking_text = None
+            self._envelope = ()
+
+    def dropped(self, count=1):
+        with self._lock:
+            self._queued -= count
+
+    def is_speaking(self):
+        with self._lock:
+            return self._speaking_text is not None
+
+    def levels(self):
+        """
+        The bar levels (0..1) for this moment of the file being played, or None when
+        there is no audio to follow (live speech, or nothing playing).
+        """
+        with self._lock:
+            if not self._envelope:
+                return None
+            frame = int((time.monotonic() - self._envelope_start) / VISUALIZER_FRAME)
+            return self._envelope[min(frame, len(self._envelope) - 1)]
+
+    def is_busy(self):
+        """True while something is being spoken or is still waiting in the queue."""
+        with self._lock:
+            return self._speaking_text is not None or self._queued > 0
+
+class SpeechWorker:
+    """
+    One long-lived background thread that owns the pyttsx3 engine.
+    Creating an engine is slow, so it is done once here instead of for every sentence.
+    The rest of the app talks to the worker by putting commands on a priority queue:
+        speak(text, priority, interrupt), cancel(), set_voice(voice_id), set_rate(rate), set_volume(volume)
+    Speech is never dropped because something else is playing; it waits its turn.
+    cancel() stops the current sentence and empties the queue, and speak(..., interrupt=True)
+    stops only the current sentence. Either way the sound stops within about one word for
+    live speech, or 20 ms for cached audio.
+    The engine itself is only started when it is first needed. If `voices` is given
+    (a list loaded from voice_cache.json) the voice list is ready straight away;
+    otherwise the worker starts the engine to ask for it and saves it for next time.
+    If a SpeechCache is given, sentences are rendered to .wav files once and the file is
+    played on later requests, so repeated jokes start speaking straight away.
+    prefetch(texts) asks for texts to be rendered into the cache whenever the worker has
+    nothing else to do, so they are ready before the user presses READ.
+    """
+    def __init__(self, rate=DEFAULT_RATE, volume=DEFAULT_VOLUME, cache=None, voices=None, voice_id=None):
+        self.cache = cache
+        self.state = SpeechState()
+        self._prefetch = []                   # Texts waiting to be rendered in idle time
+        self._prefetch_lock = threading.Lock()
+        self.commands = queue.PriorityQueue() # Items are (priority, sequence number, command)
+        self.voices = list(voices or [])      # [{'id': ..., 'name': ..., 'languages': [...]}]
+        self.voices_ready = threading.Event() # Set once the voice list is known
+        if voices is not None:
+            self.voices_ready.set()
+        self.rate = rate
+        self.volume = volume
+        self.voice_id = voice_id
+        self._sequence = 0                    # Numbers every command, so equal priorities stay in order
+        self._sequence_lock = threading.Lock()
+        self._cancelled_up_to = 0             # Speech numbered at or below this is dropped/stopped
+        self._interrupted = None              # Number of a single utterance that must stop
+        self._current = 0                     # Number of the utterance being spoken (or rendered)
+        self._engine = None
+        self._engine_started = False          # True once starting the engine has been tried
+        self._thread = threading.Thread(target=self._run, name="speech-worker", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    # --- Commands (safe to call from the GUI thread) ---
+
+    def speak(self, text, priority=PRIORITY_NORMAL, interrupt=False):
+        """
+        Queues text to be spoken. With interrupt=True the sentence being spoken right now
+        is stopped so this one starts next.
+        """
+        self.state.queued()
+        number = self._put(priority, ("speak", text))
+        if interrupt:
+            self._interrupted = self._current
+        return number
+
+    def cancel(self):
+        """Stops the current sentence and forgets any that are still waiting."""
+        self._cancelled_up_to = self._put(PRIORITY_CONTROL, ("noop",)) # Also wakes the worker up
+
+    def set_voice(self, voice_id):
+        self._put(PRIORITY_CONTROL, ("voice", voice_id))
+
+    def set_rate(self, rate):
+        self._put(PRIORITY_CONTROL, ("rate", rate))
+
+    def set_volume(self, volume):
+        self._put(PRIORITY_CONTROL, ("volume", volume))
+
+    def prefetch(self, texts):
+        """Replaces the list of texts to pre-render (the newest request is the one that matters)."""
+        if self.cache is None:
+            return
+        with self._prefetch_lock:
+            self._prefetch = list(texts)
+        self._put(PRIORITY_CONTROL, ("noop",)) # Wakes the worker up if it is idle
+
+    def shutdown(self):
+        self.cancel()
+        self._put(PRIORITY_CONTROL, ("quit",))
+
+    def _put(self, priority, command):
+        with self._sequence_lock:
+            self._sequence += 1
+            number = self._sequence
+        self.commands.put((priority, number, command))
+        return number
+
+    # --- Everything below runs on the worker thread ---
+
+    def _should_stop(self, number):
+        return number <= self._cancelled_up_to or number == self._interrupted
+
+    def _run(self):
+        if not self.voices_ready.is_set():
+            self._start_engine() # No cached voice list, so the engine has to be asked
+        while True:
+            try:
+                # Only waiting for a command when there is no pre-rendering left to do
+                _, number, command = self.commands.get(block=not self._prefetch)
+            except queue.Empty:
+                self._prefetch_next()
+                continue
+            name = command[0]
+            if name == "quit":
+                break
+            elif name == "speak":
+                _, text = command
+                if self._should_stop(number): # Cancelled while it was waiting in the queue
+                    self.state.dropped()
+                else:
+                    self.state.started(text)
+                    try:
+                        self._start_engine()
+                        self._say(text, number)
+                    finally:
+                        self.state.finished()
+            elif name == "voice":
+                self.voice_id = command[1]
+                self._set_property('voice', command[1])
+            elif name == "rate":
+                self.rate = command[1]
+                self._set_property('rate', command[1])
+            elif name == "volume":
+                self.volume = command[1]
+                self._set_property('volume', command[1])
+
+    def _start_engine(self):
+        """Starts the engine the first time it is needed (later calls do nothing)."""
+        if self._engine_started:
+            return
+        self._engine_started = True
+        try:
+            if pyttsx3 is None:
+                raise RuntimeError("pyttsx3 is not installed")
+            self._engine = pyttsx3.init()
+            self._engine.setProperty('rate', self.rate)
+            self._engine.setProperty('volume', self.volume)
+            if self.voice_id is None:
+                self.voice_id = self._engine.getProperty('voice')
+            else:
+                self._engine.setProperty('voice', self.voice_id) # Picked before the engine was running
+            if not self.voices_ready.is_set():
+                # Iterating through system voices to extract ID, Name and language properties
+                self.voices = [{'id': v.id, 'name': v.name, 'languages': voice_languages(v)}
+                               for v in self._engine.getProperty('voices')]
+                save_cached_voices(self.voices, self.voice_id)
+            # pyttsx3 calls this before each word, which is where a cancel can stop the speech
+            self._engine.connect('started-word', self._on_word)
+        except Exception:
+            self._engine = None # Silently fall back to no speech if TTS cannot start
+        finally:
+            self.voices_ready.set()
+
+    def _prefetch_next(self):
+        """Renders one waiting prefetch text into the cache (if it is not there already)."""
+        with self._prefetch_lock:
+            if not self._prefetch:
+                return
+            text = self._prefetch.pop(0)
+        self._start_engine()
+        if self._engine is None or not can_play_files():
+            with self._prefetch_lock:
+                self._prefetch = [] # Nothing can be played from the cache anyway
+            return
+        key = SpeechCache.key(text, self.voice_id, self.rate, self.volume)
+        if self.cache.get(key) is None:
+            # Using the newest sequence number, so only a cancel() from now on can stop it
+            with self._sequence_lock:
+                number = self._current = self._sequence
+            self._render(text, key, lambda: number <= self._cancelled_up_to)
+
+    def _set_property(self, name, value):
+        if self._engine and value is not None:
+            try:
+                self._engine.setProperty(name, value)
+            except Exception:
+                pass
+
+    def _say(self, text, number):
+        self._current = number
+        should_stop = lambda: self._should_stop(number)
+        if self._engine is None:
+            # No engine: waiting roughly as long as the sentence would take to say
+            end = time.monotonic() + len(text) * 0.1
+            while time.monotonic() < end and not should_stop():
+                time.sleep(0.05)
+            return
+
+        # Playing the cached recording if there is one, otherwise rendering it first
+        if self.cache is not None and can_play_files():
+            key = SpeechCache.key(text, self.voice_id, self.rate, self.volume)
+            path = self.cache.get(key) or self._render(text, key, should_stop)
+            if path and not should_stop():
+                self.state.playing(speech_envelope(path))
+                if play_wav_file(path, should_stop):
+                    return
+
+        try:
+            self._engine.say(text)
+            self._engine.runAndWait() # This blocks, which is fine on the worker thread
+        except Exception:
+            pass
+
+    def _render(self, text, key, should_stop):
+        """Synthesizes text into the cache and returns the file path (or None)."""
+        temp_path = self.cache.path_for(key) + ".tmp"
+        try:
+            self._engine.save_to_file(text, temp_path)
+            self._engine.runAndWait()
+            if should_stop():
+                # Cancelled part-way through, so the file may be cut short
+                os.remove(temp_path)
+                return None
+        except Exception:
+            return None
+        return self.cache.store(key, temp_path)
+
+    def _on_word(self, name, location, length):
+        if self._should_stop(self._current):
+            self._engine.stop()
+
+def setup_tts_data():
+    """
+    Starts the speech worker without waiting for it, so the window is never held up by
+    the speech engine. The voice list comes from voice_cache.json when the installed
+    voices have not changed; otherwise the worker finds it in the background.
+    The engine is created once by the worker and reused for every sentence.
+    """
+    global speech_worker
+    cached = load_cached_voices()
+    voices, voice_id = cached if cached else (None, None)
+    speech_worker = SpeechWorker(cache=SpeechCache(), voices=voices, voice_id=voice_id).start()
+    wait_for_voices()
+
+def wait_for_voices():
+    """
+    Checks every 50ms (on the GUI thread) whether the worker knows the voices yet,
+    then fills in available_voices_data and refreshes the voice buttons.
+    """
+    global available_voices_data
+    if speech_worker.voices_ready.is_set():
+        available_voices_data = list(speech_worker.voices)
+        update_voice_buttons()
+        route_voice()
+    else:
+        root.after(50, wait_for_voices)
+
+def play_sound_effect(effect_type):
+    """
+    Function to play specific .wav sound effects based on user interaction
+    ("correct", "wrong" or "huh"). The sounds were loaded into memory by setup_audio.
+    """
+    if sound_effects is not None:
+        sound_effects.play(effect_type)
+
+def language_code(language):
+    """Reduces 'en_US', 'en-GB' or 'EN' to the plain language code 'en'."""
+    return language.lower().replace("-", "_").split("_")[0]
+
+def language_voices():
+    """
+    The voices that speak the current joke language (using the languages saved in the
+    voice cache). If none of them do, every voice is returned so speech still works.
+    """
+    wanted = language_code(current_language or "en")
+    matching = [voice for voice in available_voices_data
+                if any(language_code(lang) == wanted for lang in voice.get('languages', []))]
+    return matching or available_voices_data
+
+def route_voice():
+    """Switches to a voice for the current language if the voice in use does not speak it."""
+    voices = language_voices()
+    if speech_worker and voices and speech_worker.voice_id not in [voice['id'] for voice in voices]:
+        set_voice(min(default_voice_index, len(voices) - 1))
 
 def set_voice(index):
     """
     Updates the global voice index based on user selection (Male/Female).
+    The index counts only the voices for the current joke language.
     """
     global default_voice_index
-    if 0 <= index < len(available_voices_data):
+    voices = language_voices()
+    if speech_worker and 0 <= index < len(voices):
         default_voice_index = index
+        speech_worker.set_voice(voices[index]['id'])
         update_voice_buttons() # Refreshing the button styles to reflect the new selection
+        prefetch_upcoming_jokes() # Audio rendered with the old voice can't be reused
 
 def update_voice_buttons():
     """
@@ -177,9 +1481,19 @@ def update_voice_buttons():
 
 # --- VISUALIZER ANIMATION LOGIC ---
 
-def draw_bar(canvas, x, bar_height):
+def create_visualizer_bars(canvas):
+    """
+    Creates the visualizer bars once (flat and out of sight); after this they are only
+    moved with canvas.coords, so no canvas items are created while speaking.
+    """
+    global visualizer_bars
+    palette = COLORS["visualizer"]
+    visualizer_bars = [canvas.create_rectangle(0, 0, 0, 0, fill=palette[i % len(palette)], outline="", width=0)
+                       for i in range(VISUALIZER_BARS)]
+
+def draw_bar(canvas, item, x, bar_height):
     """
-    Helper function to draw a single vertical bar on the visualizer canvas.
+    Helper function to move a single vertical bar on the visualizer canvas.
     """
     bar_width = 15
     if not canvas: return
@@ -188,82 +1502,67 @@ def draw_bar(canvas, x, bar_height):
     # Calculating Y coordinates to center the bar vertically
     y1 = (canvas_height / 2) - (bar_height / 2)
     y2 = (canvas_height / 2) + (bar_height / 2)
-    
-    # Selecting a random color from the defined palette for visual variety
-    color = random.choice(COLORS["visualizer"])
-    canvas.create_rectangle(x, y1, x + bar_width, y2, fill=color, outline="", width=0)
+    canvas.coords(item, x, y1, x + bar_width, y2)
+
+def flatten_visualizer():
+    """Hides the bars by giving them no height."""
+    for item in visualizer_bars:
+        visualizer_canvas.coords(item, 0, 0, 0, 0)
 
 def animate_visualizer():
     """
     Recursive function that redraws the visualizer bars while speech is active.
+    The speech worker's state is read here, on the GUI thread, every 80ms; the worker
+    thread never touches any widgets itself.
+    When a recording is playing the bars follow its real loudness; for live speech
+    (where there is no audio to look at) they fall back to random heights.
     """
-    global is_speaking
-    # Check if speech is active and the canvas exists
-    if is_speaking and visualizer_canvas:
+    global visualizer_running
+    # Check if speech is active (or waiting) and the canvas exists
+    if speech_worker and speech_worker.state.is_busy() and visualizer_canvas:
+        visualizer_running = True
         try:
-            visualizer_canvas.delete("all") # Clearing the canvas for the next frame
+            levels = speech_worker.state.levels()
             canvas_width = visualizer_canvas.winfo_width()
-            num_bars = 12
-            spacing = canvas_width // num_bars
+            spacing = canvas_width // len(visualizer_bars)
             
-            # Looping to draw multiple bars with random heights
-            for i in range(num_bars):
-                bar_height = random.randint(10, 50) # Randomizing height to simulate sound waves
-                draw_bar(visualizer_canvas, i * spacing + 10, bar_height)
+            # Looping to move each bar to its new height
+            for i, item in enumerate(visualizer_bars):
+                if levels is None:
+                    bar_height = random.randint(10, 50) # Randomizing height to simulate sound waves
+                else:
+                    bar_height = 4 + levels[i] * 46
+                draw_bar(visualizer_canvas, item, i * spacing + 10, bar_height)
             
             # Scheduling this function to run again after 80ms
             visualizer_canvas.after(80, animate_visualizer)
         except Exception:
-            pass
-    elif visualizer_canvas:
-        visualizer_canvas.delete("all") # Ensuring canvas is clean if not speaking
-
-def stop_speaking_ui_update():
-    """
-    Callback function to reset the speaking flag and clear the visualizer.
-    """
-    global is_speaking
-    is_speaking = False
-    if visualizer_canvas:
-        visualizer_canvas.delete("all")
+            visualizer_running = False
+    else:
+        visualizer_running = False
+        if visualizer_canvas:
+            flatten_visualizer() # Ensuring canvas is clean if not speaking
 
-def tts_thread_target(text_to_speak, voice_id):
+def speak_and_animate(text_to_speak, interrupt=False):
     """
-    The target function for the background thread. Handles the blocking TTS calls.
+    Main function to initiate speech and start the visualizer animation.
+    If something is already being read, the new text waits in the queue (or, with
+    interrupt=True, cuts the current sentence short and goes ahead of the queue).
     """
-    try:
-        local_engine = pyttsx3.init()
-        local_engine.setProperty('rate', 150)
-        local_engine.setProperty('volume', DEFAULT_VOLUME)
-        if voice_id:
-            local_engine.setProperty('voice', voice_id)
-        local_engine.say(text_to_speak)
-        local_engine.runAndWait() # This blocks execution, hence the need for threading
-        local_engine.stop()
-    except Exception:
-        pass
-    finally:
-        # Triggering UI cleanup on the main thread after speech concludes
-        root.after(0, stop_speaking_ui_update)
+    if not speech_worker:
+        return # Speech has not been set up yet
+    # Handing the text to the speech worker so the UI stays responsive
+    priority = PRIORITY_URGENT if interrupt else PRIORITY_NORMAL
+    speech_worker.speak(text_to_speak, priority, interrupt)
+    if not visualizer_running:
+        animate_visualizer() # Starting the animation loop
 
-def speak_and_animate(text_to_speak):
+def stop_speaking():
     """
-    Main function to initiate speech and start the visualizer animation.
+    Stops whatever is being read out and clears the speech queue.
     """
-    global is_speaking
-    if is_speaking: return # preventing overlapping speech commands
-    
-    is_speaking = True
-    animate_visualizer() # Starting the animation loop
-    
-    # Launching the TTS process in a separate thread to keep the UI responsive
-    if available_voices_data:
-        current_voice_id = available_voices_data[default_voice_index]['id']
-        tts_thread = threading.Thread(target=tts_thread_target, args=(text_to_speak, current_voice_id))
-        tts_thread.start()
-    else:
-        # Fallback logic if no voices are detected (simulate duration)
-        root.after(len(text_to_speak) * 100, stop_speaking_ui_update)
+    if speech_worker:
+        speech_worker.cancel()
 
 def speak_current_display():
     """
@@ -272,11 +1571,185 @@ def speak_current_display():
     if not current_joke:
         return
     # If punchline is revealed, read the full joke; otherwise, just the setup
-    if punchline_label and punchline_label.cget("text"):
-        text = f"{current_joke[0]} ... {current_joke[1]}"
-    else:
-        text = current_joke[0]
-    speak_and_animate(text)
+    with_punchline = bool(punchline_label and punchline_label.cget("text"))
+    # Pressing READ while something is being read starts this over straight away
+    # (e.g. the whole joke after the punchline was revealed) instead of waiting
+    busy = bool(speech_worker and speech_worker.state.is_busy())
+    speak_and_animate(joke_speech_text(current_joke, with_punchline), interrupt=busy)
+
+def joke_speech_text(joke, with_punchline):
+    """The exact text read out for a joke (kept in one place so prefetched audio matches)."""
+    return f"{joke[0]} ... {joke[1]}" if with_punchline else joke[0]
+
+def prefetch_upcoming_jokes():
+    """
+    Asks the speech worker to pre-render the current joke and the next few jokes in the
+    shuffled order, so pressing READ can play them without waiting for synthesis.
+    """
+    if not speech_worker or not current_joke:
+        return
+    upcoming = [current_joke] + [joke for _, joke in joke_store.peek(PREFETCH_AHEAD, **selected_filters())]
+    texts = []
+    for joke in upcoming:
+        texts.append(joke_speech_text(joke, False))
+        texts.append(joke_speech_text(joke, True))
+    speech_worker.prefetch(texts)
+
+# --- PUNCHLINE MATCHING ---
+# Guesses are compared in three cheap steps, stopping as soon as one is good enough:
+#   1. the old rule: the whole punchline appears inside the guess,
+#   2. word overlap (small typos in longer words still count as the same word),
+#   3. edit distance over the whole sentence. Before running it, a quick letter-pair
+#      count rules out guesses that cannot possibly be close enough, and the edit
+#      distance itself gives up early once it is clear the guess is too different.
+
+# Built once here instead of on every check
+PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation + "…‘’“”")
+CORRECT_THRESHOLD = 0.75   # Scores at or above this count as correct
+CLOSE_THRESHOLD = 0.5      # Scores at or above this get a "so close" message
+
+def normalize_text(text):
+    """Lowercases, removes punctuation and squeezes repeated spaces."""
+    return " ".join(text.lower().translate(PUNCTUATION_TABLE).split())
+
+MIN_TYPO_WORD = 4          # Words shorter than this must be spelled exactly ("a" vs "i" is not a typo)
+
+def letter_pairs(text):
+    """Counts every pair of neighbouring letters, e.g. "side" -> si, id, de."""
+    return Counter(map(str.__add__, text, text[1:]))
+
+def one_letter_deletions(word):
+    """Every version of the word with one letter left out."""
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+@lru_cache(maxsize=4096)
+def compile_answer(punchline):
+    """
+    Normalizes a punchline once and returns (text, words, typo_forms, letter pair counts).
+    'typo_forms' maps the longer words, and each of them with one letter missing, back
+    to the punchline words they came from. That lets a guessed word be checked for a
+    one-letter typo with a few dictionary lookups.
+    """
+    text = normalize_text(punchline)
+    words = frozenset(text.split())
+    typo_forms = {}
+    for word in words:
+        if len(word) >= MIN_TYPO_WORD:
+            for form in one_letter_deletions(word) | {word}:
+                typo_forms.setdefault(form, set()).add(word)
+    return text, words, typo_forms, letter_pairs(text)
+
+def count_word_pairs(candidates):
+    """
+    The most guess words that can each be paired with a different punchline word.
+    candidates holds, for every guess word, the punchline words it could be. Each
+    punchline word is used once, so "othr othe otter" only matches "other" once.
+    """
+    paired = {} # punchline word -> index of the guess word it is paired with
+
+    def pair(i, tried):
+        # Looking for a free word, or one whose guess word can move to another word
+        for word in candidates[i]:
+            if word not in tried:
+                tried.add(word)
+                if word not in paired or pair(paired[word], tried):
+                    paired[word] = i
+                    return True
+        return False
+
+    return sum(1 for i in range(len(candidates)) if candidates[i] and pair(i, set()))
+
+def bounded_edit_distance(a, b, limit):
+    """
+    Levenshtein distance between a and b, but only cells within 'limit' of the diagonal
+    are calculated and it stops as soon as the answer must be bigger than 'limit'.
+    Returns limit + 1 in that case, which keeps the cost at about len(a) * limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    too_far = limit + 1
+    previous = [j if j <= limit else too_far for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [too_far] * (len(b) + 1)
+        if i <= limit:
+            current[0] = i
+        row_best = current[0]
+        char_a = a[i - 1]
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            cost = previous[j - 1] + (char_a != b[j - 1])
+            cost = min(cost, previous[j] + 1, current[j - 1] + 1, too_far)
+            current[j] = cost
+            if cost < row_best:
+                row_best = cost
+        if row_best > limit:
+            return too_far # Every path is already too long, so there is no point continuing
+        previous = current
+    return previous[len(b)]
+
+class PunchlineMatcher:
+    """
+    Scores a guess against a punchline from 0.0 (nothing alike) to 1.0 (a match).
+    Punchlines are normalized once (compile_answer caches them), so checking many
+    guesses for the same joke only normalizes the guesses.
+    """
+    def __init__(self, threshold=CORRECT_THRESHOLD):
+        self.threshold = threshold
+
+    def score(self, guess, punchline):
+        answer_text, answer_words, typo_forms, answer_pairs = compile_answer(punchline)
+        guess_text = normalize_text(guess)
+        if not guess_text or not answer_text:
+            return 0.0
+
+        # Step 1: the whole punchline is in the guess (this was the original rule)
+        if answer_text in guess_text:
+            return 1.0
+
+        # Step 2: how many words the guess and the punchline share (Dice coefficient)
+        guess_words = set(guess_text.split())
+        shared = count_word_pairs([self._word_matches(word, answer_words, typo_forms) for word in guess_words])
+        best = min(1.0, 2 * shared / (len(guess_words) + len(answer_words)))
+        if best >= self.threshold:
+            return best
+
+        # Step 3: letter-by-letter similarity, only searching for distances that would
+        # still reach the threshold
+        longest = max(len(guess_text), len(answer_text))
+        limit = int((1 - self.threshold) * longest)
+        # Each edit can destroy at most 2 letter pairs, so a close guess must still share
+        # at least (longest - 1 - 2 * limit) pairs with the punchline
+        guess_pairs = letter_pairs(guess_text)
+        shared_pairs = sum(min(count, answer_pairs[pair]) for pair, count in guess_pairs.items()
+                           if pair in answer_pairs)
+        if shared_pairs < longest - 1 - 2 * limit:
+            return best
+        distance = bounded_edit_distance(guess_text, answer_text, limit)
+        if distance <= limit:
+            best = max(best, 1 - distance / longest)
+        return best
+
+    def check(self, guess, punchline):
+        """Returns (is_correct, score)."""
+        result = self.score(guess, punchline)
+        return result >= self.threshold, result
+
+    def check_many(self, pairs):
+        """Grades an iterable of (guess, punchline) pairs, yielding (is_correct, score) for each."""
+        for guess, punchline in pairs:
+            yield self.check(guess, punchline)
+
+    @staticmethod
+    def _word_matches(word, answer_words, typo_forms):
+        """The punchline words this guessed word could be (spelled right or with one typo)."""
+        matches = {word} if word in answer_words else set()
+        if len(word) < MIN_TYPO_WORD:
+            return matches
+        # A letter missing from the guess, an extra letter, or a changed/swapped letter
+        for form in one_letter_deletions(word) | {word}:
+            matches.update(typo_forms.get(form, ()))
+        return matches
+
+punchline_matcher = PunchlineMatcher()
 
 # --- CORE GAMEPLAY LOGIC ---
 
@@ -284,17 +1757,80 @@ def tell_joke():
     """
     Selects a random joke from the list and updates the UI labels.
     """
-    global current_joke
+    global current_joke, current_joke_id
     if not joke_label: return
     
     # Resetting UI elements for the new round
+    stop_speaking() # The old joke no longer needs to be read out
     punchline_label.config(text="")
     guess_entry.delete(0, tk.END)
     feedback_label.config(text="")
     
-    # Picking a random joke tuple from the loaded data
-    current_joke = random.choice(jokes)
+    # Giving the store the saved joke weights the first time this language is played
+    corpus = corpora[current_language]
+    if not corpus['weights_applied']:
+        joke_stats.apply_weights(current_language, joke_store)
+        corpus['weights_applied'] = True
+
+    # Dealing the next joke from the shuffled deck for the selected filters
+    picked = joke_store.draw(**selected_filters())
+    if picked is None:
+        current_joke, current_joke_id = None, None
+        joke_label.config(text="No jokes match these filters. Try another one! 🤷")
+        return
+    current_joke_id, current_joke = picked
+    record_joke_stat(joke_stats.record_draw)
+    compile_answer(current_joke[1]) # Preparing the punchline now so checking guesses is instant
     joke_label.config(text=current_joke[0])
+    prefetch_upcoming_jokes()
+
+def selected_filters():
+    """
+    Reads the filter drop-downs and returns them as keyword arguments for JokeStore.draw().
+    """
+    category, tag = filter_choices.get(type_filter_combo.get(), (None, None)) if type_filter_combo else (None, None)
+    length = None
+    if length_filter_combo and length_filter_combo.get() != "Any":
+        length = length_filter_combo.get().lower()
+    weighted = bool(weighted_var and weighted_var.get())
+    return {'category': category, 'tag': tag, 'length': length, 'weighted': weighted}
+
+def record_joke_stat(record, *details):
+    """
+    Adds to the current joke's statistics (record is joke_stats.record_draw or
+    joke_stats.record_guess) and updates its weight for weighted draws.
+    """
+    if joke_stats is None or current_joke_id is None:
+        return
+    record(current_language, current_joke_id, current_joke[0], *details)
+    joke_store.set_weight(current_joke_id, joke_stats.weight(current_language, current_joke_id))
+
+def build_filter_choices():
+    """
+    Creates the labels for the "joke type" drop-down from the store's indexes.
+    """
+    filter_choices.clear()
+    filter_choices["Any"] = (None, None)
+    for category in joke_store.values("category"):
+        filter_choices[f"{category.capitalize()}...?"] = (category, None)
+    for tag in joke_store.values("tag"):
+        filter_choices[f"#{tag}"] = (None, tag)
+    return list(filter_choices)
+
+def change_language(event=None):
+    """
+    Called when a language is picked: switches joke file, filters and voice,
+    then deals a joke in the new language.
+    """
+    name = language_combo.get()
+    language = next((code for code, corpus in corpora.items() if corpus['name'] == name), None)
+    if language is None or language == current_language:
+        return
+    select_language(language)
+    type_filter_combo.config(values=build_filter_choices())
+    type_filter_combo.current(0)
+    route_voice()
+    tell_joke()
 
 def show_punchline():
     """
@@ -313,9 +1849,7 @@ def check_answer():
         messagebox.showinfo("Wait!", "Press 'New Joke' first!")
         return
 
-    # Normalizing inputs by stripping whitespace and converting to lowercase
-    user_guess = guess_entry.get().strip().lower()
-    correct_answer = current_joke[1].lower()
+    user_guess = guess_entry.get().strip()
 
     # Basic validation to ensure the user actually typed something
     if not user_guess or len(user_guess) < 2:
@@ -323,16 +1857,17 @@ def check_answer():
         feedback_label.config(text="Huh? Say that again?", fg=COLORS["accent_gold"])
         return
 
-    # Removing punctuation for a more forgiving comparison (e.g., "side." == "side")
-    translator = str.maketrans('', '', string.punctuation)
-    clean_guess = user_guess.translate(translator)
-    clean_answer = correct_answer.translate(translator)
+    # Scoring the guess (ignores case, punctuation, word order and small typos)
+    is_correct, score = punchline_matcher.check(user_guess, current_joke[1])
+    record_joke_stat(joke_stats.record_guess, is_correct, score)
 
-    # Checking if the key terms match
-    if clean_answer in clean_guess or clean_guess in clean_answer:
+    if is_correct:
         play_sound_effect("correct")
         feedback_label.config(text="NAILED IT!! 🎉", fg=COLORS["accent_teal"])
         show_punchline() # Auto-reveal the answer on success
+    elif score >= CLOSE_THRESHOLD:
+        play_sound_effect("wrong")
+        feedback_label.config(text="SO CLOSE! Try again.", fg=COLORS["accent_gold"])
     else:
         play_sound_effect("wrong")
         feedback_label.config(text="NOPE! Try again.", fg=COLORS["accent_pink"])
@@ -401,6 +1936,7 @@ def show_game_page():
     Constructs and displays the Main Game page with all interactive elements.
     """
     global joke_label, punchline_label, guess_entry, feedback_label, visualizer_canvas, btn_male, btn_female
+    global type_filter_combo, length_filter_combo, language_combo, weighted_var
     clear_content_frame()
     
     # --- HEADER SECTION ---
@@ -423,6 +1959,10 @@ def show_game_page():
     tk.Button(voice_group, text="🔊 READ", font=("Segoe UI", 10, "bold"), width=8, bd=1,
               bg=COLORS["accent_pink"], fg="white", command=speak_current_display, cursor="hand2").pack(side=tk.LEFT, padx=10)
 
+    # Stop Button (interrupts speech and clears the queue)
+    tk.Button(voice_group, text="⏹ STOP", font=("Segoe UI", 10, "bold"), width=8, bd=1,
+              bg=COLORS["bg_main"], fg="white", command=stop_speaking, cursor="hand2").pack(side=tk.LEFT, padx=(0, 10))
+
     # Female Voice Toggle
     btn_female = tk.Button(voice_group, text="Female", font=("Segoe UI", 10), width=8, bd=1,
                            bg=COLORS["bg_dark"], fg="white", command=lambda: set_voice(1), cursor="hand2")
@@ -434,12 +1974,42 @@ def show_game_page():
     # Creating a canvas element to draw the animated bars
     visualizer_canvas = tk.Canvas(content_frame, bg="#111", height=60, highlightthickness=0)
     visualizer_canvas.pack(fill=tk.X, pady=(0, 20))
+    create_visualizer_bars(visualizer_canvas)
 
     # --- MAIN GAME AREA ---
     # Creating a container for the joke setup, input, and punchline
     game_area = tk.Frame(content_frame, bg=COLORS["bg_main"])
     game_area.pack(fill=tk.BOTH, expand=True, padx=50)
 
+    # 0. Filter Row (language, joke type and length)
+    filter_frame = tk.Frame(game_area, bg=COLORS["bg_main"])
+    filter_frame.pack(fill=tk.X, pady=(0, 5))
+
+    language_combo = None
+    if len(corpora) > 1: # Only worth showing when there is more than one language
+        tk.Label(filter_frame, text="Language:", font=FONTS["body"], bg=COLORS["bg_main"], fg="white").pack(side=tk.LEFT)
+        names = [corpus['name'] for corpus in corpora.values()]
+        language_combo = ttk.Combobox(filter_frame, values=names, state="readonly", width=12)
+        language_combo.current(list(corpora).index(current_language))
+        language_combo.bind("<<ComboboxSelected>>", change_language)
+        language_combo.pack(side=tk.LEFT, padx=(5, 20))
+
+    tk.Label(filter_frame, text="Joke type:", font=FONTS["body"], bg=COLORS["bg_main"], fg="white").pack(side=tk.LEFT)
+    type_filter_combo = ttk.Combobox(filter_frame, values=build_filter_choices(), state="readonly", width=18)
+    type_filter_combo.current(0)
+    type_filter_combo.pack(side=tk.LEFT, padx=(5, 20))
+
+    tk.Label(filter_frame, text="Length:", font=FONTS["body"], bg=COLORS["bg_main"], fg="white").pack(side=tk.LEFT)
+    length_filter_combo = ttk.Combobox(filter_frame, values=["Any"] + [name.capitalize() for name, _ in LENGTH_BUCKETS],
+                                       state="readonly", width=10)
+    length_filter_combo.current(0)
+    length_filter_combo.pack(side=tk.LEFT, padx=5)
+
+    weighted_var = tk.BooleanVar(value=False)
+    tk.Checkbutton(filter_frame, text="Favour new & tricky jokes", variable=weighted_var, font=FONTS["body"],
+                   bg=COLORS["bg_main"], fg="white", selectcolor=COLORS["bg_dark"],
+                   activebackground=COLORS["bg_main"], activeforeground="white").pack(side=tk.LEFT, padx=(20, 0))
+
     # 1. Joke Setup Card (LabelFrame)
     setup_card = tk.LabelFrame(game_area, text=" THE SETUP ", font=("Segoe UI", 10, "bold"), 
                                bg=COLORS["card_bg"], fg=COLORS["accent_gold"], bd=0, labelanchor="n")
@@ -496,31 +2066,220 @@ def show_game_page():
               command=show_welcome_page, width=10, pady=8, cursor="hand2").grid(row=0, column=3, padx=5)
 
 
+def on_close():
+    """
+    Saves the joke statistics that are still waiting to be written, stops the
+    speech worker and closes the window.
+    """
+    if joke_stats is not None:
+        joke_stats.flush()
+    if speech_worker:
+        speech_worker.shutdown()
+    root.destroy()
+
+# --- BATCH GRADING (command line) ---
+# Grades a whole file of guesses with the same PunchlineMatcher as check_answer, e.g.
+#     python TASK2.py --grade guesses.csv --output verdicts.csv --workers 4
+# The CSV needs a "guess" column plus either a "punchline" column or a "setup" column
+# (setups are looked up in the jokes file). Rows are graded in chunks on a process pool.
+GRADE_CHUNK_SIZE = 2000
+
+def guess_verdict(is_correct, score):
+    """The same three outcomes check_answer shows: 'correct', 'close' or 'wrong'."""
+    if is_correct:
+        return "correct"
+    return "close" if score >= CLOSE_THRESHOLD else "wrong"
+
+# Guesses the matcher must keep grading the same way, checked with: python TASK2.py --check
+MATCHER_CHECKS = [
+    ("to get to the other side", "To get to the other side.", True),
+    ("to get to the othr side", "To get to the other side.", True),
+    ("get to the other side", "To get to the other side.", True),
+    ("other othr othe othar otherr otter", "To get to the other side.", False), # One word, repeated with typos
+    ("side side side side side side", "To get to the other side.", False),
+    ("a banana", "To get to the other side.", False),
+]
+
+def check_matcher(matcher=None):
+    """
+    Grades MATCHER_CHECKS and returns a description of every problem found: a score
+    outside 0.0 - 1.0 or a verdict that isn't the expected one (empty list = all fine).
+    """
+    matcher = matcher or punchline_matcher
+    problems = []
+    for guess, punchline, expected in MATCHER_CHECKS:
+        is_correct, score = matcher.check(guess, punchline)
+        if not 0.0 <= score <= 1.0:
+            problems.append(f"'{guess}' scored {score:.3f}, outside 0.0 - 1.0")
+        elif is_correct != expected:
+            problems.append(f"'{guess}' was graded {guess_verdict(is_correct, score)} ({score:.3f})")
+    return problems
+
+def grade_chunk(pairs):
+    """Grades a list of (guess, punchline) pairs; runs inside the worker processes."""
+    return [(guess_verdict(is_correct, score), score) for is_correct, score in punchline_matcher.check_many(pairs)]
+
+def read_punchlines(path, delimiter="?"):
+    """Maps every setup in a jokes file (lower case, trimmed) to its punchline."""
+    punchlines = {}
+    with open(path, "r", encoding="utf-8", errors="replace") as file:
+        for line in file:
+            joke = parse_joke_line(line, delimiter)
+            if joke:
+                punchlines[joke[0].strip().lower()] = joke[1]
+    return punchlines
+
+def grade_guess_file(in_path, out_path, workers=None, chunk_size=GRADE_CHUNK_SIZE, jokes_path=JOKES_FILE, delimiter="?"):
+    """
+    Reads guesses from in_path, writes them to out_path with 'verdict' and 'score'
+    columns added, and returns a Counter of verdicts. The input is read in chunks and
+    at most two chunks per worker are waiting at a time, so big files never have to
+    fit in memory. workers=0 grades everything in this process.
+    """
+    totals = Counter()
+    with open(in_path, "r", newline="", encoding="utf-8") as source, \
+         open(out_path, "w", newline="", encoding="utf-8") as target:
+        reader = csv.DictReader(source)
+        columns = reader.fieldnames or []
+        if "guess" not in columns or not ({"punchline", "setup"} & set(columns)):
+            raise ValueError("The guesses file needs a 'guess' column and a 'punchline' or 'setup' column.")
+        punchlines = None if "punchline" in columns else read_punchlines(jokes_path, delimiter)
+        writer = csv.DictWriter(target, fieldnames=columns + ["verdict", "score"])
+        writer.writeheader()
+
+        def chunks():
+            rows = []
+            for row in reader:
+                rows.append(row)
+                if len(rows) == chunk_size:
+                    yield rows
+                    rows = []
+            if rows:
+                yield rows
+
+        def write_chunk(rows, results):
+            for row, (verdict, score) in zip(rows, results):
+                row["verdict"] = verdict
+                row["score"] = "" if score is None else f"{score:.3f}"
+                totals[verdict] += 1
+                writer.writerow(row)
+
+        def split(rows):
+            """Returns the (guess, punchline) pairs that can be graded and where they go."""
+            pairs, places = [], []
+            for i, row in enumerate(rows):
+                if punchlines is None:
+                    punchline = row["punchline"]
+                else:
+                    punchline = punchlines.get((row["setup"] or "").strip().lower())
+                if punchline is not None:
+                    pairs.append((row["guess"] or "", punchline))
+                    places.append(i)
+            return pairs, places
+
+        def merge(rows, places, graded):
+            results = [("unknown joke", None)] * len(rows) # Setups that are not in the jokes file
+            for i, result in zip(places, graded):
+                results[i] = result
+            return results
+
+        if workers == 0:
+            for rows in chunks():
+                pairs, places = split(rows)
+                write_chunk(rows, merge(rows, places, grade_chunk(pairs)))
+            return totals
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            waiting = deque()
+            limit = 2 * (workers or os.cpu_count() or 1)
+            for rows in chunks():
+                pairs, places = split(rows)
+                waiting.append((rows, places, pool.submit(grade_chunk, pairs)))
+                if len(waiting) >= limit:
+                    rows, places, future = waiting.popleft()
+                    write_chunk(rows, merge(rows, places, future.result()))
+            while waiting: # Writing the rest in the same order they were read
+                rows, places, future = waiting.popleft()
+                write_chunk(rows, merge(rows, places, future.result()))
+    return totals
+
+def run_command_line(argv):
+    """
+    Handles the command-line options, e.g.
+        python TASK2.py --grade guesses.csv
+        python TASK2.py --grade guesses.csv --output verdicts.csv --workers 4
+        python TASK2.py --check
+    """
+    parser = argparse.ArgumentParser(description="Joke Assistant - batch guess grading")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--grade", metavar="CSV", help="CSV file of guesses to grade")
+    mode.add_argument("--check", action="store_true", help="check the answer matcher against known guesses")
+    parser.add_argument("--output", metavar="CSV", help="where to write the verdicts (default <input>_graded.csv)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU, 0 = no pool)")
+    parser.add_argument("--chunk-size", type=int, default=GRADE_CHUNK_SIZE, help="guesses sent to a worker at once")
+    parser.add_argument("--jokes", metavar="FILE", default=JOKES_FILE, help="jokes file used to look up setups")
+    parser.add_argument("--delimiter", default="?", help="setup/punchline delimiter of the jokes file")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        problems = check_matcher()
+        for problem in problems:
+            print(f"Problem: {problem}", file=sys.stderr)
+        print(f"Checked {len(MATCHER_CHECKS)} guesses, {len(problems)} problem(s).")
+        return 1 if problems else 0
+
+    output = args.output or os.path.splitext(args.grade)[0] + "_graded.csv"
+    start = time.perf_counter()
+    try:
+        totals = grade_guess_file(args.grade, output, args.workers, max(1, args.chunk_size), args.jokes, args.delimiter)
+    except (OSError, ValueError) as error:
+        print(f"Error: {error}", file=sys.stderr)
+        return 1
+    seconds = time.perf_counter() - start
+
+    graded = sum(totals.values())
+    workers = args.workers if args.workers is not None else os.cpu_count()
+    print(f"Graded {graded} guesses in {seconds:.2f}s ({graded / max(seconds, 1e-9):,.0f} per second, "
+          f"{workers or 'no'} worker processes).")
+    print(", ".join(f"{verdict}: {count}" for verdict, count in sorted(totals.items())))
+    print(f"Verdicts written to '{output}'.")
+    return 0
+
 # --- MAIN ENTRY POINT ---
-# Initializing the main Tkinter root window
-root = tk.Tk()
+# The window is only built when this file is run directly, so the joke and matching
+# logic above can be imported by other scripts without opening a window.
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # Command-line options mean batch grading, without opening the window
+        sys.exit(run_command_line(sys.argv[1:]))
 
-# Customizing the window icon
-# Generating a 16x16 icon filled with our accent color to replace the default feather icon
-try:
-    icon_img = tk.PhotoImage(width=16, height=16)
-    icon_img.put(COLORS["accent_teal"], to=(0, 0, 16, 16))
-    root.iconphoto(True, icon_img) 
-except Exception:
-    pass # If icon generation fails, fall back to default
-
-# Configuring the main window properties
-root.title("🤡 Joke Assistant")      # Adding emoji to title as requested
-root.geometry("900x850")             # Setting dimensions
-root.configure(bg=COLORS["bg_main"]) # Applying background theme
-
-# Creating a main frame to hold all page content
-content_frame = tk.Frame(root, bg=COLORS["bg_main"])
-content_frame.pack(fill=tk.BOTH, expand=True)
-
-# Loading data and launching the initial view
-setup_tts_data()
-show_welcome_page() 
-
-# Starting the main event loop to keep the application running
-root.mainloop()
\ No newline at end of file
+    # Initializing the main Tkinter root window
+    root = tk.Tk()
+
+    # Customizing the window icon
+    # Generating a 16x16 icon filled with our accent color to replace the default feather icon
+    try:
+        icon_img = tk.PhotoImage(width=16, height=16)
+        icon_img.put(COLORS["accent_teal"], to=(0, 0, 16, 16))
+        root.iconphoto(True, icon_img) 
+    except Exception:
+        pass # If icon generation fails, fall back to default
+
+    # Configuring the main window properties
+    root.title("🤡 Joke Assistant")      # Adding emoji to title as requested
+    root.geometry("900x850")             # Setting dimensions
+    root.configure(bg=COLORS["bg_main"]) # Applying background theme
+
+    # Creating a main frame to hold all page content
+    content_frame = tk.Frame(root, bg=COLORS["bg_main"])
+    content_frame.pack(fill=tk.BOTH, expand=True)
+    root.protocol("WM_DELETE_WINDOW", on_close)
+
+    # Loading data and launching the initial view
+    load_jokes_from_file()
+    setup_audio()
+    show_welcome_page() 
+    root.after(50, setup_tts_data) # Starting speech once the window is on screen
+
+    # Starting the main event loop to keep the application running
+    root.mainloop()
\ No newline at end of file
@@ -25,9 +25,24 @@ Assessment 2 - Student Management System
 """
 
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
+from tkinter import ttk, messagebox, simpledialog, filedialog
 import os
 import sys
+import csv
+import sqlite3
+import argparse
+import socket
+import asyncio
+import json
+import time
+import hashlib
+import bisect
+import heapq
+import gc
+import functools
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 # =============================================================================
 # CONFIGURATION & CONSTANTS
@@ -53,6 +68,27 @@ FONT_SUBHEADER = ("Segoe UI", 14, "bold")
 FONT_BODY = ("Segoe UI", 10)
 FONT_BOLD = ("Segoe UI", 10, "bold")
 
+# =============================================================================
+# BULK LOADING
+# =============================================================================
+def without_gc(func):
+    """
+    Runs func with Python's garbage collector paused. Loading a big class creates
+    hundreds of thousands of objects that all stay alive, and the collector would
+    otherwise keep re-checking every one of them while they are being made (on 300k
+    students that was most of the loading time).
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if enabled:
+                gc.enable()
+    return wrapper
+
 # =============================================================================
 # DATA MODEL CLASS
 # =============================================================================
@@ -61,13 +97,15 @@ class Student:
     I created this class to represent a single student.
     It holds their info and does the maths for their grades.
     """
-    def __init__(self, code, name, cw1, cw2, cw3, exam):
+    def __init__(self, code, name, cw1, cw2, cw3, exam, cohort=""):
         # Cleaning up the input (removing spaces) just in case
         self.code = str(code).strip()
         self.name = str(name).strip()
         # Storing coursework in a list makes it easier to sum up later
         self.coursework = [int(cw1), int(cw2), int(cw3)]
         self.exam = int(exam)
+        # Which class/year file the student came from (empty when only one file is open)
+        self.cohort = cohort
 
     # I used @property decorators here so I can access .total_overall like a variable
     # instead of calling a function .total_overall() every time.
@@ -101,15 +139,712 @@ class Student:
     def __str__(self):
         return f"{self.name} ({self.code})"
 
+# =============================================================================
+# VALIDATION
+# =============================================================================
+# These rules used to live inside StudentForm.on_save. I moved them out here so the
+# form and the bulk CSV import check students in exactly the same way.
+IMPORT_CHUNK_SIZE = 5000 # Rows sent to each worker process at once when importing
+
+def validate_student_fields(code, name, cw1, cw2, cw3, exam):
+    """
+    Checks the raw text of one student's fields.
+    Returns (Student, None) if everything is fine, or (None, error message) if not.
+    """
+    code = str(code).strip()
+    name = str(name).strip()
+
+    # Validation 1: Required fields
+    if not code or not name:
+        return None, "Code and Name are required."
+
+    # Validation 2: Code format
+    if not (code.isdigit() and 1000 <= int(code) <= 9999):
+        return None, "Code must be a number between 1000 and 9999."
+
+    # The data file is comma separated, so a comma in the name would break it
+    if "," in name:
+        return None, "Name cannot contain a comma."
+
+    try:
+        c1 = int(str(cw1).strip())
+        c2 = int(str(cw2).strip())
+        c3 = int(str(cw3).strip())
+        ex = int(str(exam).strip())
+    except ValueError:
+        return None, "Marks must be numeric integers."
+
+    # Validation 3: Mark ranges
+    if not (0 <= c1 <= 20 and 0 <= c2 <= 20 and 0 <= c3 <= 20):
+        return None, "Coursework marks must be between 0 and 20."
+    if not (0 <= ex <= 100):
+        return None, "Exam mark must be between 0 and 100."
+
+    return Student(code, name, c1, c2, c3, ex), None
+
+def validate_rows(rows):
+    """
+    Validates a chunk of (line number, fields) rows from an import file.
+    This runs in the worker processes, so it returns plain tuples:
+    (line number, (code, name, cw1, cw2, cw3, exam) or None, error message or None).
+    """
+    results = []
+    for line_no, fields in rows:
+        if len(fields) != 6:
+            results.append((line_no, None, f"Expected 6 values but found {len(fields)}."))
+            continue
+        student, error = validate_student_fields(*fields)
+        if student:
+            results.append((line_no, (student.code, student.name, *student.coursework, student.exam), None))
+        else:
+            results.append((line_no, None, error))
+    return results
+
+# =============================================================================
+# COHORT FILES
+# =============================================================================
+COHORT_FILE_TYPES = (".txt", ".csv") # Files in a cohort folder that are read as cohorts
+ALL_COHORTS = "All Cohorts" # Filter option that shows every cohort
+
+def read_cohort_file(path):
+    """
+    Reads one cohort file (same format as studentMarks.txt) in a worker process.
+    Returns (path, rows, skipped) where rows are (code, name, cw1, cw2, cw3, exam)
+    tuples and skipped counts the lines that could not be read.
+    """
+    rows = []
+    skipped = 0
+    with open(path, "r", encoding="utf-8-sig") as file:
+        file.readline() # Line 0 is just the count
+        for line in file:
+            parts = line.strip().split(",")
+            if len(parts) != 6:
+                skipped += 1 if line.strip() else 0
+                continue
+            try:
+                rows.append((parts[0].strip(), parts[1].strip(), int(parts[2]), int(parts[3]), int(parts[4]), int(parts[5])))
+            except ValueError:
+                skipped += 1
+    return path, rows, skipped
+
+# =============================================================================
+# SEARCH INDEX
+# =============================================================================
+class StudentSearchIndex:
+    """
+    I built this so the Find Student page can search while the user types, even with
+    100k+ students, without looping over the whole list on every key press.
+    It keeps:
+      - the codes in a sorted list, so a code prefix is found with a binary search (bisect)
+      - every word of every name in a sorted list, so a word prefix ("jo" -> "john") is too
+      - a trigram index (3 letters -> the students whose name contains them), so a piece
+        from the middle of a name ("urr" -> "Curry") only checks students sharing it.
+        Each trigram's list is made the first time it is searched for and then kept,
+        and typing more letters keeps using the same trigram.
+    Students are stored by id() so two students with the same name stay separate.
+    rebuild() only remembers the list; the index is built on the first search, so
+    loading a big file isn't slowed down by it.
+    """
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._students = {}   # id(student) -> student
+        self._names = {}      # id(student) -> name in lower case
+        self._codes = []      # sorted (code, id)
+        self._words = []      # sorted (word, id) for every word of every name
+        self._trigrams = {}   # trigram -> set of ids (only for trigrams searched so far)
+        self._pending = None  # List waiting to be indexed (see rebuild)
+
+    def rebuild(self, students):
+        self.clear()
+        self._pending = students
+
+    @without_gc
+    def _build(self):
+        students, self._pending = self._pending, None
+        self._students = {id(s): s for s in students}
+        self._names = {id(s): s.name.lower() for s in students}
+        # Sorting once is much quicker than inserting 100k entries one at a time
+        self._codes = sorted((s.code, id(s)) for s in students)
+        self._words = sorted((word, key) for key, name in self._names.items() for word in name.split())
+
+    def add(self, student):
+        if self._pending is not None:
+            return # The list will be indexed as a whole on the next search
+        key = id(student)
+        name = student.name.lower()
+        self._students[key] = student
+        self._names[key] = name
+        bisect.insort(self._codes, (student.code, key))
+        for word in name.split():
+            bisect.insort(self._words, (word, key))
+        for gram, ids in self._trigrams.items():
+            if gram in name:
+                ids.add(key)
+
+    def remove(self, student):
+        if self._pending is not None:
+            return
+        key = id(student)
+        if self._students.pop(key, None) is None:
+            return
+        name = self._names.pop(key)
+        self._remove_entry(self._codes, (student.code, key))
+        for word in name.split():
+            self._remove_entry(self._words, (word, key))
+        for ids in self._trigrams.values():
+            ids.discard(key)
+
+    def search(self, text, limit=20):
+        """
+        Returns up to `limit` students whose code starts with the text, or whose name
+        contains every word of the text. Code matches come first (in code order), then
+        names where every word starts one of the name's words ("jo cu" -> "John Curry"),
+        then names that only contain the words somewhere ("urr" -> "John Curry").
+        Every pass stops as soon as it has enough results, so common prefixes like "a"
+        are as quick as rare ones.
+        """
+        text = text.strip().lower()
+        if not text:
+            return []
+        if self._pending is not None:
+            self._build()
+        results = []
+        seen = set()
+
+        def take(key):
+            """Adds a student to the results; returns True once there are enough."""
+            if key not in seen:
+                seen.add(key)
+                results.append(self._students[key])
+            return len(results) >= limit
+
+        # Pass 1: code prefixes (the codes list is sorted, so they are next to each other)
+        if text.isdigit():
+            start, end = self._prefix_bounds(self._codes, text)
+            for i in range(start, end):
+                if take(self._codes[i][1]):
+                    return results
+
+        # Pass 2: every word starts a word of the name. Walking through the smallest
+        # of the word ranges and checking the other words on each student.
+        words = text.split()
+        ranges = [self._prefix_bounds(self._words, word) for word in words]
+        if all(end > start for start, end in ranges):
+            start, end = min(ranges, key=lambda r: r[1] - r[0])
+            for i in range(start, end):
+                key = self._words[i][1]
+                if key not in seen and self._starts_words(key, words) and take(key):
+                    return results
+
+        # Pass 3: the words appear anywhere in the name
+        for key in self._substring_candidates(words):
+            if key not in seen:
+                name = self._names[key]
+                if all(word in name for word in words) and take(key):
+                    return results
+        return results
+
+    def _starts_words(self, key, words):
+        name_words = self._names[key].split()
+        return all(any(name_word.startswith(word) for name_word in name_words) for word in words)
+
+    def _substring_candidates(self, words):
+        """
+        Students that might contain the words: those containing the first trigram of
+        the longest word. Words shorter than 3 letters have no trigrams, so on their own
+        they only match the start of a name word (checking every student would be too slow).
+        """
+        longest = max(words, key=len)
+        if len(longest) < 3:
+            return ()
+        gram = longest[:3]
+        ids = self._trigrams.get(gram)
+        if ids is None:
+            ids = self._trigrams[gram] = {key for key, name in self._names.items() if gram in name}
+        return ids
+
+    @staticmethod
+    def _prefix_bounds(entries, prefix):
+        """Start and end positions of the (value, id) entries whose value starts with prefix."""
+        start = bisect.bisect_left(entries, (prefix,))
+        end = bisect.bisect_left(entries, (prefix + "\uffff",))
+        return start, end
+
+    @staticmethod
+    def _remove_entry(entries, entry):
+        i = bisect.bisect_left(entries, entry)
+        if i < len(entries) and entries[i] == entry:
+            del entries[i]
+
+# =============================================================================
+# STATISTICS INDEX
+# =============================================================================
+# Every mark column the statistics can be asked about, with the highest possible mark.
+# "percentage" isn't stored separately because it is just total / 160 * 100.
+STAT_COLUMNS = {
+    "cw1": 20,
+    "cw2": 20,
+    "cw3": 20,
+    "coursework": 60,
+    "exam": 100,
+    "total": 160,
+}
+GRADE_BOUNDARIES = [("F", 0), ("D", 40), ("C", 50), ("B", 60), ("A", 70)] # Lowest percentage for each grade
+
+def column_value(student, column):
+    """The whole-number mark of a student for one of the STAT_COLUMNS."""
+    if column == "total":
+        return student.total_overall
+    if column == "coursework":
+        return student.total_coursework
+    if column == "exam":
+        return student.exam
+    return student.coursework[int(column[2]) - 1] # cw1, cw2, cw3
+
+class StudentStatsIndex:
+    """
+    Keeps every mark column sorted, so the statistics never need a full sort:
+      - median and percentiles just read the right position of the sorted column
+      - histograms and grade counts use a binary search (bisect) per bin edge
+      - mean and standard deviation come from running totals of the marks and their
+        squares, which are whole numbers so adding/removing students never drifts
+    Each column holds (mark, id(student), student) entries; the id keeps entries unique
+    and means the student object itself is never compared.
+    Like the search index, rebuild() only remembers the list until it is needed.
+    """
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._columns = {column: [] for column in STAT_COLUMNS}
+        self._sums = {column: 0 for column in STAT_COLUMNS}
+        self._squares = {column: 0 for column in STAT_COLUMNS}
+        self._pending = None
+
+    def rebuild(self, students):
+        self.clear()
+        self._pending = students
+
+    def _ready(self):
+        if self._pending is not None:
+            self._build()
+
+    @without_gc
+    def _build(self):
+        students, self._pending = self._pending, None
+        # Marks are small whole numbers with lots of ties, so instead of sorting tuples
+        # I sort everyone by id once and drop them into one bucket per mark, in that order.
+        # Every bucket is then already sorted by id, and joining the buckets gives the column.
+        marks = []
+        for ident, s in sorted(zip(map(id, students), students)):
+            c1, c2, c3 = s.coursework
+            # Same order as STAT_COLUMNS: cw1, cw2, cw3, coursework, exam, total
+            marks.append((ident, s, (c1, c2, c3, c1 + c2 + c3, s.exam, c1 + c2 + c3 + s.exam)))
+        for i, column in enumerate(STAT_COLUMNS):
+            buckets = {}
+            for ident, s, values in marks:
+                value = values[i]
+                buckets.setdefault(value, []).append((value, ident, s))
+            self._columns[column] = [entry for value in sorted(buckets) for entry in buckets[value]]
+            self._sums[column] = sum(value * len(bucket) for value, bucket in buckets.items())
+            self._squares[column] = sum(value * value * len(bucket) for value, bucket in buckets.items())
+
+    def add(self, student):
+        if self._pending is not None:
+            return # The list will be indexed as a whole when it is next needed
+        for column in STAT_COLUMNS:
+            value = column_value(student, column)
+            bisect.insort(self._columns[column], (value, id(student), student))
+            self._sums[column] += value
+            self._squares[column] += value * value
+
+    def remove(self, student):
+        if self._pending is not None:
+            return
+        for column in STAT_COLUMNS:
+            value = column_value(student, column)
+            entries = self._columns[column]
+            i = bisect.bisect_left(entries, (value, id(student)))
+            if i < len(entries) and entries[i][1] == id(student):
+                del entries[i]
+                self._sums[column] -= value
+                self._squares[column] -= value * value
+
+    def column(self, column):
+        """The sorted (mark, id, student) entries of a column (read-only, please)."""
+        self._ready()
+        return self._columns[column]
+
+    def count(self):
+        self._ready()
+        return len(self._columns["total"])
+
+    def total(self, column):
+        self._ready()
+        return self._sums[column]
+
+    def mean(self, column):
+        count = self.count()
+        return self._sums[column] / count if count else 0.0
+
+    def std_dev(self, column):
+        """Population standard deviation."""
+        count = self.count()
+        if not count:
+            return 0.0
+        variance = (self._squares[column] - self._sums[column] ** 2 / count) / count
+        return max(variance, 0.0) ** 0.5
+
+    def percentile(self, column, p):
+        """The p-th percentile (0-100), interpolating between the two nearest marks."""
+        entries = self.column(column)
+        if not entries:
+            return 0.0
+        position = (len(entries) - 1) * min(max(p, 0), 100) / 100
+        below = int(position)
+        above = min(below + 1, len(entries) - 1)
+        return entries[below][0] + (entries[above][0] - entries[below][0]) * (position - below)
+
+    def count_below(self, column, value):
+        """How many students have a mark lower than value."""
+        return bisect.bisect_left(self.column(column), (value,))
+
+    def histogram(self, column, edges):
+        """Counts the marks in [edges[i], edges[i+1]); the last bin also includes its top edge."""
+        counts = []
+        for i in range(len(edges) - 1):
+            high = self.count_below(column, edges[i + 1]) if i < len(edges) - 2 else \
+                   bisect.bisect_right(self.column(column), (edges[i + 1], float("inf")))
+            counts.append(high - self.count_below(column, edges[i]))
+        return counts
+
+# =============================================================================
+# SAFE FILE ACCESS
+# =============================================================================
+# Several staff can have the app open on the same shared file, so saving works like this:
+#   - an advisory lock file makes sure only one copy of the app saves at a time
+#   - each copy remembers the version (inode, size, modified time) of the file it loaded,
+#     and if the file changed since then it reloads and re-applies its change (optimistic check)
+#   - the new file is written to a temp file, fsync'ed and renamed over the old one, so a
+#     crash in the middle of a save can never leave a half-written file behind
+try:
+    import fcntl # Linux / macOS
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt # Windows
+except ImportError:
+    msvcrt = None
+
+LOCK_TIMEOUT = 10 # Seconds to wait for another copy of the app to finish saving
+LOCK_RETRY = 0.05
+EDITED_ELSEWHERE = ("This student was changed by another user while you were editing it, "
+                    "so your changes were not saved. Please open the record again.")
+
+class FileLock:
+    """Advisory lock held in a 'with' block. Raises TimeoutError if it stays busy too long."""
+    def __init__(self, path, timeout=LOCK_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self.file = None
+
+    def _try_lock(self):
+        if fcntl:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        elif msvcrt:
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_NBLCK, 1)
+
+    def __enter__(self):
+        self.file = open(self.path, "a+")
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                self._try_lock()
+                return self
+            except OSError:
+                if time.monotonic() >= deadline:
+                    self.file.close()
+                    raise TimeoutError(f"{os.path.basename(self.path)} is held by another user")
+                time.sleep(LOCK_RETRY)
+
+    def __exit__(self, *exc):
+        if fcntl:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+        elif msvcrt:
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+        self.file.close()
+
+def file_version(path):
+    """Something that changes every time the file is saved (None if it doesn't exist)."""
+    try:
+        info = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (info.st_ino, info.st_size, info.st_mtime_ns)
+
+def write_atomic(path, lines):
+    """Writes the lines to a temp file next to path, then swaps it in with one rename."""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "w") as file:
+            file.writelines(lines)
+            file.flush()
+            os.fsync(file.fileno()) # Making sure it is really on disk before the rename
+        if os.path.exists(path):
+            os.chmod(temp_path, os.stat(path).st_mode & 0o7777) # Keeping the old file's permissions
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    if os.name == "posix":
+        # The rename itself is only on disk once the folder is, too
+        folder = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+        try:
+            os.fsync(folder)
+        except OSError:
+            pass # Some file systems can't fsync a folder, the save has still happened
+        finally:
+            os.close(folder)
+
+# =============================================================================
+# SNAPSHOT HISTORY
+# =============================================================================
+SNAPSHOT_FOLDER = "snapshots" # Kept next to the data file (or inside the cohort folder)
+SNAPSHOT_RECORDS = "records.txt" # Every different student record ever saved, once each
+SNAPSHOT_EXT = ".snap"
+SNAPSHOT_FULL_EVERY = 200 # Snapshots between ones that list every key (see SnapshotStore)
+
+def record_text(student):
+    # The file line plus the cohort, so moving a student to another cohort counts as a change
+    return f"{student.to_csv_string().rstrip()},{student.cohort}"
+
+def record_key(text):
+    """Short content hash, so identical records (and identical snapshots) share one key."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=10).hexdigest()
+
+def record_student(text):
+    parts = text.split(",")
+    return Student(*parts[:6], cohort=parts[6] if len(parts) > 6 else "")
+
+class SnapshotStore:
+    """
+    History of every save, kept small by content addressing and deltas:
+      - records.txt holds each distinct student record once ("key,record" lines), and
+        a save only appends the records that haven't been seen before
+      - every snapshot is a .snap file: a JSON summary line (count, total marks, grade
+        counts, parent snapshot) followed by "+key"/"-key" lines for the records added
+        and removed since its parent. Every SNAPSHOT_FULL_EVERY snapshots, one lists
+        all of its keys instead, so rebuilding a snapshot never replays a long chain.
+      - the id is the XOR of all the keys, so it can be updated from just the delta,
+        and saving the same data twice in a row doesn't add a snapshot
+    The keys of the newest snapshot are kept in memory; the full key sets of older
+    snapshots are only rebuilt by load() and diff().
+    """
+    def __init__(self, folder):
+        self.folder = folder
+        self._known = None # Keys already in records.txt, read the first time they're needed
+        self._latest = None # Header of the newest snapshot ({} when there are none)
+        self._current = None # Keys of the newest snapshot
+
+    def _known_keys(self):
+        if self._known is None:
+            self._known = set()
+            path = os.path.join(self.folder, SNAPSHOT_RECORDS)
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as file:
+                    self._known.update(line.split(",", 1)[0] for line in file)
+        return self._known
+
+    def _names(self):
+        if not os.path.isdir(self.folder):
+            return []
+        return sorted(name[:-len(SNAPSHOT_EXT)] for name in os.listdir(self.folder) if name.endswith(SNAPSHOT_EXT))
+
+    def _read_header(self, name):
+        with open(os.path.join(self.folder, name + SNAPSHOT_EXT), "r", encoding="utf-8") as file:
+            header = json.loads(file.readline())
+        header["name"] = name
+        return header
+
+    def latest(self):
+        if self._latest is None:
+            names = self._names()
+            self._latest = self._read_header(names[-1]) if names else {}
+        return self._latest
+
+    def _current_keys(self):
+        if self._current is None:
+            latest = self.latest()
+            self._current = self._read_snapshot(latest["name"])[1] if latest else set()
+        return self._current
+
+    def save_all(self, students, total, grades):
+        """
+        Snapshot of the complete list of students, for when the changes since the last
+        snapshot aren't known (e.g. just after loading the file). total and grades are
+        the total marks and grade counts, which the controller already keeps.
+        Returns the snapshot's header, or None if nothing changed since the last one.
+        """
+        names = self._names()
+        if self._latest is not None and (names[-1] if names else None) != self._latest.get("name"):
+            # Another copy of the app saved a snapshot since mine, so comparing with that one
+            self._latest = self._current = None
+        texts = {}
+        for s in students:
+            text = record_text(s)
+            texts[record_key(text)] = text
+        current = self._current_keys()
+        added = {key: text for key, text in texts.items() if key not in current}
+        return self._save(added, current - texts.keys(), total, grades)
+
+    def save_changes(self, changes, total, grades):
+        """
+        Snapshot made from just the changes since the last one: (+1, student) for each
+        student added and (-1, student) for each one removed, in the order they happened.
+        """
+        texts = {}
+        net = {}
+        for sign, s in changes:
+            text = record_text(s)
+            key = record_key(text)
+            texts[key] = text
+            net[key] = net.get(key, 0) + sign
+        current = self._current_keys()
+        added = {key: texts[key] for key, n in net.items() if n > 0 and key not in current}
+        removed = {key for key, n in net.items() if n < 0 and key in current}
+        return self._save(added, removed, total, grades)
+
+    def _save(self, added, removed, total, grades):
+        latest = self.latest()
+        if latest and not added and not removed:
+            return None
+        current = self._current_keys()
+        digest = int(latest.get("id", "0"), 16)
+        for key in itertools.chain(added, removed):
+            digest ^= int(key, 16) # Every key either joins or leaves the set, XOR handles both
+
+        depth = latest.get("depth", 0) + 1 if latest else 0
+        full = not latest or depth >= SNAPSHOT_FULL_EVERY
+        if full:
+            depth = 0
+            lines = [f"+{key}\n" for key in (current - removed) | added.keys()]
+        else:
+            lines = [f"+{key}\n" for key in added] + [f"-{key}\n" for key in removed]
+
+        os.makedirs(self.folder, exist_ok=True)
+        known = self._known_keys()
+        new_keys = [key for key in added if key not in known]
+        if new_keys:
+            with open(os.path.join(self.folder, SNAPSHOT_RECORDS), "a", encoding="utf-8") as file:
+                file.writelines(f"{key},{added[key]}\n" for key in new_keys)
+            known.update(new_keys)
+
+        # Names sort by time, so two saves in the same millisecond still come out in order.
+        # They use UTC, which never goes back an hour when the clocks change.
+        millis = max(int(time.time() * 1000), int(latest.get("time", 0) * 1000) + 1)
+        snapshot_id = f"{digest:020x}"
+        name = time.strftime("%Y%m%d-%H%M%S", time.gmtime(millis // 1000)) + f"{millis % 1000:03d}-{snapshot_id[:8]}"
+        header = {"id": snapshot_id, "time": millis / 1000, "count": len(current) - len(removed) + len(added),
+                  "total": total, "grades": dict(grades), "parent": latest.get("name", ""),
+                  "full": full, "depth": depth}
+        with open(os.path.join(self.folder, name + SNAPSHOT_EXT), "w", encoding="utf-8") as file:
+            file.write(json.dumps(header) + "\n")
+            file.writelines(lines)
+        # Only updated once everything is on disk, so a failed save leaves them as they were
+        current.difference_update(removed)
+        current.update(added)
+        header["name"] = name
+        self._latest = header
+        return header
+
+    def list_snapshots(self):
+        """Headers of every snapshot, oldest first (only the first line of each file is read)."""
+        return [self._read_header(name) for name in self._names()]
+
+    def _read_snapshot(self, name):
+        """The header and full key set of a snapshot, replaying deltas from the last full one."""
+        chain = [self._read_header(name)]
+        while not chain[-1].get("full", True) and chain[-1].get("parent"):
+            chain.append(self._read_header(chain[-1]["parent"]))
+        keys = set()
+        for header in reversed(chain):
+            with open(os.path.join(self.folder, header["name"] + SNAPSHOT_EXT), "r", encoding="utf-8") as file:
+                file.readline()
+                for line in file:
+                    line = line.strip()
+                    if line.startswith("-"):
+                        keys.discard(line[1:])
+                    elif line:
+                        keys.add(line.lstrip("+"))
+        return chain[0], keys
+
+    def _read_records(self, keys):
+        """Record text for the given keys, in one pass over records.txt."""
+        texts = {}
+        if not keys:
+            return texts
+        with open(os.path.join(self.folder, SNAPSHOT_RECORDS), "r", encoding="utf-8") as file:
+            for line in file:
+                key, _, text = line.rstrip("\n").partition(",")
+                if key in keys:
+                    texts[key] = text
+        return texts
+
+    def load(self, name):
+        """The students exactly as they were in a snapshot."""
+        _, keys = self._read_snapshot(name)
+        return [record_student(text) for text in self._read_records(keys).values()]
+
+    def diff(self, old_name, new_name):
+        """
+        What changed between two snapshots: students added, removed and changed,
+        grade changes, the drift in the class average and the shift in grade counts.
+        """
+        old, old_keys = self._read_snapshot(old_name)
+        new, new_keys = self._read_snapshot(new_name)
+        gone = old_keys - new_keys
+        came = new_keys - old_keys
+        texts = self._read_records(gone | came)
+        # Keyed by (cohort, code), as the same code may be used in two cohorts
+        before = {(s.cohort, s.code): s for s in (record_student(texts[key]) for key in gone)}
+        after = {(s.cohort, s.code): s for s in (record_student(texts[key]) for key in came)}
+        changed = sorted(before.keys() & after.keys())
+
+        def average(header):
+            return header["total"] / header["count"] / 160 * 100 if header["count"] else 0.0
+
+        return {
+            "from": old,
+            "to": new,
+            "unchanged": len(old_keys & new_keys),
+            "added": [after[key] for key in sorted(after.keys() - before.keys())],
+            "removed": [before[key] for key in sorted(before.keys() - after.keys())],
+            "changed": [(before[key], after[key]) for key in changed],
+            "grade_changes": [(before[key], after[key]) for key in changed
+                              if before[key].grade != after[key].grade],
+            "average_drift": average(new) - average(old),
+            "grade_shift": {g: new["grades"][g] - old["grades"][g] for g in new["grades"]},
+        }
+
 # =============================================================================
 # CONTROLLER CLASS (LOGIC HANDLER)
 # =============================================================================
+def messagebox_notify(level, title, message):
+    """Default way the controller tells the user something: a pop-up box."""
+    show = {"error": messagebox.showerror, "warning": messagebox.showwarning}.get(level, messagebox.showinfo)
+    show(title, message)
+
 class StudentController:
     """
     This class handles the 'backend' logic: saving files, loading files, and sorting.
     I separated this from the GUI code to keep things organized (MVC pattern).
     """
-    def __init__(self):
+    def __init__(self, filepath=None, notify=None):
         # I found this code online to make sure the text file is always found
         # regardless of where I run the script from.
         if getattr(sys, 'frozen', False):
@@ -117,13 +852,53 @@ class StudentController:
         elif __file__:
             application_path = os.path.dirname(os.path.abspath(__file__))
             
-        self.filepath = os.path.join(application_path, "studentMarks.txt")
+        self.filepath = os.path.abspath(filepath) if filepath else os.path.join(application_path, "studentMarks.txt")
+        # How errors and warnings reach the user: pop-ups in the app, but the server
+        # (and anything else without a window) passes its own function instead
+        self.notify = notify or messagebox_notify
         self.students = [] # This list will hold all my Student objects
+        self.cohort_files = {} # cohort name -> file, only filled in by load_directory()
+        self.default_cohort = "" # Cohort that newly added students go into
+        self.file_versions = {} # file -> version it had when I last read or wrote it
+        self.lock_path = self.filepath + ".lock"
+        self.search_index = StudentSearchIndex()
+        self.stats_index = StudentStatsIndex()
+        self.snapshots = SnapshotStore(os.path.join(os.path.dirname(self.filepath), SNAPSHOT_FOLDER))
+        self._snapshot_changes = None # Changes since the last snapshot (None = not known, see take_snapshot)
         self.load_data()
 
+    def _on_data_changed(self, added=(), removed=(), reset=False):
+        """
+        Called after every change to self.students so the indexes stay up to date.
+        reset=True means the whole list was replaced (e.g. after loading the file).
+        """
+        for index in (self.search_index, self.stats_index):
+            if reset:
+                index.rebuild(self.students)
+                continue
+            for s in removed:
+                index.remove(s)
+            for s in added:
+                index.add(s)
+        self._note_snapshot_changes(added, removed, reset)
+
+    def _note_snapshot_changes(self, added=(), removed=(), reset=False):
+        # Remembering what changed, so the next snapshot only has to look at those records
+        if reset:
+            self._snapshot_changes = None
+        elif self._snapshot_changes is not None:
+            self._snapshot_changes.extend((-1, s) for s in removed)
+            self._snapshot_changes.extend((+1, s) for s in added)
+
+    @without_gc
     def load_data(self):
         """Loads students from the text file."""
         self.students = []
+        self.cohort_files = {} # Back to single-file mode
+        self.default_cohort = ""
+        self.lock_path = self.filepath + ".lock"
+        self.file_versions = {}
+        self._on_data_changed(reset=True)
         
         # Validation: Checking if the file actually exists before trying to read it
         if not os.path.exists(self.filepath):
@@ -131,12 +906,16 @@ class StudentController:
             try:
                 with open(self.filepath, "w") as f:
                     f.write("0\n")
-                messagebox.showwarning("File Missing", 
-                    f"Could not find 'studentMarks.txt'.\n\nI have created a new empty file for you.")
+                self.file_versions[self.filepath] = file_version(self.filepath)
+                self.notify("warning", "File Missing",
+                    f"Could not find '{os.path.basename(self.filepath)}'.\n\nI have created a new empty file for you.")
             except IOError:
-                messagebox.showerror("IO Error", "Could not create data file.")
+                self.notify("error", "IO Error", "Could not create data file.")
             return
 
+        # Checking the version before reading, so a save that happens while I read
+        # just means one extra reload later instead of a lost update
+        self.file_versions[self.filepath] = file_version(self.filepath)
         try:
             # Using 'with open' is safer because it automatically closes the file
             with open(self.filepath, "r") as file:
@@ -155,53 +934,404 @@ class StudentController:
                         self.students.append(s)
                         
         except Exception as e:
-            messagebox.showerror("Load Error", f"Failed to load data: {e}")
+            self.notify("error", "Load Error", f"Failed to load data: {e}")
+        self._on_data_changed(reset=True)
+
+    def save_data(self, cohorts=None):
+        """
+        Saves current student list back to the text file.
+        After load_directory() every cohort is saved back to its own file instead;
+        cohorts can name the ones that changed so the others aren't rewritten.
+        Changes should go through _save_change(), which holds the lock while this runs.
+        """
+        if self.cohort_files:
+            groups = self.get_students_by_cohort()
+            for cohort in (self.cohort_files if cohorts is None else cohorts):
+                if cohort in self.cohort_files:
+                    self._write_file(self.cohort_files[cohort], groups.get(cohort, []))
+        else:
+            self._write_file(self.filepath, self.students)
+        self.take_snapshot()
 
-    def save_data(self):
-        """Saves current student list back to the text file."""
+    def take_snapshot(self):
+        """Adds the current students to the history (see SnapshotStore)."""
+        changes, self._snapshot_changes = self._snapshot_changes, []
         try:
-            with open(self.filepath, "w") as file:
-                # First line is the total number of students
-                file.write(f"{len(self.students)}\n")
-                # Then I loop through every student and write their CSV string
-                for s in self.students:
-                    file.write(s.to_csv_string())
+            if changes is None:
+                # Just loaded, so the whole list is compared with the last snapshot once
+                return self.snapshots.save_all(self.students, self.stats_index.total("total"),
+                                               self.get_grade_distribution())
+            return self.snapshots.save_changes(changes, self.stats_index.total("total"),
+                                               self.get_grade_distribution())
+        except OSError:
+            self._snapshot_changes = None # Starting over from the full list next time
+            return None # The history is an extra, so a failed snapshot never stops a save
+
+    def get_snapshots(self):
+        return self.snapshots.list_snapshots()
+
+    def compare_snapshots(self, old_name, new_name):
+        return self.snapshots.diff(old_name, new_name)
+
+    def get_trend(self):
+        """(time, number of students, average percentage) for every snapshot, oldest first."""
+        return [(h["time"], h["count"], h["total"] / h["count"] / 160 * 100 if h["count"] else 0.0)
+                for h in self.get_snapshots()]
+
+    def _write_file(self, path, students):
+        try:
+            # First line is the total number of students, then every student's CSV string
+            write_atomic(path, [f"{len(students)}\n"] + [s.to_csv_string() for s in students])
+            self.file_versions[path] = file_version(path)
         except Exception as e:
-            messagebox.showerror("Save Error", f"Failed to save data: {e}")
+            self.notify("error", "Save Error", f"Failed to save data: {e}")
+
+    def _data_files(self):
+        return list(self.cohort_files.values()) if self.cohort_files else [self.filepath]
+
+    @without_gc
+    def _refresh_stale(self):
+        """
+        Reloads every data file that someone else saved since I last read it.
+        Returns True if anything was reloaded.
+        """
+        stale = [path for path in self._data_files() if file_version(path) != self.file_versions.get(path)]
+        if not stale:
+            return False
+        cohort_of = {path: cohort for cohort, path in self.cohort_files.items()}
+        reloaded = {cohort_of.get(path, "") for path in stale}
+        students = [s for s in self.students if s.cohort not in reloaded]
+        for path in stale:
+            self.file_versions[path] = file_version(path)
+            if os.path.exists(path):
+                _, rows, _ = read_cohort_file(path)
+                students.extend(Student(*row, cohort=cohort_of.get(path, "")) for row in rows)
+        self.students = students
+        self._on_data_changed(reset=True)
+        return True
+
+    def _save_change(self, change):
+        """
+        Makes one change and saves it without overwriting anyone else's work:
+        while holding the lock, any files changed by another user are reloaded first,
+        then change() is applied to the fresh data and the result is saved.
+        change() returns (ok, message, cohorts it touched).
+        """
+        try:
+            with FileLock(self.lock_path):
+                refreshed = self._refresh_stale()
+                try:
+                    ok, msg, cohorts = change()
+                    if ok:
+                        self.save_data(cohorts)
+                except Exception:
+                    # Whatever the change did in memory may never have reached the file,
+                    # so going back to exactly what the files hold before passing it on
+                    self.file_versions = {}
+                    self._refresh_stale()
+                    raise
+        except TimeoutError as e:
+            self.notify("error", "File Busy", f"Could not save, the data file is busy: {e}")
+            return False, "The data file is busy, please try again."
+        if ok and refreshed:
+            msg += "\n\n(Changes saved by another user were loaded first.)"
+        return ok, msg
+
+    @without_gc
+    def load_directory(self, folder, workers=None):
+        """
+        Opens every .txt/.csv file in a folder as a separate cohort (named after the
+        file) and merges them into one list. The files are read at the same time in a
+        process pool. Returns (number of cohorts, number of lines skipped).
+        """
+        versions, results = self._read_cohort_folder(folder, workers)
+        if not results:
+            return 0, 0 # Nothing to open, so the current data stays as it is
+        students = []
+        cohort_files = {}
+        skipped = 0
+        for path, cohort, rows, bad in results:
+            cohort_files[cohort] = path
+            students.extend(Student(*row, cohort=cohort) for row in rows)
+            skipped += bad
+
+        self.students = students
+        self.cohort_files = cohort_files
+        self.default_cohort = next(iter(cohort_files), "")
+        self.file_versions = versions
+        self.lock_path = os.path.join(folder, "cohorts.lock")
+        self.snapshots = SnapshotStore(os.path.join(folder, SNAPSHOT_FOLDER)) # Each folder has its own history
+        self._on_data_changed(reset=True)
+        return len(cohort_files), skipped
+
+    def _read_cohort_folder(self, folder, workers=None):
+        """
+        Reads every cohort file in the folder, in a process pool when there are several.
+        Returns (file versions, [(path, cohort, rows, lines skipped), ...]).
+        Raises ValueError if two files would be the same cohort (e.g. year1.txt and
+        year1.csv) or a student code appears more than once, since either would mean
+        edits going to the wrong student or file.
+        """
+        paths = sorted(os.path.join(folder, name) for name in os.listdir(folder)
+                       if name.lower().endswith(COHORT_FILE_TYPES) and os.path.isfile(os.path.join(folder, name)))
+        names = {}
+        for path in paths:
+            names.setdefault(os.path.splitext(os.path.basename(path))[0], []).append(os.path.basename(path))
+        clashes = [" and ".join(files) for files in names.values() if len(files) > 1]
+        if clashes:
+            raise ValueError("These files would be the same cohort, please rename one of them: " + "; ".join(clashes))
+
+        versions = {path: file_version(path) for path in paths} # Taken before reading (see load_data)
+        if workers == 0 or len(paths) < 2:
+            results = map(read_cohort_file, paths)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(read_cohort_file, paths))
+        results = [(path, os.path.splitext(os.path.basename(path))[0], rows, bad) for path, rows, bad in results]
+
+        seen = {}
+        duplicates = []
+        for path, cohort, rows, _ in results:
+            for row in rows:
+                if row[0] in seen:
+                    duplicates.append(f"{row[0]} ({seen[row[0]]} and {cohort})")
+                else:
+                    seen[row[0]] = cohort
+        if duplicates:
+            more = f" and {len(duplicates) - 10} more" if len(duplicates) > 10 else ""
+            raise ValueError("Student codes used more than once: " + ", ".join(duplicates[:10]) + more)
+        return versions, results
+
+    def export_text(self, path, cohort=None):
+        """Writes the students (or one cohort) in the studentMarks.txt format. Returns how many."""
+        students = self.get_students(cohort)
+        write_atomic(path, [f"{len(students)}\n"] + [s.to_csv_string() for s in students])
+        return len(students)
+
+    def count_students(self):
+        return len(self.students)
+
+    def get_cohorts(self):
+        return list(self.cohort_files)
+
+    def get_students(self, cohort=None):
+        """All students, or only the ones in one cohort."""
+        if not cohort:
+            return self.students
+        return [s for s in self.students if s.cohort == cohort]
+
+    def iter_students(self, cohort=None):
+        """Like get_students(), but one at a time (the database version streams them)."""
+        return iter(self.get_students(cohort))
+
+    def get_top_students(self, n, column="total", lowest=False, cohort=None):
+        """
+        The n best (or worst) students by total, percentage or one component, best first
+        (worst first with lowest=True). The stats index keeps every column sorted already,
+        so this is just a slice off one end. A single cohort isn't indexed separately, so
+        for that heapq picks them out while only ever holding n students.
+        Equal marks are listed in code order (the same as the SQLite version).
+        """
+        name, _ = self._stat_column(column)
+        n = max(n, 0)
+        sign = 1 if lowest else -1
+        if cohort:
+            return heapq.nsmallest(n, self.get_students(cohort),
+                                   key=lambda s: (sign * column_value(s, name), s.code))
+        entries = self.stats_index.column(name)
+        chosen = entries[:n] if lowest else entries[max(len(entries) - n, 0):]
+        if not chosen:
+            return []
+        # The index breaks ties by insertion order, so the students sharing the mark at
+        # the cut are all fetched and the first ones by code are kept
+        edge = chosen[-1][0] if lowest else chosen[0][0]
+        start = bisect.bisect_left(entries, edge, key=lambda e: e[0])
+        end = bisect.bisect_right(entries, edge, key=lambda e: e[0])
+        inside = [e for e in chosen if e[0] != edge]
+        tied = heapq.nsmallest(n - len(inside), entries[start:end], key=lambda e: e[2].code)
+        return [s for _, _, s in sorted(inside + tied, key=lambda e: (sign * e[0], e[2].code))]
+
+    def get_students_by_cohort(self):
+        groups = {}
+        for s in self.students:
+            groups.setdefault(s.cohort, []).append(s)
+        return groups
+
+    def get_cohort_summaries(self):
+        """Number of students and average percentage for every cohort, in one pass."""
+        if not self.cohort_files:
+            return {} # Just the one file, so there is nothing to compare
+        totals = {cohort: [0, 0] for cohort in self.cohort_files}
+        for s in self.students:
+            entry = totals.setdefault(s.cohort, [0, 0])
+            entry[0] += 1
+            entry[1] += s.total_overall
+        return {cohort: {"count": count, "average": (total / count / 160 * 100) if count else 0.0}
+                for cohort, (count, total) in totals.items()}
+
+    # Each change below is written as a small function so _save_change() can run it
+    # again on fresh data if another user saved in the meantime (auto-saves afterwards)
 
     def add_student(self, student_obj):
-        # Validation: Check if the ID already exists
-        for s in self.students:
-            if s.code == student_obj.code:
-                return False, "Student Code already exists."
-        
-        self.students.append(student_obj)
-        self.save_data() # Auto-save after adding
-        return True, "Student added successfully."
+        return self._save_change(self._add_change(student_obj))
 
     def delete_student(self, code):
-        # I use enumerate so I can delete by index
-        for i, s in enumerate(self.students):
-            if s.code == code:
-                del self.students[i]
-                self.save_data()
-                return True
-        return False
-
-    def update_student(self, original_code, new_student_obj):
-        # If the code changed, make sure the NEW code isn't taken by someone else
-        if original_code != new_student_obj.code:
+        return self._save_change(self._delete_change(code))[0]
+
+    def update_student(self, original_code, new_student_obj, expected=None):
+        """
+        expected is the record the edit form was filled from. If someone else saved a
+        different version of that student since, the update is refused instead of
+        quietly overwriting their changes.
+        """
+        return self._save_change(self._update_change(original_code, new_student_obj, expected))
+
+    def apply_changes(self, changes):
+        """
+        Runs several changes (from the _..._change methods) with one lock and one save,
+        e.g. a batch of requests to the record server. Returns [(ok, message), ...].
+        """
+        results = []
+        def change():
+            results.clear() # In case it runs again after a reload
+            touched = set()
+            for one_change in changes:
+                ok, msg, cohorts = one_change()
+                results.append((ok, msg))
+                if ok:
+                    touched.update(cohorts)
+            return bool(touched), "", list(touched)
+        ok, msg = self._save_change(change)
+        return results if len(results) == len(changes) else [(False, msg)] * len(changes)
+
+    def _add_change(self, student_obj):
+        def change():
+            # Validation: Check if the ID already exists
             for s in self.students:
-                if s.code == new_student_obj.code:
-                    return False, "New Student Code is already taken."
-
-        for i, s in enumerate(self.students):
-            if s.code == original_code:
-                self.students[i] = new_student_obj
-                self.save_data()
-                return True, "Student updated successfully."
-        
-        return False, "Original record not found."
+                if s.code == student_obj.code:
+                    return False, "Student Code already exists.", []
+            
+            if not student_obj.cohort:
+                student_obj.cohort = self.default_cohort
+            self.students.append(student_obj)
+            self._on_data_changed(added=[student_obj])
+            return True, "Student added successfully.", [student_obj.cohort]
+        return change
+
+    def _delete_change(self, code):
+        def change():
+            # I use enumerate so I can delete by index
+            for i, s in enumerate(self.students):
+                if s.code == code:
+                    del self.students[i]
+                    self._on_data_changed(removed=[s])
+                    return True, "Student deleted.", [s.cohort]
+            return False, "Student Code not found.", []
+        return change
+
+    def _update_change(self, original_code, new_student_obj, expected=None):
+        def change():
+            # If the code changed, make sure the NEW code isn't taken by someone else
+            if original_code != new_student_obj.code:
+                for s in self.students:
+                    if s.code == new_student_obj.code:
+                        return False, "New Student Code is already taken.", []
+
+            for i, s in enumerate(self.students):
+                if s.code == original_code:
+                    if expected is not None and record_text(s) != record_text(expected):
+                        return False, EDITED_ELSEWHERE, []
+                    if not new_student_obj.cohort:
+                        new_student_obj.cohort = s.cohort # Staying in the same class
+                    self.students[i] = new_student_obj
+                    self._on_data_changed(added=[new_student_obj], removed=[s])
+                    return True, "Student updated successfully.", [s.cohort, new_student_obj.cohort]
+            
+            return False, "Original record not found.", []
+        return change
+
+    @without_gc
+    def import_csv(self, path, workers=None, chunk_size=IMPORT_CHUNK_SIZE):
+        """
+        Adds every valid student from a CSV file (code,name,cw1,cw2,cw3,exam per line).
+        A header row, or a first line holding only the student count (like studentMarks.txt),
+        is skipped. The file is read in chunks that are validated in worker processes
+        (workers=0 validates here instead), and everything accepted is saved in one go.
+        Returns (number added, [(line number, reason), ...] for the rejected rows).
+        """
+        taken = self._existing_codes()
+        added = []
+        rejects = []
+
+        def chunks(reader):
+            rows = []
+            for fields in reader:
+                line_no = reader.line_num
+                if not any(field.strip() for field in fields):
+                    continue # Blank lines are simply skipped
+                if line_no == 1 and (len(fields) == 1 or not fields[0].strip().isdigit()):
+                    continue # Header row or student count
+                rows.append((line_no, fields))
+                if len(rows) == chunk_size:
+                    yield rows
+                    rows = []
+            if rows:
+                yield rows
+
+        def accept(results):
+            # Duplicate codes are checked here, in file order, so the result never
+            # depends on which worker finished first
+            for line_no, fields, error in results:
+                if error:
+                    rejects.append((line_no, error))
+                elif fields[0] in taken:
+                    rejects.append((line_no, "Student Code already exists."))
+                else:
+                    taken.add(fields[0])
+                    added.append((line_no, Student(*fields, cohort=self.default_cohort)))
+
+        with open(path, "r", newline="", encoding="utf-8-sig") as file:
+            reader = csv.reader(file)
+            if workers == 0:
+                for rows in chunks(reader):
+                    accept(validate_rows(rows))
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    waiting = deque()
+                    limit = 2 * (workers or os.cpu_count() or 1) # Chunks allowed in flight at once
+                    for rows in chunks(reader):
+                        waiting.append(pool.submit(validate_rows, rows))
+                        if len(waiting) >= limit:
+                            accept(waiting.popleft().result())
+                    while waiting:
+                        accept(waiting.popleft().result())
+
+        if added:
+            if not self._save_change(self._import_change(added, rejects))[0]:
+                added = [] # Nothing was saved (all duplicates now, or the file was busy)
+            rejects.sort()
+        return len(added), rejects
+
+    def _existing_codes(self):
+        return {s.code for s in self.students}
+
+    def _import_change(self, added, rejects):
+        """
+        Adds the accepted (line number, Student) pairs; any code taken by now is
+        rejected instead. added is left holding just the students really added.
+        """
+        def change():
+            # The codes are checked again here in case another user added some meanwhile
+            current = self._existing_codes()
+            for line_no, s in added:
+                if s.code in current:
+                    rejects.append((line_no, "Student Code already exists."))
+            fresh = [s for _, s in added if s.code not in current]
+            self.students.extend(fresh)
+            self._on_data_changed(added=fresh)
+            added[:] = fresh
+            return bool(fresh), "", [self.default_cohort] # One write for the whole import
+        return change
 
     def get_student_by_code(self, code):
         for s in self.students:
@@ -209,14 +1339,17 @@ class StudentController:
                 return s
         return None
 
+    def search_students(self, text, limit=20):
+        """Matches code prefixes and parts of names (see StudentSearchIndex.search)."""
+        return self.search_index.search(text, limit)
+
     def get_highest_scorer(self):
-        if not self.students: return None
-        # Using the max() function with a key is much faster than writing a loop myself
-        return max(self.students, key=lambda s: s.total_overall)
+        top = self.get_top_students(1)
+        return top[0] if top else None
 
     def get_lowest_scorer(self):
-        if not self.students: return None
-        return min(self.students, key=lambda s: s.total_overall)
+        bottom = self.get_top_students(1, lowest=True)
+        return bottom[0] if bottom else None
 
     def sort_students(self, key, reverse=False):
         # Sorting logic based on what the user selected in the dropdown
@@ -229,8 +1362,887 @@ class StudentController:
 
     def get_average_percentage(self):
         if not self.students: return 0.0
-        total = sum(s.percentage for s in self.students)
-        return total / len(self.students)
+        # The running total kept by the stats index saves adding everyone up again
+        return self.stats_index.mean("total") / 160 * 100
+
+    # --- Statistics (all served from the sorted columns of self.stats_index) ---
+    # column can be "cw1", "cw2", "cw3", "coursework", "exam", "total" or "percentage".
+
+    def _stat_column(self, column):
+        """Percentages are worked out from the total, so returns (column, scale)."""
+        if column == "percentage":
+            return "total", 100 / 160
+        if column not in STAT_COLUMNS:
+            raise ValueError(f"Unknown column '{column}'.")
+        return column, 1
+
+    def get_median(self, column="percentage"):
+        return self.get_percentile(50, column)
+
+    def get_percentile(self, p, column="percentage"):
+        column, scale = self._stat_column(column)
+        return self.stats_index.percentile(column, p) * scale
+
+    def get_std_dev(self, column="percentage"):
+        column, scale = self._stat_column(column)
+        return self.stats_index.std_dev(column) * scale
+
+    def get_summary(self, column="percentage"):
+        """Count, mean, standard deviation, minimum, quartiles and maximum of one column."""
+        name, scale = self._stat_column(column)
+        index = self.stats_index
+        return {
+            "count": index.count(),
+            "mean": index.mean(name) * scale,
+            "std_dev": index.std_dev(name) * scale,
+            "min": index.percentile(name, 0) * scale,
+            "q1": index.percentile(name, 25) * scale,
+            "median": index.percentile(name, 50) * scale,
+            "q3": index.percentile(name, 75) * scale,
+            "max": index.percentile(name, 100) * scale,
+        }
+
+    def get_component_summaries(self):
+        """get_summary() for each coursework, the exam and the overall percentage."""
+        return {column: self.get_summary(column) for column in ("cw1", "cw2", "cw3", "exam", "percentage")}
+
+    def get_histogram(self, column="percentage", bins=10):
+        """
+        Splits the possible range of a column (e.g. 0-100%) into equal bins and counts
+        the students in each. Returns [(low, high, count), ...].
+        """
+        name, scale = self._stat_column(column)
+        top = STAT_COLUMNS[name] * scale
+        edges = [top * i / bins for i in range(bins + 1)]
+        counts = self.stats_index.histogram(name, [edge / scale for edge in edges])
+        return [(edges[i], edges[i + 1], counts[i]) for i in range(bins)]
+
+    def get_grade_distribution(self):
+        """Number of students with each grade, counted with one binary search per grade boundary."""
+        edges = [low * 160 / 100 for _, low in GRADE_BOUNDARIES] + [160] # Percentages turned into totals
+        counts = self.stats_index.histogram("total", edges)
+        # Listing the best grade first, like the stats page always did
+        return {grade: count for (grade, _), count in reversed(list(zip(GRADE_BOUNDARIES, counts)))}
+
+# =============================================================================
+# SQLITE STORAGE
+# =============================================================================
+# The normal controller keeps every student as a Python object and rewrites the text
+# file on each save. SQLiteStudentController keeps them in an SQLite database instead,
+# so sorting, searching and the statistics become indexed queries and only the rows
+# being shown are ever turned into Student objects. The text format still works for
+# getting data in (import_csv / Open Cohort Folder) and out (export_text).
+STORAGE_ENV = "STUDENT_STORAGE" # Set to "sqlite" to run the app on the database
+DATABASE_FILE = "studentMarks.db"
+DATABASE_SNAPSHOT_SUFFIX = ".snapshots" # History folder next to the database (studentMarks.db.snapshots)
+
+STUDENT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS students (
+    code   TEXT PRIMARY KEY,
+    name   TEXT NOT NULL COLLATE NOCASE,
+    cw1    INTEGER NOT NULL,
+    cw2    INTEGER NOT NULL,
+    cw3    INTEGER NOT NULL,
+    exam   INTEGER NOT NULL,
+    total  INTEGER NOT NULL, -- percentage is total / 160 * 100, so this index sorts both
+    grade  TEXT NOT NULL,
+    cohort TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS students_name ON students(name);
+CREATE INDEX IF NOT EXISTS students_total ON students(total);
+CREATE INDEX IF NOT EXISTS students_grade ON students(grade);
+CREATE INDEX IF NOT EXISTS students_cohort ON students(cohort, total);
+"""
+STUDENT_FIELDS = "code, name, cw1, cw2, cw3, exam, cohort"
+SQL_COLUMNS = {"cw1": "cw1", "cw2": "cw2", "cw3": "cw3", "coursework": "cw1 + cw2 + cw3",
+               "exam": "exam", "total": "total"} # STAT_COLUMNS as SQL expressions
+SQL_ORDERS = {"code": "code", "name": "name", "percentage": "total"}
+
+def student_row(s):
+    return (s.code, s.name, s.coursework[0], s.coursework[1], s.coursework[2], s.exam,
+            s.total_overall, s.grade, s.cohort)
+
+class SQLiteStudentController(StudentController):
+    """
+    Same methods as StudentController, answered with SQL instead of Python lists.
+    SQLite does its own locking and every change is one transaction, so the file
+    locking and version checks of the text controller aren't needed here.
+    """
+    def __init__(self, filepath=None, notify=None, text_path=None):
+        if getattr(sys, 'frozen', False):
+            application_path = os.path.dirname(sys.executable)
+        else:
+            application_path = os.path.dirname(os.path.abspath(__file__))
+
+        self.filepath = os.path.abspath(filepath) if filepath else os.path.join(application_path, DATABASE_FILE)
+        self.notify = notify or messagebox_notify
+        self.cohort_files = {}
+        self.default_cohort = ""
+        self.order = ("code", False) # What get_students() sorts by (see sort_students)
+        # A history of its own, so it never mixes with the text file's snapshots
+        self.snapshots = SnapshotStore(self.filepath + DATABASE_SNAPSHOT_SUFFIX)
+        created = not os.path.exists(self.filepath)
+        # The record server runs requests in a worker thread, one batch at a time
+        self.conn = sqlite3.connect(self.filepath, check_same_thread=False)
+        self.conn.executescript(STUDENT_SCHEMA)
+        # Another copy of the app may have changed the database since the last snapshot,
+        # so the first one reads the whole table. After that only the changed rows are
+        # needed, unless data_version shows that another connection committed something.
+        self._snapshot_changes = None
+        self._data_version = self._scalar("PRAGMA data_version")
+
+        # A new database is filled from the text file with the same name next to it
+        # (studentMarks.db from studentMarks.txt)
+        text_path = text_path or os.path.splitext(self.filepath)[0] + ".txt"
+        if created and os.path.exists(text_path):
+            self.import_csv(text_path, workers=0)
+
+    @property
+    def students(self):
+        # Only for code written for the list-based controller, this loads everyone
+        return self.get_students()
+
+    def _query_students(self, sql, params=()):
+        return [Student(*row) for row in self.conn.execute(f"SELECT {STUDENT_FIELDS} FROM students {sql}", params)]
+
+    def _scalar(self, sql, params=()):
+        return self.conn.execute(sql, params).fetchone()[0]
+
+    # --- Loading and saving ---
+
+    def load_data(self):
+        pass # Nothing to load, every query goes straight to the database
+
+    def save_data(self, cohorts=None):
+        # Changes are committed as they happen, so a save just records the history
+        self.take_snapshot()
+
+    def take_snapshot(self):
+        changes, self._snapshot_changes = self._snapshot_changes, []
+        version = self._scalar("PRAGMA data_version") # Only changes when another connection commits
+        if version != self._data_version:
+            changes = None # Their rows aren't in my list of changes
+            self._data_version = version
+        try:
+            total = self._scalar("SELECT COALESCE(SUM(total), 0) FROM students")
+            if changes is None:
+                students = (Student(*row) for row in self.conn.execute(f"SELECT {STUDENT_FIELDS} FROM students"))
+                return self.snapshots.save_all(students, total, self.get_grade_distribution())
+            return self.snapshots.save_changes(changes, total, self.get_grade_distribution())
+        except OSError:
+            self._snapshot_changes = None
+            return None
+
+    def _on_data_changed(self, added=(), removed=(), reset=False):
+        # There are no indexes to update, the database has its own
+        self._note_snapshot_changes(added, removed, reset)
+
+    def _save_change(self, change):
+        noted = len(self._snapshot_changes) if self._snapshot_changes is not None else None
+        try:
+            with self.conn: # One transaction, rolled back if anything goes wrong
+                ok, msg, _ = change()
+        except sqlite3.Error as e:
+            ok, msg = False, f"Database error: {e}"
+            self.notify("error", "Database Error", f"Could not save: {e}")
+        if not ok and noted is not None and self._snapshot_changes is not None:
+            del self._snapshot_changes[noted:] # Nothing was saved, so those changes never happened
+        if ok:
+            self.save_data()
+        return ok, msg
+
+    def load_directory(self, folder, workers=None):
+        """Imports every cohort file in the folder, replacing what those cohorts held before."""
+        _, results = self._read_cohort_folder(folder, workers)
+        if not results:
+            return 0, 0
+        skipped = 0
+        removed = []
+        added = []
+        with self.conn:
+            for path, cohort, rows, bad in results:
+                # INSERT OR REPLACE may also replace a row of another cohort with the same code
+                codes = [row[0] for row in rows]
+                removed += self._query_students("WHERE cohort = ?", (cohort,))
+                for start in range(0, len(codes), 500): # Staying under SQLite's limit on parameters
+                    batch = codes[start:start + 500]
+                    removed += self._query_students(f"WHERE cohort != ? AND code IN ({', '.join('?' * len(batch))})",
+                                                    [cohort] + batch)
+                students = [Student(*row, cohort=cohort) for row in rows]
+                self.conn.execute("DELETE FROM students WHERE cohort = ?", (cohort,))
+                self.conn.executemany("INSERT OR REPLACE INTO students VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                      (student_row(s) for s in students))
+                added += students
+                skipped += bad
+        self._on_data_changed(added=added, removed=removed)
+        self.default_cohort = results[0][1]
+        self.save_data()
+        return len(results), skipped
+
+    # --- Changes (see StudentController._save_change) ---
+
+    def _add_change(self, student_obj):
+        def change():
+            if not student_obj.cohort:
+                student_obj.cohort = self.default_cohort
+            try:
+                self.conn.execute("INSERT INTO students VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", student_row(student_obj))
+            except sqlite3.IntegrityError:
+                return False, "Student Code already exists.", []
+            self._on_data_changed(added=[student_obj])
+            return True, "Student added successfully.", [student_obj.cohort]
+        return change
+
+    def _delete_change(self, code):
+        def change():
+            old = self.get_student_by_code(code)
+            if not old:
+                return False, "Student Code not found.", []
+            self.conn.execute("DELETE FROM students WHERE code = ?", (old.code,))
+            self._on_data_changed(removed=[old])
+            return True, "Student deleted.", [old.cohort]
+        return change
+
+    def _update_change(self, original_code, new_student_obj, expected=None):
+        def change():
+            if original_code != new_student_obj.code and self.get_student_by_code(new_student_obj.code):
+                return False, "New Student Code is already taken.", []
+            old = self.get_student_by_code(original_code)
+            if not old:
+                return False, "Original record not found.", []
+            if expected is not None and record_text(old) != record_text(expected):
+                return False, EDITED_ELSEWHERE, []
+            if not new_student_obj.cohort:
+                new_student_obj.cohort = old.cohort # Staying in the same class
+            self.conn.execute("UPDATE students SET code = ?, name = ?, cw1 = ?, cw2 = ?, cw3 = ?, exam = ?, "
+                              "total = ?, grade = ?, cohort = ? WHERE code = ?",
+                              student_row(new_student_obj) + (original_code,))
+            self._on_data_changed(added=[new_student_obj], removed=[old])
+            return True, "Student updated successfully.", [old.cohort, new_student_obj.cohort]
+        return change
+
+    def _existing_codes(self):
+        return {row[0] for row in self.conn.execute("SELECT code FROM students")}
+
+    def _import_change(self, added, rejects):
+        def change():
+            fresh = []
+            for line_no, s in added:
+                if self.conn.execute("INSERT OR IGNORE INTO students VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                     student_row(s)).rowcount:
+                    fresh.append(s)
+                else:
+                    rejects.append((line_no, "Student Code already exists."))
+            added[:] = fresh
+            self._on_data_changed(added=fresh)
+            return bool(fresh), "", [self.default_cohort]
+        return change
+
+    # --- Lookups ---
+
+    def count_students(self):
+        return self._scalar("SELECT COUNT(*) FROM students")
+
+    def get_students(self, cohort=None):
+        return list(self.iter_students(cohort))
+
+    def iter_students(self, cohort=None):
+        column, reverse = self.order
+        order = f"ORDER BY {SQL_ORDERS[column]} {'DESC' if reverse else 'ASC'}, code"
+        where, params = ("WHERE cohort = ?", (cohort,)) if cohort else ("", ())
+        for row in self.conn.execute(f"SELECT {STUDENT_FIELDS} FROM students {where} {order}", params):
+            yield Student(*row)
+
+    def get_students_by_cohort(self):
+        groups = {}
+        for s in self.get_students():
+            groups.setdefault(s.cohort, []).append(s)
+        return groups
+
+    def get_cohorts(self):
+        return [row[0] for row in self.conn.execute("SELECT DISTINCT cohort FROM students WHERE cohort != '' ORDER BY cohort")]
+
+    def get_cohort_summaries(self):
+        rows = self.conn.execute("SELECT cohort, COUNT(*), AVG(total) FROM students WHERE cohort != '' "
+                                 "GROUP BY cohort ORDER BY cohort")
+        return {cohort: {"count": count, "average": average / 160 * 100} for cohort, count, average in rows}
+
+    def get_student_by_code(self, code):
+        found = self._query_students("WHERE code = ?", (str(code).strip(),))
+        return found[0] if found else None
+
+    def search_students(self, text, limit=20):
+        """
+        Same order of results as StudentSearchIndex: code prefixes, then names starting
+        with the text (both use an index), then any word of the name, then anywhere.
+        """
+        text = text.strip()
+        if not text:
+            return []
+        like = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        passes = [("code >= ? AND code < ?", (text, text + "\U0010ffff")),
+                  ("name LIKE ? ESCAPE '\\'", (like + "%",)),
+                  ("name LIKE ? ESCAPE '\\'", ("% " + like + "%",)),
+                  ("name LIKE ? ESCAPE '\\'", ("%" + like + "%",))]
+        found = {}
+        for where, params in passes:
+            for s in self._query_students(f"WHERE {where} LIMIT ?", params + (limit + len(found),)):
+                found.setdefault(s.code, s)
+                if len(found) == limit:
+                    return list(found.values())
+        return list(found.values())
+
+    def get_top_students(self, n, column="total", lowest=False, cohort=None):
+        name, _ = self._stat_column(column)
+        # ORDER BY total ... LIMIT n walks the total index from one end (so does the
+        # cohort index for one cohort), only sorting equal totals by code.
+        # The other columns need SQLite to sort them.
+        order = f"ORDER BY {SQL_COLUMNS[name]} {'ASC' if lowest else 'DESC'}, code LIMIT ?"
+        if cohort:
+            return self._query_students(f"WHERE cohort = ? {order}", (cohort, max(n, 0)))
+        return self._query_students(order, (max(n, 0),))
+
+    def sort_students(self, key, reverse=False):
+        # Nothing is moved around, the order is just used by the next get_students()
+        if key in SQL_ORDERS:
+            self.order = (key, reverse)
+
+    # --- Statistics ---
+
+    def get_average_percentage(self):
+        return (self._scalar("SELECT AVG(total) FROM students") or 0) / 160 * 100
+
+    def get_percentile(self, p, column="percentage"):
+        name, scale = self._stat_column(column)
+        count = self.count_students()
+        if not count:
+            return 0.0
+        position = (count - 1) * min(max(p, 0), 100) / 100
+        below = int(position)
+        expr = SQL_COLUMNS[name]
+        values = [row[0] for row in self.conn.execute(
+            f"SELECT {expr} AS value FROM students ORDER BY value LIMIT 2 OFFSET ?", (below,))]
+        above = values[-1] if position > below else values[0]
+        return (values[0] + (above - values[0]) * (position - below)) * scale
+
+    def get_std_dev(self, column="percentage"):
+        name, scale = self._stat_column(column)
+        expr = SQL_COLUMNS[name]
+        count, total, squares = self.conn.execute(
+            f"SELECT COUNT(*), SUM({expr}), SUM(({expr}) * ({expr})) FROM students").fetchone()
+        if not count:
+            return 0.0
+        return max((squares - total * total / count) / count, 0.0) ** 0.5 * scale
+
+    def get_summary(self, column="percentage"):
+        name, scale = self._stat_column(column)
+        count = self.count_students()
+        mean = (self._scalar(f"SELECT AVG({SQL_COLUMNS[name]}) FROM students") or 0) * scale
+        summary = {"count": count, "mean": mean, "std_dev": self.get_std_dev(column)}
+        for key, p in (("min", 0), ("q1", 25), ("median", 50), ("q3", 75), ("max", 100)):
+            summary[key] = self.get_percentile(p, column)
+        return summary
+
+    def get_histogram(self, column="percentage", bins=10):
+        name, scale = self._stat_column(column)
+        expr = SQL_COLUMNS[name]
+        top = STAT_COLUMNS[name] * scale
+        edges = [top * i / bins for i in range(bins + 1)]
+        below = [self._scalar(f"SELECT COUNT(*) FROM students WHERE {expr} < ?", (edge / scale,)) for edge in edges[:-1]]
+        below.append(self.count_students()) # The last bin includes its top edge
+        return [(edges[i], edges[i + 1], below[i + 1] - below[i]) for i in range(bins)]
+
+    def get_grade_distribution(self):
+        counts = dict(self.conn.execute("SELECT grade, COUNT(*) FROM students GROUP BY grade"))
+        return {grade: counts.get(grade, 0) for grade, _ in reversed(GRADE_BOUNDARIES)}
+
+def make_controller(filepath=None, notify=None, storage=None, server=None):
+    """
+    The text-file controller, or the SQLite one when STUDENT_STORAGE=sqlite, or a
+    RemoteStudentController when a record server address is given (or STUDENT_SERVER is set).
+    """
+    if server is None:
+        server = os.environ.get(SERVER_ENV)
+    if server:
+        return RemoteStudentController(server, notify)
+    storage = (storage or os.environ.get(STORAGE_ENV, "text")).lower()
+    if storage == "sqlite":
+        return SQLiteStudentController(filepath, notify)
+    return StudentController(filepath, notify)
+
+# =============================================================================
+# RECORD SERVER
+# =============================================================================
+# Optional server mode (python TASK3.py serve): one StudentController loads the file
+# once and answers many clients over localhost (or a Unix socket), instead of every
+# window loading its own copy. Each request and response is one line of JSON:
+#   {"id": 1, "op": "search", "args": {"text": "smi"}}  ->  {"id": 1, "ok": true, "result": [...]}
+# Requests from all clients go into one queue. Whatever has piled up is handled as a
+# batch, so a burst of adds/updates/deletes is saved with one lock and one write.
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+SERVER_BATCH_MAX = 500 # Most requests handled in one go
+SERVER_OPS = {"get", "search", "list", "top", "cohorts", "stats", "call", "add", "update", "delete"}
+MUTATING_OPS = {"add", "update", "delete"}
+# Controller methods a RemoteStudentController can run on the server with the "call" op
+REMOTE_METHODS = {"count_students", "get_cohorts", "get_students", "get_student_by_code", "search_students",
+                  "get_top_students", "get_average_percentage", "get_median", "get_std_dev", "get_summary",
+                  "get_histogram", "get_grade_distribution", "get_cohort_summaries", "get_component_summaries",
+                  "get_snapshots", "compare_snapshots", "get_trend", "import_csv", "load_directory", "export_text"}
+SERVER_ENV = "STUDENT_SERVER" # Set to host:port (or a Unix socket path) to open the app on a record server
+
+def student_to_dict(s):
+    return {"code": s.code, "name": s.name, "cw1": s.coursework[0], "cw2": s.coursework[1],
+            "cw3": s.coursework[2], "exam": s.exam, "cohort": s.cohort,
+            "total": s.total_overall, "percentage": s.percentage, "grade": s.grade}
+
+def student_from_dict(d):
+    """The Student that student_to_dict() made (no checks, it is only compared)."""
+    return Student(d["code"], d["name"], d["cw1"], d["cw2"], d["cw3"], d["exam"], cohort=str(d.get("cohort", "")))
+
+def encode_result(value):
+    """Makes a controller result JSON-friendly, with students as {"__student__": {...}}."""
+    if isinstance(value, Student):
+        return {"__student__": student_to_dict(value)}
+    if isinstance(value, dict):
+        return {key: encode_result(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [encode_result(item) for item in value]
+    return value
+
+def decode_result(value):
+    """The other way round, on the client (tuples come back as lists, which unpack the same)."""
+    if isinstance(value, dict):
+        if "__student__" in value:
+            return student_from_dict(value["__student__"])
+        return {key: decode_result(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [decode_result(item) for item in value]
+    return value
+
+def parse_server_address(text):
+    """'host:port', ':port' or 'port', or the path of a Unix socket. Returns (host, port, unix_path)."""
+    if os.sep in text or (os.altsep and os.altsep in text) or text.endswith(".sock"):
+        return None, None, text
+    host, _, port = text.rpartition(":")
+    if not port.isdigit():
+        raise ValueError(f"Server address '{text}' should look like host:port.")
+    return host or SERVER_HOST, int(port), None
+
+def student_from_args(args, cohorts):
+    """
+    Builds a Student from request fields with the same checks as the form.
+    cohorts are the ones currently open. A cohort is only taken from the request when
+    a cohort folder is open, and then it has to be one of them.
+    """
+    student, error = validate_student_fields(args.get("code", ""), args.get("name", ""), args.get("cw1", ""),
+                                             args.get("cw2", ""), args.get("cw3", ""), args.get("exam", ""))
+    if error:
+        raise ValueError(error)
+    cohort = args.get("cohort", "")
+    if not isinstance(cohort, str):
+        raise ValueError("cohort must be a string.")
+    if cohort and cohorts:
+        if cohort not in cohorts:
+            raise ValueError(f"Unknown cohort '{cohort}'.")
+        student.cohort = cohort
+    return student
+
+class RecordServer:
+    def __init__(self, controller):
+        self.controller = controller
+        self.queue = None # Made in serve(), it has to belong to the running event loop
+
+    async def serve(self, host=SERVER_HOST, port=SERVER_PORT, unix_path=None):
+        self.queue = asyncio.Queue()
+        if unix_path:
+            server = await asyncio.start_unix_server(self._handle_client, path=unix_path)
+        else:
+            server = await asyncio.start_server(self._handle_client, host, port)
+        dispatcher = asyncio.create_task(self._dispatch())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            dispatcher.cancel()
+
+    async def _handle_client(self, reader, writer):
+        pending = set()
+        async def answer(request):
+            future = asyncio.get_running_loop().create_future()
+            await self.queue.put((request, future))
+            response = await future
+            writer.write((json.dumps(response) + "\n").encode("utf-8"))
+            await writer.drain()
+        try:
+            # Clients may send many requests without waiting, so each one gets its own task
+            # and the answers carry the request id (they can come back in any order)
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError:
+                    request = {"op": None}
+                task = asyncio.create_task(answer(request))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        except ConnectionError:
+            pass # Client went away
+        finally:
+            writer.close()
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < SERVER_BATCH_MAX and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            # The controller does file I/O, so the batch runs in a thread (one batch at a time)
+            requests = [request for request, _ in batch]
+            try:
+                responses = await loop.run_in_executor(None, self.handle_batch, requests)
+            except Exception as e:
+                # Every waiting client still gets an answer, and the server keeps going
+                responses = [self._response(request, False, error=f"Server error: {e}") for request in requests]
+            for (_, future), response in zip(batch, responses):
+                if not future.done():
+                    future.set_result(response)
+
+    def handle_batch(self, requests):
+        """
+        Answers a list of requests in order. Runs of consecutive mutations are applied
+        together with StudentController.apply_changes(), so they share one save.
+        """
+        responses = [None] * len(requests)
+        changes = [] # (position, change) waiting to be saved together
+        def flush():
+            try:
+                results = self.controller.apply_changes([change for _, change in changes])
+            except Exception as e:
+                # A bug in one change must not take the rest of the batch (or the server) down
+                results = [(False, f"Server error: {e}")] * len(changes)
+            for (i, _), (ok, msg) in zip(changes, results):
+                responses[i] = self._response(requests[i], ok, msg if ok else None, None if ok else msg)
+            changes.clear()
+
+        for i, request in enumerate(requests):
+            op = request.get("op") if isinstance(request, dict) else None
+            args = (request.get("args") or {}) if isinstance(request, dict) else {}
+            try:
+                if op not in SERVER_OPS:
+                    raise ValueError(f"Unknown op '{op}'.")
+                if op in MUTATING_OPS:
+                    changes.append((i, self._change(op, args)))
+                    continue
+                if changes:
+                    flush() # Reads must see the changes sent before them
+                responses[i] = self._response(request, True, self._read(op, args))
+            except (ValueError, TypeError, KeyError, AttributeError) as e:
+                responses[i] = self._response(request, False, error=str(e))
+        if changes:
+            flush()
+        return responses
+
+    def _response(self, request, ok, result=None, error=None):
+        response = {"id": request.get("id") if isinstance(request, dict) else None, "ok": ok}
+        if ok:
+            response["result"] = result
+        else:
+            response["error"] = error
+        return response
+
+    def _change(self, op, args):
+        c = self.controller
+        if op == "add":
+            return c._add_change(student_from_args(args, c.get_cohorts()))
+        if op == "update":
+            expected = student_from_dict(args["expected"]) if args.get("expected") else None
+            return c._update_change(str(args["code"]), student_from_args(args["student"], c.get_cohorts()), expected)
+        return c._delete_change(str(args["code"]))
+
+    def _read(self, op, args):
+        c = self.controller
+        if op == "get":
+            s = c.get_student_by_code(args["code"])
+            return student_to_dict(s) if s else None
+        if op == "search":
+            return [student_to_dict(s) for s in c.search_students(args.get("text", ""), int(args.get("limit", 20)))]
+        if op == "top":
+            return [student_to_dict(s) for s in c.get_top_students(int(args.get("n", 10)), args.get("column", "total"),
+                                                                   bool(args.get("lowest")), args.get("cohort"))]
+        if op == "cohorts":
+            return c.get_cohorts()
+        if op == "call":
+            method = args.get("method")
+            if method not in REMOTE_METHODS:
+                raise ValueError(f"Unknown method '{method}'.")
+            return encode_result(getattr(c, method)(*args.get("args", []), **args.get("kwargs", {})))
+        if op == "stats":
+            return {"summary": c.get_summary(args.get("column", "percentage")),
+                    "grades": c.get_grade_distribution()}
+        # "list": one page of students, optionally from one cohort and sorted
+        students = c.get_students(args.get("cohort"))
+        sort = args.get("sort")
+        if sort:
+            keys = {"code": lambda s: s.code, "name": lambda s: s.name.lower(), "percentage": lambda s: s.total_overall}
+            students = sorted(students, key=keys[sort], reverse=bool(args.get("reverse")))
+        offset = int(args.get("offset", 0))
+        limit = int(args.get("limit", 100))
+        return [student_to_dict(s) for s in students[offset:offset + limit]]
+
+class RecordClient:
+    """
+    Simple blocking client for RecordServer:
+        client = RecordClient()
+        client.call("get", code="1234")
+        client.call_many([("get", {"code": "1234"}), ("delete", {"code": "5678"})])
+    """
+    def __init__(self, host=SERVER_HOST, port=SERVER_PORT, unix_path=None):
+        if unix_path:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(unix_path)
+        else:
+            self.sock = socket.create_connection((host, port))
+        self.file = self.sock.makefile("rwb")
+        self.next_id = 0
+
+    def call(self, op, **args):
+        (ok, value), = self.call_many([(op, args)])
+        if not ok:
+            raise RuntimeError(value)
+        return value
+
+    def call_many(self, requests):
+        """
+        Sends all the (op, args) requests before reading any answer, so the server can
+        batch them. Returns [(ok, result or error message), ...] in the same order.
+        """
+        ids = []
+        for op, args in requests:
+            self.next_id += 1
+            ids.append(self.next_id)
+            self.file.write((json.dumps({"id": self.next_id, "op": op, "args": args}) + "\n").encode("utf-8"))
+        self.file.flush()
+        answers = {}
+        while len(answers) < len(ids):
+            line = self.file.readline()
+            if not line:
+                raise ConnectionError("The record server closed the connection.")
+            response = json.loads(line)
+            answers[response["id"]] = (response["ok"], response.get("result") if response["ok"] else response.get("error"))
+        return [answers[i] for i in ids]
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+class RemoteStudentController:
+    """
+    The controller methods the window and the command line use, answered by a
+    RecordServer. The server has the file loaded once, so a window opened this way
+    doesn't have to read it again. Reads in REMOTE_METHODS are run on the server as
+    they are; changes go through the batched add/update/delete requests.
+    """
+    def __init__(self, address, notify=None):
+        self.client = RecordClient(*parse_server_address(address))
+        self.filepath = address
+        self.notify = notify or messagebox_notify
+        self.order = ("code", False) # Kept here, so sorting one window doesn't sort the others
+
+    def __getattr__(self, name):
+        if name in REMOTE_METHODS:
+            return lambda *args, **kwargs: self._call(name, *args, **kwargs)
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def _call(self, method, *args, **kwargs):
+        return decode_result(self.client.call("call", method=method, args=list(args), kwargs=kwargs))
+
+    def _change(self, op, **args):
+        try:
+            (ok, msg), = self.client.call_many([(op, args)])
+        except OSError as e:
+            self.notify("error", "Server Error", f"Could not reach the record server: {e}")
+            return False, "The record server is not answering."
+        return ok, msg
+
+    # --- Same as StudentController ---
+
+    def get_students(self, cohort=None):
+        key, reverse = self.order
+        keys = {"code": lambda s: s.code, "name": lambda s: s.name.lower(), "percentage": lambda s: s.percentage}
+        return sorted(self._call("get_students", cohort), key=keys[key], reverse=reverse)
+
+    def iter_students(self, cohort=None):
+        return iter(self.get_students(cohort))
+
+    def sort_students(self, key, reverse=False):
+        if key in ("code", "name", "percentage"):
+            self.order = (key, reverse)
+
+    def add_student(self, student_obj):
+        return self._change("add", **student_to_dict(student_obj))
+
+    def delete_student(self, code):
+        return self._change("delete", code=code)[0]
+
+    def update_student(self, original_code, new_student_obj, expected=None):
+        return self._change("update", code=original_code, student=student_to_dict(new_student_obj),
+                            expected=student_to_dict(expected) if expected else None)
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+# Everything the window does, for scripts and nightly reports. No window is opened, so
+# it runs fine on a server without a display:
+#   python TASK3.py list --sort percentage --reverse --format csv > ranking.csv
+#   python TASK3.py find smith
+#   python TASK3.py top 10 --by exam
+#   python TASK3.py stats --column exam
+#   python TASK3.py import new_students.csv
+#   python TASK3.py export backup.txt --cohort year1
+#   python TASK3.py serve --port 8765
+#   python TASK3.py top 10 --server 127.0.0.1:8765   (asks a running server instead of loading the file)
+#   python TASK3.py gui --server 127.0.0.1:8765      (opens the window on a running server)
+# Students are written out one at a time, so a big roster starts printing straight away.
+OUTPUT_FIELDS = ["code", "name", "cw1", "cw2", "cw3", "exam", "total", "percentage", "grade", "cohort"]
+OUTPUT_FORMATS = ["table", "csv", "json"]
+RANK_COLUMNS = ["total", "percentage", "coursework", "cw1", "cw2", "cw3", "exam"]
+
+def print_notify(level, title, message):
+    # Without a window the controller's warnings just go to the console
+    print(f"[{level}] {title}: {message}", file=sys.stderr)
+
+def write_students(students, fmt, out):
+    """Streams students to out as an aligned table, CSV or JSON lines. Returns how many."""
+    count = 0
+    if fmt == "csv":
+        writer = csv.writer(out)
+        writer.writerow(OUTPUT_FIELDS)
+    elif fmt == "table":
+        out.write(f"{'Code':<6} {'Name':<28} {'CW1':>4} {'CW2':>4} {'CW3':>4} {'Exam':>5} {'Total':>6} {'%':>7} {'Grade':>5}  Cohort\n")
+    for s in students:
+        if fmt == "csv":
+            writer.writerow([s.code, s.name, *s.coursework, s.exam, s.total_overall, f"{s.percentage:.2f}", s.grade, s.cohort])
+        elif fmt == "json":
+            out.write(json.dumps(student_to_dict(s)) + "\n")
+        else:
+            out.write(f"{s.code:<6} {s.name:<28.28} {s.coursework[0]:>4} {s.coursework[1]:>4} {s.coursework[2]:>4} "
+                      f"{s.exam:>5} {s.total_overall:>6} {s.percentage:>6.2f}% {s.grade:>5}  {s.cohort}\n")
+        count += 1
+    return count
+
+def print_stats(controller, column, bins, out):
+    summary = controller.get_summary(column)
+    out.write(f"Students: {summary['count']}\n")
+    out.write(f"{column}: " + "  ".join(f"{key} {summary[key]:.2f}" for key in
+                                        ("mean", "std_dev", "min", "q1", "median", "q3", "max")) + "\n\n")
+    out.write("Grades: " + "  ".join(f"{g}: {c}" for g, c in controller.get_grade_distribution().items()) + "\n\n")
+    histogram = controller.get_histogram(column, bins)
+    tallest = max((c for _, _, c in histogram), default=0) or 1
+    for low, high, c in histogram:
+        out.write(f"{low:6.1f} - {high:6.1f} {c:>7}  {'#' * round(40 * c / tallest)}\n")
+    cohorts = controller.get_cohort_summaries()
+    if cohorts:
+        out.write("\nCohorts:\n")
+        for cohort, info in cohorts.items():
+            out.write(f"  {cohort:<20} {info['count']:>7} students  {info['average']:6.2f}%\n")
+
+def run_command_line(argv):
+    """Runs one of the commands listed above. Returns the exit code."""
+    if argv and argv[0] == "--serve":
+        argv = ["serve"] + argv[1:] # The older spelling of 'serve'
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--file", help="student marks file or database (default: studentMarks.txt)")
+    common.add_argument("--storage", choices=["text", "sqlite"], help=f"storage engine (default: ${STORAGE_ENV} or text)")
+    common.add_argument("--server", help=f"use a running record server, host:port or socket path (default: ${SERVER_ENV})")
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument("--format", choices=OUTPUT_FORMATS, default="table")
+
+    parser = argparse.ArgumentParser(description="Student Manager - reports and batch operations without the window.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_cmd = commands.add_parser("list", parents=[common, output], help="list students")
+    list_cmd.add_argument("--cohort")
+    list_cmd.add_argument("--sort", choices=["code", "name", "percentage"], default="code")
+    list_cmd.add_argument("--reverse", action="store_true")
+
+    find_cmd = commands.add_parser("find", parents=[common, output], help="find students by code or name")
+    find_cmd.add_argument("text")
+    find_cmd.add_argument("--limit", type=int, default=20)
+
+    for name, what in (("top", "highest"), ("bottom", "lowest")):
+        rank_cmd = commands.add_parser(name, parents=[common, output], help=f"the N {what} scoring students")
+        rank_cmd.add_argument("n", type=int)
+        rank_cmd.add_argument("--by", choices=RANK_COLUMNS, default="total")
+        rank_cmd.add_argument("--cohort")
+
+    stats_cmd = commands.add_parser("stats", parents=[common], help="class statistics")
+    stats_cmd.add_argument("--column", choices=RANK_COLUMNS, default="percentage")
+    stats_cmd.add_argument("--bins", type=int, default=10)
+
+    import_cmd = commands.add_parser("import", parents=[common], help="add students from a CSV or text file")
+    import_cmd.add_argument("path")
+    import_cmd.add_argument("--workers", type=int, help="worker processes (default: one per CPU, 0 = no pool)")
+
+    export_cmd = commands.add_parser("export", parents=[common], help="write students in the studentMarks.txt format")
+    export_cmd.add_argument("path")
+    export_cmd.add_argument("--cohort")
+
+    commands.add_parser("gui", parents=[common], help="open the window (e.g. on a record server)")
+
+    serve_cmd = commands.add_parser("serve", parents=[common], help="host the records for other clients")
+    serve_cmd.add_argument("--host", default=SERVER_HOST)
+    serve_cmd.add_argument("--port", type=int, default=SERVER_PORT)
+    serve_cmd.add_argument("--socket", help="listen on this Unix socket instead of a port")
+
+    args = parser.parse_args(argv)
+    out = sys.stdout
+    try:
+        if args.command == "serve" and args.server:
+            raise ValueError("A server can't be served from another server, leave out --server.")
+        # "" keeps the server itself on the file even when STUDENT_SERVER is set
+        server = "" if args.command == "serve" else args.server
+        controller = make_controller(args.file, notify=print_notify, storage=args.storage, server=server)
+        if args.command == "gui":
+            MainApp(controller).mainloop()
+        elif args.command == "list":
+            controller.sort_students(args.sort, reverse=args.reverse)
+            write_students(controller.iter_students(args.cohort), args.format, out)
+        elif args.command == "find":
+            student = controller.get_student_by_code(args.text)
+            matches = [student] if student else controller.search_students(args.text, args.limit)
+            write_students(matches, args.format, out)
+            return 0 if matches else 1
+        elif args.command in ("top", "bottom"):
+            students = controller.get_top_students(args.n, args.by, lowest=args.command == "bottom", cohort=args.cohort)
+            write_students(students, args.format, out)
+        elif args.command == "stats":
+            print_stats(controller, args.column, max(1, args.bins), out)
+        elif args.command == "import":
+            added, rejects = controller.import_csv(args.path, workers=args.workers)
+            for line_no, reason in rejects:
+                print(f"Line {line_no}: {reason}", file=sys.stderr)
+            print(f"Imported {added} student(s), rejected {len(rejects)}.")
+            return 0 if added else 1 # Nothing saved, so a script can tell it failed
+        elif args.command == "export":
+            print(f"Exported {controller.export_text(args.path, args.cohort)} student(s) to '{args.path}'.")
+        elif args.command == "serve":
+            where = args.socket or f"{args.host}:{args.port}"
+            print(f"Serving {controller.count_students()} students from {controller.filepath} on {where}", file=sys.stderr)
+            try:
+                asyncio.run(RecordServer(controller).serve(args.host, args.port, args.socket))
+            except KeyboardInterrupt:
+                pass
+        out.flush()
+    except BrokenPipeError:
+        # The reader stopped early (e.g. '| head'), which is fine
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    except (OSError, ValueError, csv.Error, sqlite3.Error, tk.TclError) as error:
+        print(f"Error: {error}", file=sys.stderr)
+        return 1
+    return 0
 
 # =============================================================================
 # GUI CLASSES
@@ -301,50 +2313,25 @@ class StudentForm(tk.Toplevel):
         return entry
 
     def on_save(self):
-        # Getting all the text from the inputs
-        code = self.entry_code.get().strip()
-        name = self.entry_name.get().strip()
-        cw1 = self.entry_cw1.get().strip()
-        cw2 = self.entry_cw2.get().strip()
-        cw3 = self.entry_cw3.get().strip()
-        exam = self.entry_exam.get().strip()
-
-        # Validation 1: Required fields
-        if not code or not name:
-            messagebox.showwarning("Validation", "Code and Name are required.")
+        # Getting all the text from the inputs and checking it with the shared rules
+        student, error = validate_student_fields(
+            self.entry_code.get(), self.entry_name.get(),
+            self.entry_cw1.get(), self.entry_cw2.get(), self.entry_cw3.get(),
+            self.entry_exam.get())
+
+        if error:
+            messagebox.showwarning("Validation", error)
             return
 
-        # Validation 2: Code format
-        if not (code.isdigit() and 1000 <= int(code) <= 9999):
-            messagebox.showwarning("Validation", "Code must be a number between 1000 and 9999.")
-            return
-        
-        try:
-            c1 = int(cw1)
-            c2 = int(cw2)
-            c3 = int(cw3)
-            ex = int(exam)
-
-            # Validation 3: Mark ranges
-            if not (0 <= c1 <= 20 and 0 <= c2 <= 20 and 0 <= c3 <= 20):
-                messagebox.showwarning("Validation", "Coursework marks must be between 0 and 20.")
-                return
-            if not (0 <= ex <= 100):
-                messagebox.showwarning("Validation", "Exam mark must be between 0 and 100.")
-                return
-            
-            # If everything is good, create the object and close window
-            self.result = Student(code, name, c1, c2, c3, ex)
-            self.destroy()
-
-        except ValueError:
-            messagebox.showwarning("Validation", "Marks must be numeric integers.")
+        # If everything is good, keep the object and close window
+        self.result = student
+        self.destroy()
 
 
 class MainApp(tk.Tk):
-    def __init__(self):
+    def __init__(self, controller=None):
         super().__init__()
-        self.controller = StudentController()
+        self.controller = controller or make_controller()
         
         # Removing the default feather icon by generating a transparent/colored block
         # This makes the app look more custom and less like a default Tk script.
@@ -370,6 +2357,7 @@ class MainApp(tk.Tk):
 
         self.build_sidebar()
         self.build_pages()
+        self.refresh_cohorts() # The database may already hold several cohorts
         
         # Start by showing the table view
         self.show_page("view_all")
@@ -398,6 +2386,7 @@ class MainApp(tk.Tk):
         self.create_nav_button("Class Statistics", lambda: self.show_page("stats"))
         self.create_nav_button("Highest Scorer", lambda: self.show_page("highest"))
         self.create_nav_button("Lowest Scorer", lambda: self.show_page("lowest"))
+        self.create_nav_button("History & Trends", lambda: self.show_page("history"))
         
         # Separator line
         tk.Frame(self.container_sidebar, height=2, bg=COLOR_SIDEBAR_HOVER).pack(fill="x", pady=20)
@@ -406,6 +2395,8 @@ class MainApp(tk.Tk):
         self.create_nav_button("Add New Student", self.action_add_student, bg_color=COLOR_SUCCESS)
         self.create_nav_button("Update Record", self.action_update_student, bg_color=COLOR_ACCENT)
         self.create_nav_button("Delete Record", self.action_delete_student, bg_color=COLOR_DANGER)
+        self.create_nav_button("Import CSV", self.action_import_csv, bg_color=COLOR_WARNING)
+        self.create_nav_button("Open Cohort Folder", self.action_open_cohort_folder, bg_color=COLOR_WARNING)
         
         lbl_ver = tk.Label(self.container_sidebar, text="v2.0 Pro", 
                            bg=COLOR_SIDEBAR, fg="#7f8c8d", font=("Segoe UI", 8))
@@ -425,6 +2416,7 @@ class MainApp(tk.Tk):
         self.frames["view_all"] = self.create_view_all_frame()
         self.frames["individual"] = self.create_individual_frame()
         self.frames["stats"] = self.create_stats_frame()
+        self.frames["history"] = self.create_history_frame()
 
     def create_view_all_frame(self):
         frame = tk.Frame(self.container_main, bg=COLOR_BG_MAIN)
@@ -444,14 +2436,22 @@ class MainApp(tk.Tk):
                              command=self.refresh_table_sorted)
         btn_sort.pack(side="left")
 
+        # Cohort filter, only useful once a cohort folder has been opened
+        tk.Label(sort_frame, text="Cohort:", bg=COLOR_BG_MAIN, font=FONT_BOLD).pack(side="left", padx=(30, 0))
+        self.combo_cohort = ttk.Combobox(sort_frame, values=[ALL_COHORTS], state="readonly", width=20)
+        self.combo_cohort.current(0)
+        self.combo_cohort.pack(side="left", padx=10)
+        self.combo_cohort.bind("<<ComboboxSelected>>", lambda event: self.refresh_table())
+
         # Defining columns for the Treeview
-        cols = ("Code", "Name", "CW1", "CW2", "CW3", "Exam", "Total", "%", "Grade")
+        cols = ("Code", "Name", "CW1", "CW2", "CW3", "Exam", "Total", "%", "Grade", "Cohort")
         self.tree = ttk.Treeview(frame, columns=cols, show="headings")
         
-        col_widths = [80, 200, 60, 60, 60, 60, 80, 80, 60]
+        col_widths = [80, 200, 60, 60, 60, 60, 80, 80, 60, 120]
         for col, width in zip(cols, col_widths):
             self.tree.heading(col, text=col)
             self.tree.column(col, width=width, anchor="center")
+        self.tree["displaycolumns"] = cols[:-1] # Cohort column is shown in cohort mode only
         
         # Adding a scrollbar
         scrollbar = ttk.Scrollbar(frame, orient="vertical", command=self.tree.yview)
@@ -469,14 +2469,24 @@ class MainApp(tk.Tk):
         search_frame = tk.Frame(frame, bg="white", padx=20, pady=20, relief="raised")
         search_frame.pack(pady=20)
         
-        tk.Label(search_frame, text="Enter Student Code:", font=FONT_BODY, bg="white").pack(side="left", padx=10)
+        tk.Label(search_frame, text="Code or Name:", font=FONT_BODY, bg="white").pack(side="left", padx=10)
         self.entry_search = tk.Entry(search_frame, font=FONT_BODY, width=20)
         self.entry_search.pack(side="left", padx=10)
+        # Searching as the user types (see on_search_typed)
+        self.entry_search.bind("<KeyRelease>", self.on_search_typed)
+        self.entry_search.bind("<Return>", lambda event: self.action_find_student())
+        self.search_after_id = None
         
         btn_find = tk.Button(search_frame, text="Search", bg=COLOR_ACCENT, fg="white",
                              command=self.action_find_student)
         btn_find.pack(side="left", padx=10)
 
+        # List of matches that updates while typing
+        self.list_matches = tk.Listbox(frame, font=FONT_BODY, height=6, activestyle="none")
+        self.list_matches.pack(padx=50, fill="x")
+        self.list_matches.bind("<<ListboxSelect>>", self.on_match_selected)
+        self.match_results = []
+
         # Label to show results
         self.lbl_result_details = tk.Label(frame, text="", font=("Courier New", 12), 
                                            bg="#fffbe6", justify="left", relief="solid", bd=1, padx=20, pady=20)
@@ -491,6 +2501,28 @@ class MainApp(tk.Tk):
         self.stats_container.pack(fill="both", expand=True, padx=40, pady=20)
         return frame
 
+    def create_history_frame(self):
+        frame = tk.Frame(self.container_main, bg=COLOR_BG_MAIN)
+        self.add_header(frame, "History & Trends")
+
+        pick_frame = tk.Frame(frame, bg=COLOR_BG_MAIN)
+        pick_frame.pack(fill="x", padx=40, pady=10)
+        tk.Label(pick_frame, text="Compare:", bg=COLOR_BG_MAIN, font=FONT_BOLD).pack(side="left")
+        self.combo_snapshot_old = ttk.Combobox(pick_frame, state="readonly", width=32)
+        self.combo_snapshot_old.pack(side="left", padx=10)
+        tk.Label(pick_frame, text="with", bg=COLOR_BG_MAIN, font=FONT_BODY).pack(side="left")
+        self.combo_snapshot_new = ttk.Combobox(pick_frame, state="readonly", width=32)
+        self.combo_snapshot_new.pack(side="left", padx=10)
+        btn_compare = tk.Button(pick_frame, text="Compare", bg=COLOR_SIDEBAR, fg="white",
+                                command=self.action_compare_snapshots)
+        btn_compare.pack(side="left")
+        self.snapshot_names = []
+
+        self.txt_history = tk.Text(frame, font=("Courier New", 11), bg="white", relief="solid", bd=1,
+                                   padx=20, pady=20, wrap="none")
+        self.txt_history.pack(fill="both", expand=True, padx=40, pady=(10, 40))
+        return frame
+
     def add_header(self, parent, text):
         # Adding the Emoji to page headers too for consistency
         lbl = tk.Label(parent, text="🎓 " + text, font=FONT_HEADER, 
@@ -507,6 +2539,8 @@ class MainApp(tk.Tk):
             self.refresh_table()
         elif page_name == "stats":
             self.update_stats_display()
+        elif page_name == "history":
+            self.refresh_history()
         elif page_name == "highest":
             self.show_extreme_student("high")
             return 
@@ -516,10 +2550,19 @@ class MainApp(tk.Tk):
 
         self.frames[page_name].pack(fill="both", expand=True)
 
+    def refresh_cohorts(self):
+        # Filling the cohort filter and showing the Cohort column when there are cohorts
+        cohorts = self.controller.get_cohorts()
+        self.combo_cohort["values"] = [ALL_COHORTS] + cohorts
+        self.combo_cohort.current(0)
+        cols = self.tree["columns"]
+        self.tree["displaycolumns"] = cols if cohorts else cols[:-1]
+
     def refresh_table(self, students_list=None):
-        # If no list provided, get all from controller
+        # If no list provided, get all (or the chosen cohort) from controller
         if students_list is None:
-            students_list = self.controller.students
+            cohort = self.combo_cohort.get()
+            students_list = self.controller.get_students(None if cohort == ALL_COHORTS else cohort)
         
         # Clear current table items
         for item in self.tree.get_children():
@@ -531,7 +2574,7 @@ class MainApp(tk.Tk):
                 s.code, s.name, 
                 s.coursework[0], s.coursework[1], s.coursework[2], 
                 s.exam, s.total_overall, 
-                f"{s.percentage:.2f}%", s.grade
+                f"{s.percentage:.2f}%", s.grade, s.cohort
             ))
 
     def refresh_table_sorted(self):
@@ -547,10 +2590,35 @@ class MainApp(tk.Tk):
             self.controller.sort_students('percentage', reverse=False)
         self.refresh_table()
 
+    def on_search_typed(self, event=None):
+        # Debouncing: waiting until the user stops typing for 150ms before searching,
+        # so fast typing doesn't run a search for every single letter
+        if self.search_after_id is not None:
+            self.after_cancel(self.search_after_id)
+        self.search_after_id = self.after(150, self.update_search_matches)
+
+    def update_search_matches(self):
+        self.search_after_id = None
+        self.match_results = self.controller.search_students(self.entry_search.get())
+        self.list_matches.delete(0, tk.END)
+        for s in self.match_results:
+            self.list_matches.insert(tk.END, f"{s.code}   {s.name}   ({s.grade})")
+
+    def on_match_selected(self, event=None):
+        selection = self.list_matches.curselection()
+        if selection:
+            self.show_student_details(self.match_results[selection[0]])
+
     def action_find_student(self):
-        code = self.entry_search.get().strip()
-        student = self.controller.get_student_by_code(code)
-        
+        text = self.entry_search.get().strip()
+        student = self.controller.get_student_by_code(text)
+        if not student:
+            # No exact code, so using the best search match instead
+            matches = self.controller.search_students(text, limit=1)
+            student = matches[0] if matches else None
+        self.show_student_details(student)
+
+    def show_student_details(self, student):
         if student:
             # Creating a formatted string to display results nicely
             text = (
@@ -573,22 +2641,29 @@ class MainApp(tk.Tk):
             self.lbl_result_details.config(text="Student not found.", fg="red")
 
     def show_extreme_student(self, type_):
-        if not self.controller.students:
+        ranking = self.controller.get_top_students(10, lowest=(type_ == "low"))
+        if not ranking:
             messagebox.showinfo("Info", "No students loaded.")
             return
 
-        if type_ == "high":
-            s = self.controller.get_highest_scorer()
-            title = "Highest Performing Student"
-        else:
-            s = self.controller.get_lowest_scorer()
-            title = "Lowest Performing Student"
+        s = ranking[0]
+        title = "Highest Performing Student" if type_ == "high" else "Lowest Performing Student"
             
-        # Automatically go to the find page and show this student
+        # A search still waiting from earlier typing would replace the ranking below
+        if self.search_after_id is not None:
+            self.after_cancel(self.search_after_id)
+            self.search_after_id = None
+
+        # Automatically go to the find page and show this student straight from the
+        # ranking (no need to search for them again), with the rest of the top 10 below
         self.entry_search.delete(0, tk.END)
         self.entry_search.insert(0, s.code)
         self.show_page("individual")
-        self.action_find_student()
+        self.match_results = ranking
+        self.list_matches.delete(0, tk.END)
+        for rank, r in enumerate(ranking, start=1):
+            self.list_matches.insert(tk.END, f"{rank}. {r.code}   {r.name}   ({r.percentage:.2f}%)")
+        self.show_student_details(s)
         messagebox.showinfo("🎓 " + title, f"{title} is {s.name} ({s.percentage:.2f}%)")
 
     def update_stats_display(self):
@@ -596,12 +2671,14 @@ class MainApp(tk.Tk):
         for widget in self.stats_container.winfo_children():
             widget.destroy()
 
-        if not self.controller.students:
+        count = self.controller.count_students()
+        if not count:
             tk.Label(self.stats_container, text="No Data Available", font=FONT_SUBHEADER).pack()
             return
 
-        count = len(self.controller.students)
         avg = self.controller.get_average_percentage()
+        median = self.controller.get_median()
+        std_dev = self.controller.get_std_dev()
         
         # Helper to draw statistic cards
         def draw_card(parent, title, value, color, row, col):
@@ -610,22 +2687,22 @@ class MainApp(tk.Tk):
             tk.Label(card, text=title, font=FONT_BODY, fg="#7f8c8d", bg="white").pack()
             tk.Label(card, text=value, font=("Segoe UI", 24, "bold"), fg=color, bg="white").pack()
 
-        self.stats_container.columnconfigure(0, weight=1)
-        self.stats_container.columnconfigure(1, weight=1)
+        for col in range(4):
+            self.stats_container.columnconfigure(col, weight=1)
 
         draw_card(self.stats_container, "Total Students", str(count), COLOR_ACCENT, 0, 0)
         draw_card(self.stats_container, "Class Average", f"{avg:.2f}%", COLOR_SUCCESS, 0, 1)
+        draw_card(self.stats_container, "Median", f"{median:.2f}%", COLOR_WARNING, 0, 2)
+        draw_card(self.stats_container, "Std Deviation", f"{std_dev:.2f}%", COLOR_SIDEBAR, 0, 3)
 
         tk.Label(self.stats_container, text="Grade Distribution", font=FONT_SUBHEADER, 
-                 bg=COLOR_BG_MAIN).grid(row=1, column=0, columnspan=2, pady=(30, 10))
+                 bg=COLOR_BG_MAIN).grid(row=1, column=0, columnspan=4, pady=(30, 10))
 
         dist_frame = tk.Frame(self.stats_container, bg="white")
-        dist_frame.grid(row=2, column=0, columnspan=2, sticky="ew")
+        dist_frame.grid(row=2, column=0, columnspan=4, sticky="ew")
 
         # Calculating grade counts
-        grades = {'A':0, 'B':0, 'C':0, 'D':0, 'F':0}
-        for s in self.controller.students:
-            grades[s.grade] += 1
+        grades = self.controller.get_grade_distribution()
         
         # Drawing grade bars
         for i, (g, c) in enumerate(grades.items()):
@@ -634,6 +2711,108 @@ class MainApp(tk.Tk):
             tk.Label(f, text=f"Grade {g}", font=FONT_BOLD, bg="#ecf0f1").pack()
             tk.Label(f, text=str(c), font=FONT_SUBHEADER, fg=COLOR_SIDEBAR, bg="#ecf0f1").pack()
 
+        # Percentage histogram in 10% steps, drawn as bars on a canvas
+        tk.Label(self.stats_container, text="Percentage Histogram", font=FONT_SUBHEADER,
+                 bg=COLOR_BG_MAIN).grid(row=3, column=0, columnspan=4, pady=(30, 10))
+        histogram = self.controller.get_histogram("percentage", bins=10)
+        canvas = tk.Canvas(self.stats_container, bg="white", height=140, highlightthickness=0)
+        canvas.grid(row=4, column=0, columnspan=4, sticky="ew")
+        tallest = max(c for _, _, c in histogram) or 1
+        bar_width = 60
+        for i, (low, high, c) in enumerate(histogram):
+            x = 20 + i * (bar_width + 8)
+            height = 90 * c / tallest
+            canvas.create_rectangle(x, 110 - height, x + bar_width, 110, fill=COLOR_ACCENT, outline="")
+            canvas.create_text(x + bar_width / 2, 100 - height, text=str(c), font=FONT_BODY)
+            canvas.create_text(x + bar_width / 2, 125, text=f"{low:.0f}-{high:.0f}", font=FONT_BODY)
+
+        # Summary of each component (coursework 1-3, exam and overall)
+        tk.Label(self.stats_container, text="Component Summary", font=FONT_SUBHEADER,
+                 bg=COLOR_BG_MAIN).grid(row=5, column=0, columnspan=4, pady=(30, 10))
+        summary_frame = tk.Frame(self.stats_container, bg="white")
+        summary_frame.grid(row=6, column=0, columnspan=4, sticky="ew")
+        headings = ["Component", "Mean", "Median", "Std Dev", "Min", "Max"]
+        for col, heading in enumerate(headings):
+            tk.Label(summary_frame, text=heading, font=FONT_BOLD, bg="white").grid(row=0, column=col, padx=10, sticky="w")
+        labels = {"cw1": "Coursework 1", "cw2": "Coursework 2", "cw3": "Coursework 3", "exam": "Exam", "percentage": "Overall %"}
+        for row, (column, summary) in enumerate(self.controller.get_component_summaries().items(), start=1):
+            values = [labels[column]] + [f"{summary[key]:.2f}" for key in ("mean", "median", "std_dev", "min", "max")]
+            for col, value in enumerate(values):
+                tk.Label(summary_frame, text=value, font=FONT_BODY, bg="white").grid(row=row, column=col, padx=10, sticky="w")
+
+        # Comparing cohorts when a cohort folder is open
+        cohort_summaries = self.controller.get_cohort_summaries()
+        if cohort_summaries:
+            tk.Label(self.stats_container, text="Cohorts", font=FONT_SUBHEADER,
+                     bg=COLOR_BG_MAIN).grid(row=7, column=0, columnspan=4, pady=(30, 10))
+            cohort_frame = tk.Frame(self.stats_container, bg="white")
+            cohort_frame.grid(row=8, column=0, columnspan=4, sticky="ew")
+            for col, heading in enumerate(["Cohort", "Students", "Average"]):
+                tk.Label(cohort_frame, text=heading, font=FONT_BOLD, bg="white").grid(row=0, column=col, padx=10, sticky="w")
+            for row, (cohort, summary) in enumerate(cohort_summaries.items(), start=1):
+                values = [cohort, str(summary["count"]), f"{summary['average']:.2f}%"]
+                for col, value in enumerate(values):
+                    tk.Label(cohort_frame, text=value, font=FONT_BODY, bg="white").grid(row=row, column=col, padx=10, sticky="w")
+
+    def refresh_history(self):
+        # Filling both snapshot pickers (newest last) and showing the trend of the average
+        snapshots = self.controller.get_snapshots()
+        self.snapshot_names = [h["name"] for h in snapshots]
+        labels = [f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(h['time']))}  ({h['count']} students)"
+                  for h in snapshots]
+        for combo, pick in ((self.combo_snapshot_old, -2), (self.combo_snapshot_new, -1)):
+            combo["values"] = labels
+            if labels:
+                combo.current(max(len(labels) + pick, 0))
+
+        lines = ["Class average after each save:", ""]
+        for saved, count, average in self.controller.get_trend()[-20:]:
+            lines.append(f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(saved))}  "
+                         f"{count:>6} students  {average:6.2f}%  {'#' * int(average / 2)}")
+        if not snapshots:
+            lines = ["No history yet - a snapshot is taken every time the data is saved."]
+        self.show_history_text("\n".join(lines))
+
+    def show_history_text(self, text):
+        self.txt_history.config(state="normal")
+        self.txt_history.delete("1.0", tk.END)
+        self.txt_history.insert("1.0", text)
+        self.txt_history.config(state="disabled")
+
+    def action_compare_snapshots(self):
+        old, new = self.combo_snapshot_old.current(), self.combo_snapshot_new.current()
+        if old < 0 or new < 0:
+            messagebox.showinfo("Info", "Pick two snapshots to compare.")
+            return
+        try:
+            report = self.controller.compare_snapshots(self.snapshot_names[old], self.snapshot_names[new])
+        except (OSError, ValueError) as e:
+            messagebox.showerror("History Error", f"Could not read the snapshots: {e}")
+            return
+
+        lines = [
+            f"Students:        {report['from']['count']} -> {report['to']['count']}",
+            f"Unchanged:       {report['unchanged']}",
+            f"Added:           {len(report['added'])}",
+            f"Removed:         {len(report['removed'])}",
+            f"Marks changed:   {len(report['changed'])}",
+            f"Average drift:   {report['average_drift']:+.2f}%",
+            "Grade shift:     " + "  ".join(f"{g}: {d:+d}" for g, d in report["grade_shift"].items()),
+            "",
+            "Grade changes:",
+        ]
+        for before, after in report["grade_changes"][:200]:
+            lines.append(f"  {after.code}  {after.name:<25} {before.grade} -> {after.grade}  "
+                         f"({before.percentage:.2f}% -> {after.percentage:.2f}%)")
+        if len(report["grade_changes"]) > 200:
+            lines.append(f"  ...and {len(report['grade_changes']) - 200} more.")
+        if not report["grade_changes"]:
+            lines.append("  None")
+        for title, students in (("Added", report["added"]), ("Removed", report["removed"])):
+            if students:
+                lines += ["", f"{title}:"] + [f"  {s.code}  {s.name}" for s in students[:50]]
+        self.show_history_text("\n".join(lines))
+
     # --- Actions triggered by Sidebar Buttons ---
 
     def action_add_student(self):
@@ -671,13 +2850,55 @@ class MainApp(tk.Tk):
         dialog = StudentForm(self, f"Update Student: {student.name}", current_student=student)
         self.wait_window(dialog)
         if dialog.result:
-            success, msg = self.controller.update_student(code, dialog.result)
+            success, msg = self.controller.update_student(code, dialog.result, expected=student)
             if success:
                 messagebox.showinfo("Success", msg)
                 self.show_page("view_all")
             else:
                 messagebox.showerror("Error", msg)
 
+    def action_import_csv(self):
+        path = filedialog.askopenfilename(title="Import Students",
+                                          filetypes=[("CSV files", "*.csv"), ("Text files", "*.txt"), ("All files", "*.*")])
+        if not path: return
+        try:
+            added, rejects = self.controller.import_csv(path)
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            messagebox.showerror("Import Error", f"Could not read the file: {e}")
+            return
+
+        msg = f"Imported {added} student(s)."
+        if rejects:
+            # Only listing the first few so the message box still fits on the screen
+            shown = "\n".join(f"Line {line_no}: {reason}" for line_no, reason in rejects[:10])
+            more = f"\n...and {len(rejects) - 10} more." if len(rejects) > 10 else ""
+            msg += f"\n\n{len(rejects)} row(s) rejected:\n{shown}{more}"
+            messagebox.showwarning("Import Finished", msg)
+        else:
+            messagebox.showinfo("Import Finished", msg)
+        self.show_page("view_all")
+
+    def action_open_cohort_folder(self):
+        folder = filedialog.askdirectory(title="Open Cohort Folder")
+        if not folder: return
+        try:
+            cohorts, skipped = self.controller.load_directory(folder)
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            messagebox.showerror("Load Error", f"Could not read the folder: {e}")
+            return
+        if not cohorts:
+            messagebox.showwarning("No Cohorts", "No .txt or .csv files were found in that folder.")
+            return
+
+        msg = f"Loaded {self.controller.count_students()} student(s) from {cohorts} cohort(s)."
+        if skipped:
+            msg += f"\n\n{skipped} line(s) could not be read and were skipped."
+        messagebox.showinfo("Cohorts Loaded", msg)
+        self.refresh_cohorts()
+        self.show_page("view_all")
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(run_command_line(sys.argv[1:]))
     app = MainApp()
     app.mainloop()
\ No newline at end of file